@@ -2,13 +2,29 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_caching import Cache
+from sqlalchemy import inspect
 import os
+import weakref
 from config import Config
 
 db = SQLAlchemy()
 migrate = Migrate()
 cache = Cache()
 
+# Движки баз всех созданных приложений. После fork (gunicorn --preload,
+# prefork Celery) дочерний процесс не должен использовать соединения пула
+# родителя; обработчик регистрируется один раз на процесс, а не на create_app
+_engines = weakref.WeakSet()
+
+
+def _dispose_engines():
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_engines)
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
@@ -18,15 +34,38 @@ def create_app(config_class=Config):
     migrate.init_app(app, db)
     cache.init_app(app)
 
+    from app.services.status_hub import status_hub
+    status_hub.init_app(app)
+
+    from app.services import metrics
+    metrics.init_app(app, db)
+
     # Register blueprints
     from app.routes.main import bp as main_bp
     app.register_blueprint(main_bp)
 
+    from app.commands import register_commands
+    register_commands(app)
+
     # Create upload folder
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-    # Create tables if not exist
+    # Схему создают миграции (flask db upgrade); create_all на каждом запуске - только по AUTO_CREATE_TABLES
+    if app.config['AUTO_CREATE_TABLES']:
+        with app.app_context():
+            db.create_all()
+
     with app.app_context():
-        db.create_all()
+        _engines.update(db.engines.values())
 
     return app
+
+
+def missing_schema(app):
+    """
+    Таблицы моделей, которых нет в базе приложения. Без AUTO_CREATE_TABLES
+    схему создает только flask db upgrade; сервер проверяет ее при старте
+    (gunicorn.conf.py), чтобы не отвечать ошибками на каждый запрос.
+    """
+    with app.app_context():
+        return sorted(set(db.metadata.tables) - set(inspect(db.engine).get_table_names()))
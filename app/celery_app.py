@@ -1,12 +1,26 @@
 # celery_app.py
 from celery import Celery
+from config import Config
+
+_flask_app = None
+
+
+def _get_flask_app():
+    # Приложение создается один раз на процесс воркера
+    global _flask_app
+    if _flask_app is None:
+        from app import create_app
+        _flask_app = create_app()
+    return _flask_app
 
 
 def make_celery(app=None):
+    config = app.config if app is not None else vars(Config)
+
     celery = Celery(
         'app',
-        broker='redis://localhost:6379/0',
-        backend='redis://localhost:6379/0',
+        broker=config['CELERY_BROKER_URL'],
+        backend=config['CELERY_RESULT_BACKEND'],
         include=['app.tasks']
     )
 
@@ -16,6 +30,13 @@ def make_celery(app=None):
         task_serializer='json',
         accept_content=['json'],
         result_serializer='json',
+        # Ограниченный пул: одновременно не больше IMPORT_WORKERS разборов
+        worker_concurrency=config['IMPORT_WORKERS'],
+        worker_prefetch_multiplier=1,
+        # Задание подтверждается после выполнения и возвращается в очередь,
+        # если воркер упал посреди разбора
+        task_acks_late=True,
+        task_reject_on_worker_lost=True,
         beat_schedule={
             'check-upcoming-events': {
                 'task': 'app.tasks.check_upcoming_events',
@@ -30,13 +51,11 @@ def make_celery(app=None):
 
     class ContextTask(celery.Task):
         def __call__(self, *args, **kwargs):
-            if app is not None:
-                with app.app_context():
-                    return self.run(*args, **kwargs)
-            return self.run(*args, **kwargs)
+            with (app or _get_flask_app()).app_context():
+                return self.run(*args, **kwargs)
 
     celery.Task = ContextTask
     return celery
 
 
-celery = make_celery()
\ No newline at end of file
+celery = make_celery()
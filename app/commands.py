@@ -1,8 +1,9 @@
 # commands.py
 import click
+from flask import current_app
 from flask.cli import with_appcontext
 from app import db
-from app.models.user import User
+
 
 @click.command('create-admin')
 @click.argument('username')
@@ -11,12 +12,67 @@ from app.models.user import User
 @with_appcontext
 def create_admin(username, email, password):
     """Create an admin user"""
+    from app.models.user import User
+
     user = User(username=username, email=email, is_admin=True)
     user.set_password(password)
     db.session.add(user)
     db.session.commit()
     click.echo(f'Created admin user: {username}')
 
-# В __init__.py добавить:
+
+@click.command('import-pdfs')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--workers', type=int, default=None, help='Процессов разбора (по умолчанию число CPU)')
+@click.option('--mode', type=click.Choice(['text', 'table']), default=None, help='Режим разбора (PDF_PARSER_MODE)')
+@click.option('--batch-size', type=int, default=None, help='Мероприятий в пакете записи (INGEST_BATCH_SIZE)')
+@click.option('--on-conflict', type=click.Choice(['skip', 'update']), default=None,
+              help='Существующие EKP номера (INGEST_ON_CONFLICT)')
+@click.option('--no-recursive', is_flag=True, help='Не заходить в подкаталоги')
+@with_appcontext
+def import_pdfs(directory, workers, mode, batch_size, on_conflict, no_recursive):
+    """Импорт всех PDF календарей каталога без загрузки через /upload"""
+    from app.services.bulk_import import import_directory
+
+    config = current_app.config
+    stats = import_directory(
+        directory,
+        workers=workers,
+        mode=mode or config['PDF_PARSER_MODE'],
+        batch_size=batch_size or config['INGEST_BATCH_SIZE'],
+        on_conflict=on_conflict or config['INGEST_ON_CONFLICT'],
+        max_rss_mb=config['PDF_PARSER_MAX_RSS_MB'],
+        recursive=not no_recursive,
+        echo=click.echo
+    )
+
+    elapsed = stats.elapsed or 1e-9
+    click.echo(
+        f"Файлов: {stats.files}, импортировано: {stats.imported}, "
+        f"пропущено: {stats.skipped}, ошибок: {stats.failed}"
+    )
+    click.echo(f"Страниц: {stats.pages}, мероприятий: {stats.events}, записано строк: {stats.written}")
+    click.echo(
+        f"Время: {stats.elapsed:.1f} с, {stats.pages / elapsed:.1f} стр/с, "
+        f"{stats.events / elapsed:.1f} мероприятий/с, {stats.imported / elapsed:.2f} файлов/с"
+    )
+    for name, values in sorted(stats.timings.as_dict().items(), key=lambda item: -item[1]['seconds']):
+        click.echo(f"  {name:<14}{values['seconds']:8.2f} с  {values['calls']:8d} выз.")
+    if stats.failed:
+        raise SystemExit(1)
+
+
+@click.command('geocode-events')
+@with_appcontext
+def geocode_events_command():
+    """Координаты и нормализованные города для уже загруженных мероприятий"""
+    from app.services.geo import geocode_events
+
+    updated, missing = geocode_events()
+    click.echo(f"Обновлено мероприятий: {updated}, без координат (город не найден в справочнике): {missing}")
+
+
 def register_commands(app):
-    app.cli.add_command(create_admin)
\ No newline at end of file
+    app.cli.add_command(create_admin)
+    app.cli.add_command(import_pdfs)
+    app.cli.add_command(geocode_events_command)
@@ -1,2 +1,9 @@
 
+from app.models.dictionary import EventType, Category, SportType, Discipline, Country, Region
 from app.models.event import Event
+from app.models import search  # noqa: F401  (индекс полнотекстового поиска по events)
+from app.models.import_job import ImportJob, ParserStageTotal
+from app.models.document import ImportedDocument, DocumentPage
+from app.models.dataset import DatasetState
+from app.models.notification import NotificationSubscription, Notification, NotificationState
+from app.models.favorite import Favorite
@@ -0,0 +1,11 @@
+from app import db
+from datetime import datetime
+
+
+class DatasetState(db.Model):
+    """Версия набора мероприятий, растет при каждом изменении таблицы events"""
+    __tablename__ = 'dataset_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
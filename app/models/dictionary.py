@@ -0,0 +1,157 @@
+import weakref
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import db
+
+
+class DictionaryMixin:
+    """Значение справочника: повторяющаяся строка мероприятий хранится один раз"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+
+
+class EventType(DictionaryMixin, db.Model):
+    __tablename__ = 'event_types'
+
+
+class Category(DictionaryMixin, db.Model):
+    __tablename__ = 'categories'
+
+
+class SportType(DictionaryMixin, db.Model):
+    __tablename__ = 'sport_types'
+
+
+class Discipline(DictionaryMixin, db.Model):
+    __tablename__ = 'disciplines'
+
+
+class Country(DictionaryMixin, db.Model):
+    __tablename__ = 'countries'
+
+
+class Region(DictionaryMixin, db.Model):
+    __tablename__ = 'regions'
+
+
+# Поле мероприятия в API -> справочник; в events хранится <поле>_id
+DICTIONARY_MODELS = {
+    'event_type': EventType,
+    'category': Category,
+    'sport_type': SportType,
+    'discipline': Discipline,
+    'location_country': Country,
+    'location_region': Region,
+}
+
+
+class Dictionary:
+    """
+    Имя -> id и id -> имя одного справочника в памяти процесса. Значения
+    только добавляются и не меняются, поэтому кэш не сбрасывается, а
+    дочитывается при промахе. Новые значения, добавленные в транзакции
+    сессии, попадают в кэш после фиксации.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.ids = {}
+        self.names = {}
+
+    def _remember(self, value_id, name):
+        self.ids[name] = value_id
+        self.names[value_id] = name
+
+    def load(self):
+        for value_id, name in db.session.execute(select(self.model.id, self.model.name)):
+            self._remember(value_id, name)
+
+    def name(self, value_id):
+        if value_id is None:
+            return None
+        name = self.names.get(value_id)
+        if name is None:
+            # Значение добавлено другим процессом
+            self.load()
+            name = self.names[value_id]
+        return name
+
+    def id(self, name):
+        """id значения или None, если его нет в справочнике"""
+        if name is None:
+            return None
+        value_id = self.ids.get(name)
+        if value_id is None:
+            value_id = db.session.execute(select(self.model.id).where(self.model.name == name)).scalar()
+            if value_id is not None:
+                self._remember(value_id, name)
+        return value_id
+
+    def get_or_create(self, name, session=None):
+        """id значения; отсутствующее добавляется в текущей транзакции сессии"""
+        if name is None:
+            return None
+        value_id = self.ids.get(name)
+        if value_id is not None:
+            return value_id
+
+        session = session or db.session()
+        pending = session.info.setdefault('dictionary_pending', {})
+        value_id = pending.get((self, name))
+        if value_id is not None:
+            return value_id
+
+        table = self.model.__table__
+        dialect_name = session.get_bind().dialect.name
+        if dialect_name in ('sqlite', 'postgresql'):
+            dialect = postgresql if dialect_name == 'postgresql' else sqlite
+            # Значение мог одновременно добавить другой процесс
+            stmt = dialect.insert(table).values(name=name).on_conflict_do_nothing(index_elements=['name'])
+            session.execute(stmt)
+        elif session.execute(select(table.c.id).where(table.c.name == name)).scalar() is None:
+            session.execute(table.insert().values(name=name))
+
+        value_id = session.execute(select(table.c.id).where(table.c.name == name)).scalar_one()
+        pending[(self, name)] = value_id
+        return value_id
+
+
+class Dictionaries(dict):
+    """Справочники одной базы по полям мероприятия"""
+
+    def __init__(self):
+        super().__init__((field, Dictionary(model)) for field, model in DICTIONARY_MODELS.items())
+
+    def encode(self, data, session=None):
+        """Копия словаря полей мероприятия, где названия справочных полей заменены на <поле>_id"""
+        data = dict(data)
+        for field, dictionary in self.items():
+            if field in data:
+                data[field + '_id'] = dictionary.get_or_create(data.pop(field), session)
+        return data
+
+
+# Кэш на каждый движок: процесс может работать с несколькими базами (бенчмарки, миграции)
+_dictionaries = weakref.WeakKeyDictionary()
+
+
+def dictionaries():
+    """Справочники базы текущего приложения"""
+    engine = db.engine
+    result = _dictionaries.get(engine)
+    if result is None:
+        result = _dictionaries[engine] = Dictionaries()
+    return result
+
+
+@event.listens_for(Session, 'after_commit')
+def _remember_pending_values(session):
+    for (dictionary, name), value_id in session.info.pop('dictionary_pending', {}).items():
+        dictionary._remember(value_id, name)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_pending_values(session):
+    # Откаченные вставки не должны попасть в кэш
+    session.info.pop('dictionary_pending', None)
@@ -0,0 +1,52 @@
+from app import db
+from datetime import datetime
+import json
+
+
+class ImportedDocument(db.Model):
+    """Импортированный PDF календаря с хэшем содержимого"""
+    __tablename__ = 'imported_documents'
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False)
+    filename = db.Column(db.String(255))
+    page_count = db.Column(db.Integer, nullable=False, default=0)
+    is_complete = db.Column(db.Boolean, nullable=False, default=False)
+    # Мероприятия предыдущей версии документа, пропавшие из этой (JSON-список EKP)
+    removed_ekp_numbers = db.Column(db.Text)
+    imported_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    pages = db.relationship('DocumentPage', backref='document', lazy='dynamic',
+                            cascade='all, delete-orphan')
+
+    @property
+    def removed(self):
+        return json.loads(self.removed_ekp_numbers) if self.removed_ekp_numbers else []
+
+    def ekp_numbers(self):
+        numbers = set()
+        for page in self.pages:
+            numbers.update(page.ekp_list)
+        return numbers
+
+
+class DocumentPage(db.Model):
+    """Отпечаток страницы: хэш текста и вид спорта на её границах"""
+    __tablename__ = 'document_pages'
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('imported_documents.id'), nullable=False)
+    page_num = db.Column(db.Integer, nullable=False)
+    text_hash = db.Column(db.String(64), nullable=False)
+    start_sport_type = db.Column(db.String(100))
+    end_sport_type = db.Column(db.String(100))
+    ekp_numbers = db.Column(db.Text, nullable=False, default='[]')
+
+    __table_args__ = (
+        db.Index('ix_document_pages_text_hash', 'text_hash'),
+        db.UniqueConstraint('document_id', 'page_num'),
+    )
+
+    @property
+    def ekp_list(self):
+        return json.loads(self.ekp_numbers)
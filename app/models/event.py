@@ -1,5 +1,57 @@
 from app import db
+from app.models.dictionary import DICTIONARY_MODELS, dictionaries
+from app.models.favorite import Favorite
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+TIME_STATUS_KEYS = ('status', 'days_left', 'message', 'color')
+
+# Кэш строк дат по порядковому номеру дня: в выдаче много одинаковых дат
+_date_strings = {}
+
+
+def format_date(value):
+    """Форматирует дату как strftime('%d.%m.%Y'), используя кэш по дню"""
+    ordinal = value.toordinal()
+    text = _date_strings.get(ordinal)
+    if text is None:
+        text = _date_strings[ordinal] = value.strftime('%d.%m.%Y')
+    return text
+
+
+def _classify_time(start_date, end_date, now):
+    """Статус мероприятия и число оставшихся дней относительно now"""
+    if now < start_date:
+        # До начала события
+        return 'upcoming', (start_date - now).days
+    elif now <= end_date:
+        # Событие идет
+        return 'ongoing', (end_date - now).days
+    # Событие завершено
+    return 'completed', 0
+
+
+@lru_cache(maxsize=2048)
+def _time_status_fields(status, days_left):
+    """Поля статуса (status, days_left, message, color); одинаковые сочетания повторяются"""
+    if status == 'upcoming':
+        return status, days_left, f'До начала: {days_left} дн.', 'text-blue-600'
+    elif status == 'ongoing':
+        return status, days_left, f'До окончания: {days_left} дн.', 'text-red-600'
+    return status, 0, 'Мероприятие завершено', 'text-gray-600'
+
+
+def _dictionary_property(field):
+    """Название справочного поля у объекта Event; в таблице хранится <поле>_id"""
+    column = field + '_id'
+
+    def getter(self):
+        return dictionaries()[field].name(getattr(self, column))
+
+    def setter(self, name):
+        setattr(self, column, dictionaries()[field].get_or_create(name))
+
+    return property(getter, setter)
 
 
 class Event(db.Model):
@@ -8,57 +60,70 @@ class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     ekp_number = db.Column(db.String(20), unique=True, nullable=False)
     name = db.Column(db.String(500), nullable=False)
-    event_type = db.Column(db.String(100), default='Физкультурные')
-    category = db.Column(db.String(100), default='ВСЕРОССИЙСКИЕ ФИЗКУЛЬТУРНЫЕ МЕРОПРИЯТИЯ')
-    sport_type = db.Column(db.String(100), nullable=False)
-    discipline = db.Column(db.String(100))
+    # Повторяющиеся строки - ссылки на справочники (models/dictionary.py)
+    event_type_id = db.Column(db.Integer, db.ForeignKey('event_types.id'))
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'))
+    sport_type_id = db.Column(db.Integer, db.ForeignKey('sport_types.id'), nullable=False)
+    discipline_id = db.Column(db.Integer, db.ForeignKey('disciplines.id'))
     program = db.Column(db.String(100))
     start_date = db.Column(db.DateTime, nullable=False)
     end_date = db.Column(db.DateTime, nullable=False)
-    location_country = db.Column(db.String(100), nullable=False)
-    location_region = db.Column(db.String(100))
+    location_country_id = db.Column(db.Integer, db.ForeignKey('countries.id'), nullable=False)
+    location_region_id = db.Column(db.Integer, db.ForeignKey('regions.id'))
     location_city = db.Column(db.String(100))
     venue = db.Column(db.String(200))
     participants_count = db.Column(db.Integer)
     gender = db.Column(db.String(50))
     age_group = db.Column(db.String(100))
+    # Координаты города из справочника app/data/gazetteer.csv (services/geo.py)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+
+    # Индексы под комбинации фильтров /events (вид спорта, регион, диапазон дат),
+    # выборки ближайших/текущих событий и проверки EXISTS для /sports и /regions.
+    # Изменения здесь сопровождаются миграцией в migrations/versions.
+    __table_args__ = (
+        db.Index('ix_events_start_date_id', 'start_date', 'id'),
+        db.Index('ix_events_end_date_start_date', 'end_date', 'start_date'),
+        db.Index('ix_events_sport_start_date', 'sport_type_id', 'start_date', 'id'),
+        db.Index('ix_events_region_start_date', 'location_region_id', 'start_date', 'id'),
+        db.Index('ix_events_sport_region_start_date', 'sport_type_id', 'location_region_id', 'start_date', 'id'),
+    )
+
+    # Названия справочных полей у объектов; в запросах - колонки <поле>_id
+    event_type = _dictionary_property('event_type')
+    category = _dictionary_property('category')
+    sport_type = _dictionary_property('sport_type')
+    discipline = _dictionary_property('discipline')
+    location_country = _dictionary_property('location_country')
+    location_region = _dictionary_property('location_region')
+
+    # Значения справочных полей по умолчанию при импорте
+    DICTIONARY_DEFAULTS = {
+        'event_type': 'Физкультурные',
+        'category': 'ВСЕРОССИЙСКИЕ ФИЗКУЛЬТУРНЫЕ МЕРОПРИЯТИЯ',
+    }
+
+    # Поля мероприятия в выдаче (to_dict, выгрузка CSV)
+    SERIALIZED_COLUMNS = (
+        'id', 'ekp_number', 'name', 'event_type', 'category', 'sport_type', 'discipline',
+        'program', 'start_date', 'end_date', 'location_country', 'location_region',
+        'location_city', 'venue', 'participants_count', 'gender', 'age_group'
+    )
+    # Колонки таблицы для этих полей: справочные поля выбираются как <поле>_id
+    ROW_COLUMNS = tuple(
+        name + '_id' if name in DICTIONARY_MODELS else name for name in SERIALIZED_COLUMNS
+    )
 
-
+    @staticmethod
+    def time_status(start_date, end_date, now=None):
+        """Вычисляет статус времени мероприятия по датам начала и окончания"""
+        fields = _time_status_fields(*_classify_time(start_date, end_date, now or datetime.utcnow()))
+        return dict(zip(TIME_STATUS_KEYS, fields))
 
     def get_time_status(self):
         """Получает статус времени мероприятия"""
-        now = datetime.utcnow()
-
-        if now < self.start_date:
-            # До начала события
-            days_left = (self.start_date - now).days
-            return {
-                'status': 'upcoming',
-                'days_left': days_left,
-                'message': f'До начала: {days_left} дн.',
-                'color': 'text-blue-600'
-            }
-        elif now <= self.end_date:
-            # Событие идет
-            days_left = (self.end_date - now).days
-            return {
-                'status': 'ongoing',
-                'days_left': days_left,
-                'message': f'До окончания: {days_left} дн.',
-                'color': 'text-red-600'
-            }
-        else:
-            # Событие завершено
-            return {
-                'status': 'completed',
-                'days_left': 0,
-                'message': 'Мероприятие завершено',
-                'color': 'text-gray-600'
-            }
-
-
-
-
+        return self.time_status(self.start_date, self.end_date)
 
     @classmethod
     def from_pdf_data(cls, data):
@@ -82,46 +147,96 @@ class Event(db.Model):
         Преобразует событие в словарь.
         Если указан user_id, добавляет информацию об избранном
         """
-        time_status = self.get_time_status()
-
-        return {
-            'id': self.id,
-            'ekp_number': self.ekp_number,
-            'name': self.name,
-            'event_type': self.event_type,
-            'category': self.category,
-            'sport_type': self.sport_type,
-            'discipline': self.discipline,
-            'program': self.program,
-            'start_date': self.start_date.strftime('%d.%m.%Y'),
-            'end_date': self.end_date.strftime('%d.%m.%Y'),
-            'location_country': self.location_country,
-            'location_region': self.location_region,
-            'location_city': self.location_city,
-            'venue': self.venue,
-            'participants_count': self.participants_count,
-            'gender': self.gender,
-            'age_group': self.age_group,
-            # Дополнительные поля статуса
-            'time_status': time_status['status'],
-            'days_left': time_status['days_left'],
-            'time_message': time_status['message'],
-            'time_color': time_status['color'],
-            'is_favorite': self.is_favorite(user_id) if user_id else False
-        }
+        data = self.row_to_dict(self)
+        data['is_favorite'] = self.is_favorite(user_id) if user_id else False
+        return data
+
+    def is_favorite(self, user_id):
+        """Событие в избранном пользователя (по кэшированному множеству id)"""
+        return self.id in Favorite.ids_for_user(user_id)
+
+    @classmethod
+    def serialized_columns(cls):
+        """Колонки для выборки строк, которые понимает row_to_dict"""
+        return [getattr(cls, name) for name in cls.ROW_COLUMNS]
+
+    @classmethod
+    def row_to_dict(cls, row):
+        """
+        Преобразует строку с колонками SERIALIZED_COLUMNS (или объект Event)
+        в тот же словарь, что и to_dict, без загрузки ORM-объекта
+        """
+        return cls.serialize_rows([row])[0]
+
+    @classmethod
+    def serialize_rows(cls, rows, now=None, favorite_ids=frozenset()):
+        """
+        Сериализует пачку строк (список или результат запроса) так же, как row_to_dict.
+        Текущее время читается один раз на пачку, статусы, даты и названия
+        справочных полей берутся из кэшей.
+        favorite_ids - id избранных событий пользователя для поля is_favorite
+        """
+        now = now or datetime.utcnow()
+        result = []
+        names = dictionaries()
+        event_type_name = names['event_type'].name
+        category_name = names['category'].name
+        sport_type_name = names['sport_type'].name
+        discipline_name = names['discipline'].name
+        country_name = names['location_country'].name
+        region_name = names['location_region'].name
+
+        for row in rows:
+            start_date, end_date = row.start_date, row.end_date
+            status, days_left, message, color = _time_status_fields(
+                *_classify_time(start_date, end_date, now)
+            )
+            result.append({
+                'id': row.id,
+                'ekp_number': row.ekp_number,
+                'name': row.name,
+                'event_type': event_type_name(row.event_type_id),
+                'category': category_name(row.category_id),
+                'sport_type': sport_type_name(row.sport_type_id),
+                'discipline': discipline_name(row.discipline_id),
+                'program': row.program,
+                'start_date': format_date(start_date),
+                'end_date': format_date(end_date),
+                'location_country': country_name(row.location_country_id),
+                'location_region': region_name(row.location_region_id),
+                'location_city': row.location_city,
+                'venue': row.venue,
+                'participants_count': row.participants_count,
+                'gender': row.gender,
+                'age_group': row.age_group,
+                # Дополнительные поля статуса
+                'time_status': status,
+                'days_left': days_left,
+                'time_message': message,
+                'time_color': color,
+                'is_favorite': row.id in favorite_ids
+            })
+
+        return result
 
     @staticmethod
     def get_user_favorites(user_id):
         """Получает все избранные события пользователя"""
-        return Event.query.join(Favorite).filter(Favorite.user_id == user_id).all()
+        return Event.query.join(Favorite, Favorite.event_id == Event.id).filter(
+            Favorite.user_id == user_id
+        ).order_by(Event.start_date, Event.id).all()
 
     @staticmethod
-    def get_upcoming_events(days=7):
-        """Получает предстоящие события"""
-        now = datetime.utcnow()
+    def get_upcoming_events(days=7, now=None, since=None):
+        """
+        Получает предстоящие события.
+        С since - только начинающиеся позже since (уже просмотренные пропускаются)
+        """
+        now = now or datetime.utcnow()
         end_date = now + timedelta(days=days)
+        start_filter = Event.start_date > since if since and since > now else Event.start_date >= now
         return Event.query.filter(
-            Event.start_date >= now,
+            start_filter,
             Event.start_date <= end_date
         ).order_by(Event.start_date).all()
 
@@ -0,0 +1,73 @@
+from app import db, cache
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class Favorite(db.Model):
+    """Мероприятие в избранном пользователя"""
+    __tablename__ = 'favorites'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Избранное пользователя и проверка пары (пользователь, мероприятие)
+        db.Index('ix_favorites_user_event', 'user_id', 'event_id', unique=True),
+        db.Index('ix_favorites_event_id', 'event_id'),
+    )
+
+    CACHE_TIMEOUT = 3600
+
+    @staticmethod
+    def _cache_key(user_id):
+        return f'favorites:{user_id}'
+
+    @classmethod
+    def ids_for_user(cls, user_id):
+        """Множество id избранных мероприятий пользователя; кэшируется до изменения избранного"""
+        key = cls._cache_key(user_id)
+        ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(
+                event_id for (event_id,) in db.session.query(cls.event_id).filter(cls.user_id == user_id)
+            )
+            cache.set(key, ids, timeout=cls.CACHE_TIMEOUT)
+        return ids
+
+    @classmethod
+    def lookup(cls, user_id, event_ids):
+        """Какие из event_ids в избранном пользователя - одним запросом на всю страницу"""
+        if not event_ids:
+            return frozenset()
+        return frozenset(
+            event_id for (event_id,) in db.session.query(cls.event_id).filter(
+                cls.user_id == user_id, cls.event_id.in_(list(event_ids))
+            )
+        )
+
+    @classmethod
+    def invalidate(cls, user_id):
+        cache.delete(cls._cache_key(user_id))
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_favorites(session, flush_context):
+    users = session.info.setdefault('favorite_users', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Favorite):
+            users.add(obj.user_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_favorites(session):
+    # Кэш сбрасывается после фиксации, чтобы не закэшировать незафиксированное
+    for user_id in session.info.pop('favorite_users', ()):
+        Favorite.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_favorites(session):
+    session.info.pop('favorite_users', None)
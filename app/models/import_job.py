@@ -0,0 +1,106 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+import json
+import uuid
+
+
+class ImportJob(db.Model):
+    """Задание на импорт PDF календаря, переживает перезапуск воркера"""
+    __tablename__ = 'import_jobs'
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: uuid.uuid4().hex)
+    filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=QUEUED, index=True)
+    # Воркер (host:pid), забравший задание; аренда продлевается записями
+    # прогресса (updated_at) и истекает через IMPORT_JOB_STALE_AFTER
+    worker = db.Column(db.String(100))
+
+    # Контрольная точка: все страницы до pages_done записаны в базу
+    pages_done = db.Column(db.Integer, nullable=False, default=0)
+    checkpoint_sport_type = db.Column(db.String(100))
+
+    total_pages = db.Column(db.Integer, nullable=False, default=0)
+    current_page = db.Column(db.Integer, nullable=False, default=0)
+    processed_events = db.Column(db.Integer, nullable=False, default=0)
+    progress = db.Column(db.Float, nullable=False, default=0)
+    message = db.Column(db.String(500))
+    error = db.Column(db.Text)
+    document_id = db.Column(db.Integer, db.ForeignKey('imported_documents.id'))
+
+    # JSON: стадия разбора -> {'seconds': ..., 'calls': ...}
+    stage_timings = db.Column(db.Text)
+    # Семплирующий профилировщик; флаг можно включить и во время разбора
+    profile = db.Column(db.Boolean, nullable=False, default=False)
+    profile_path = db.Column(db.String(500))
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.COMPLETED, self.FAILED)
+
+    def to_status(self):
+        """Статус в формате update_status парсера"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'message': self.message,
+            'progress': self.progress,
+            'current_page': self.current_page,
+            'total_pages': self.total_pages,
+            'processed_events': self.processed_events,
+            'total_events': 0
+        }
+
+    def to_dict(self):
+        from app.models.document import ImportedDocument
+
+        document = db.session.get(ImportedDocument, self.document_id) if self.document_id else None
+        data = self.to_status()
+        data.update({
+            'filename': self.filename,
+            'pages_done': self.pages_done,
+            'worker': self.worker,
+            'error': self.error,
+            'removed_ekp_numbers': document.removed if document else [],
+            'stage_timings': json.loads(self.stage_timings) if self.stage_timings else {},
+            'profile': self.profile,
+            'profile_path': self.profile_path,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        })
+        return data
+
+
+class ParserStageTotal(db.Model):
+    """Суммы времени стадий разбора по всем запускам заданий импорта, для /metrics"""
+    __tablename__ = 'parser_stage_totals'
+
+    stage = db.Column(db.String(50), primary_key=True)
+    seconds = db.Column(db.Float, nullable=False, default=0)
+    calls = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def add(cls, timings):
+        """Прибавляет сводку StageTimer.as_dict() одного запуска; фиксирует вызывающий"""
+        for stage, values in timings.items():
+            increment = update(cls).where(cls.stage == stage).values(
+                seconds=cls.seconds + values['seconds'], calls=cls.calls + values['calls']
+            )
+            if db.session.execute(increment).rowcount:
+                continue
+            try:
+                with db.session.begin_nested():
+                    db.session.add(cls(stage=stage, seconds=values['seconds'], calls=values['calls']))
+            except IntegrityError:
+                # Строку стадии только что создало другое задание
+                db.session.execute(increment)
@@ -0,0 +1,71 @@
+from app import db
+from datetime import datetime
+import json
+
+
+class NotificationSubscription(db.Model):
+    """Подписка получателя на вид спорта, регион или отдельное мероприятие"""
+    __tablename__ = 'notification_subscriptions'
+
+    SPORT = 'sport'
+    REGION = 'region'
+    EVENT = 'event'
+    KINDS = (SPORT, REGION, EVENT)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, index=True)
+    email = db.Column(db.String(255), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    # Название вида спорта или региона, для EVENT - id мероприятия
+    value = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Подбор подписчиков для пачки мероприятий
+        db.Index('ix_notification_subscriptions_kind_value', 'kind', 'value'),
+        db.UniqueConstraint('email', 'kind', 'value', name='uq_notification_subscriptions_email_kind_value'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'email': self.email,
+            'kind': self.kind,
+            'value': self.value,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class Notification(db.Model):
+    """Письмо получателю о мероприятиях, которые начнутся в ближайшие дни"""
+    __tablename__ = 'notifications'
+
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(255), nullable=False)
+    user_id = db.Column(db.Integer)
+    # JSON-список id мероприятий
+    event_ids = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    expired = db.Column(db.Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        # Очередь неотправленных уведомлений
+        db.Index('ix_notifications_sent_at_id', 'sent_at', 'id'),
+    )
+
+    def event_id_list(self):
+        return json.loads(self.event_ids)
+
+
+class NotificationState(db.Model):
+    """Отметка последней проверки ближайших мероприятий"""
+    __tablename__ = 'notification_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Мероприятия с началом до horizon уже обработаны
+    horizon = db.Column(db.DateTime, nullable=False)
+    # Мероприятия с id до last_event_id уже были в базе на момент проверки
+    last_event_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,94 @@
+from sqlalchemy import event, text
+from app.models.event import Event
+
+# Полнотекстовый индекс мероприятий: FTS5 на SQLite, tsvector с GIN на PostgreSQL.
+# Индекс поддерживают триггеры на events, поэтому он совпадает с таблицей при
+# любой записи. Batch-миграции, пересоздающие events на SQLite, удаляют
+# триггеры и должны создать их заново.
+
+# Поля events, от которых зависит документ поиска
+SEARCH_SOURCE_COLUMNS = 'name, sport_type_id, discipline_id, location_city, location_region_id, venue'
+
+
+def _sqlite_document(row):
+    """Колонки документа event_search для строки row; «ё» приводится к «е», как в запросах"""
+    def fold(expression):
+        return f"replace(replace({expression}, 'ё', 'е'), 'Ё', 'Е')"
+
+    return ', '.join((
+        fold(f'{row}.name'),
+        fold(f'(SELECT name FROM sport_types WHERE id = {row}.sport_type_id)'),
+        fold(f'(SELECT name FROM disciplines WHERE id = {row}.discipline_id)'),
+        fold(f"coalesce({row}.location_city, '') || ' ' || coalesce("
+             f"(SELECT name FROM regions WHERE id = {row}.location_region_id), '') || ' ' || "
+             f"coalesce({row}.venue, '')"),
+        f"'s' || {row}.sport_type_id || coalesce(' r' || {row}.location_region_id, '')",
+    ))
+
+
+def _postgresql_document(row):
+    """tsvector документа: название весит больше вида спорта и места, дисциплина - меньше"""
+    return ' || '.join((
+        f"setweight(to_tsvector('russian', {row}.name), 'A')",
+        "setweight(to_tsvector('russian', coalesce("
+        f"(SELECT name FROM sport_types WHERE id = {row}.sport_type_id), '')), 'B')",
+        "setweight(to_tsvector('russian', coalesce("
+        f"(SELECT name FROM disciplines WHERE id = {row}.discipline_id), '')), 'C')",
+        f"setweight(to_tsvector('russian', concat_ws(' ', {row}.location_city, "
+        f"(SELECT name FROM regions WHERE id = {row}.location_region_id), {row}.venue)), 'B')",
+    ))
+
+
+SQLITE_DDL = [
+    # tags - метки фильтров (s<id вида спорта>, r<id региона>): фильтры по ним
+    # пересекаются внутри индекса, без чтения строк events; prefix - отдельные
+    # индексы префиксов, по которым ищутся основы слов (services/search.py)
+    "CREATE VIRTUAL TABLE event_search USING fts5("
+    "name, sport, discipline, place, tags, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '3 4 5 6')",
+    f"""CREATE TRIGGER event_search_insert AFTER INSERT ON events BEGIN
+        INSERT INTO event_search (rowid, name, sport, discipline, place, tags) SELECT new.id, {_sqlite_document('new')};
+    END""",
+    f"""CREATE TRIGGER event_search_update AFTER UPDATE OF {SEARCH_SOURCE_COLUMNS} ON events BEGIN
+        DELETE FROM event_search WHERE rowid = old.id;
+        INSERT INTO event_search (rowid, name, sport, discipline, place, tags) SELECT new.id, {_sqlite_document('new')};
+    END""",
+    """CREATE TRIGGER event_search_delete AFTER DELETE ON events BEGIN
+        DELETE FROM event_search WHERE rowid = old.id;
+    END""",
+]
+
+POSTGRESQL_DDL = [
+    'CREATE TABLE event_search ('
+    'event_id INTEGER PRIMARY KEY REFERENCES events (id) ON DELETE CASCADE, document TSVECTOR NOT NULL)',
+    'CREATE INDEX ix_event_search_document ON event_search USING GIN (document)',
+    f"""CREATE FUNCTION event_search_refresh() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO event_search (event_id, document) VALUES (NEW.id, {_postgresql_document('NEW')})
+        ON CONFLICT (event_id) DO UPDATE SET document = EXCLUDED.document;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql""",
+    f'CREATE TRIGGER event_search_refresh AFTER INSERT OR UPDATE OF {SEARCH_SOURCE_COLUMNS} ON events '
+    'FOR EACH ROW EXECUTE FUNCTION event_search_refresh()',
+]
+
+DROP_DDL = {
+    'sqlite': ['DROP TABLE IF EXISTS event_search'],
+    'postgresql': ['DROP TABLE IF EXISTS event_search', 'DROP FUNCTION IF EXISTS event_search_refresh() CASCADE'],
+}
+
+
+@event.listens_for(Event.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    # Схему в production создают миграции (0005_dataset_state, пересоздает
+    # 0010_event_dictionaries); create_all - тестовые базы и бенчмарки
+    ddl = {'sqlite': SQLITE_DDL, 'postgresql': POSTGRESQL_DDL}.get(connection.dialect.name, [])
+    for statement in ddl:
+        connection.execute(text(statement))
+
+
+@event.listens_for(Event.__table__, 'before_drop')
+def _drop_search_index(target, connection, **kw):
+    for statement in DROP_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
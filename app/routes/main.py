@@ -1,27 +1,37 @@
 from flask import Blueprint, render_template, request, jsonify, current_app, json, send_file, flash, redirect, url_for, abort
 from werkzeug.utils import secure_filename
 from app.models.event import Event
-from app.services.parser import PDFParser
+from app.models.import_job import ImportJob
+from app.models.notification import NotificationSubscription
+from app.models.favorite import Favorite
+from app.models.dictionary import DICTIONARY_MODELS, dictionaries
+from app.services.imports import enqueue_import
+from app.services.status_hub import status_hub
+from app.services.dataset import dataset_version
+from app.services.response_cache import versioned_cache
+from app.services.export import EXPORT_FORMATS, encode_stream
+from app.services.snapshot import event_snapshot
+from app.services.geo import geo_index
+from app.services.search import EventSearch, matching_ids, valid_search_query
+from app.services.facets import FACET_FIELDS, facet_rows, facet_rollup, count_facets
+from app.services.metrics import registry
 from app import db, cache
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 from flask import Response, stream_with_context
 import json
-import queue
-import threading
 import secrets
 from flask_login import login_user, logout_user, login_required, current_user
 import time
+import base64
+from functools import partial
+from sqlalchemy import func, tuple_
 
 logger = logging.getLogger(__name__)
 
 bp = Blueprint('main', __name__)
 
-status_queue = queue.Queue()
-
-
-
 
 @bp.route('/')
 @cache.cached(timeout=300)
@@ -34,48 +44,530 @@ def index():
 
 
 
+# Параметры фильтров /events, от которых зависит выборка
+EVENT_FILTER_ARGS = ('sport_type', 'region', 'start_date', 'end_date', 'q')
+
+
+def dictionary_filter_id(field, name):
+    """id значения справочника для фильтра; неизвестное название не совпадает ни с одной строкой"""
+    value_id = dictionaries()[field].id(name)
+    return -1 if value_id is None else value_id
+
+
+def used_dictionary_values(field):
+    """
+    Названия справочника, которые есть хотя бы у одного мероприятия: для
+    каждого значения - поиск по индексу (EXISTS) вместо DISTINCT по всей таблице
+    """
+    model = DICTIONARY_MODELS[field]
+    column = getattr(Event, field + '_id')
+    return db.session.query(model.name).filter(
+        db.session.query(Event.id).filter(column == model.id).exists()
+    ).order_by(model.name)
+
+
+def apply_event_filters(query, args):
+    """Применяет к запросу фильтры /events из параметров запроса"""
+    sport_type = args.get('sport_type')
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    region = args.get('region')
+    q = args.get('q')
+
+    if q:
+        query = query.filter(Event.id.in_(matching_ids(q)))
+    if sport_type:
+        query = query.filter(Event.sport_type_id == dictionary_filter_id('sport_type', sport_type))
+    if region:
+        query = query.filter(Event.location_region_id == dictionary_filter_id('location_region', region))
+    if start_date:
+        date_obj = datetime.strptime(start_date, '%Y-%m-%d')
+        query = query.filter(Event.start_date >= date_obj)
+    if end_date:
+        date_obj = datetime.strptime(end_date, '%Y-%m-%d')
+        # Событие не начинается позже, чем заканчивается: та же граница для
+        # start_date позволяет читать диапазон индекса по дате начала
+        query = query.filter(Event.end_date <= date_obj, Event.start_date <= date_obj)
+
+    return query
+
+
+def favorites_user_id(requested_user_id):
+    """
+    Пользователь избранного или None. Своих учетных записей в приложении нет:
+    если подключен Flask-Login (LoginManager), пользователь берется из сессии
+    (current_user), а user_id из запроса игнорируется. Без него user_id из
+    запроса принимается только при FAVORITES_TRUST_USER_ID - когда API стоит
+    за прокси, который сам проверяет пользователя. По умолчанию избранное
+    выключено: /favorites отвечают 404, user_id в /events не учитывается.
+    """
+    if getattr(current_app, 'login_manager', None) is not None:
+        return int(current_user.get_id()) if current_user.is_authenticated else None
+    if current_app.config['FAVORITES_TRUST_USER_ID'] and isinstance(requested_user_id, int):
+        return requested_user_id
+    return None
+
+
+def favorites_unavailable():
+    """Ответ маршрутов /favorites, когда пользователя определить нельзя"""
+    if getattr(current_app, 'login_manager', None) is not None:
+        return jsonify({'error': 'Login required'}), 401
+    if not current_app.config['FAVORITES_TRUST_USER_ID']:
+        return jsonify({'error': 'Favorites are disabled'}), 404
+    return jsonify({'error': 'user_id is required'}), 400
+
+
+def request_favorite_ids():
+    """Избранное пользователя запроса (favorites_user_id) или пустое множество"""
+    user_id = favorites_user_id(request.args.get('user_id', type=int))
+    return Favorite.ids_for_user(user_id) if user_id else frozenset()
+
+
+def favorites_cache_part():
+    # Ответ с is_favorite зависит от избранного пользователя, а не только от версии данных
+    return sorted(request_favorite_ids())
+
+
+def encode_cursor(row):
+    """Непрозрачный курсор на позицию (start_date, id) последней отданной строки"""
+    payload = json.dumps([row.start_date.isoformat(), row.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    start_date, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(start_date), int(event_id)
+
+
+def encode_search_cursor(event_id):
+    """Курсор поиска: id последней отданной строки"""
+    payload = json.dumps([event_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_search_cursor(cursor):
+    event_id, = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return int(event_id)
+
+
+def filtered_events_total(args):
+    """Количество событий под фильтрами, кэшируется до изменения набора данных"""
+    key = f'events-total:{dataset_version()}:' + json.dumps(
+        [args.get(name) or None for name in EVENT_FILTER_ARGS]
+    )
+    total = cache.get(key)
+    if total is None:
+        if args.get('q'):
+            total = event_search(args).count()
+        else:
+            total = apply_event_filters(db.session.query(func.count(Event.id)), args).scalar()
+        cache.set(key, total, timeout=current_app.config['EVENTS_TOTAL_CACHE_TIMEOUT'])
+    return total
+
+
+def month_calendar(year, month, args):
+    """
+    События месяца по дням одним запросом по диапазону: выбираются все события,
+    пересекающиеся с месяцем (в том числе начавшиеся раньше или закончившиеся
+    позже), и раскладываются по дням месяца, на которые приходятся
+    """
+    month_start = datetime(year, month, 1)
+    month_end = datetime(year + month // 12, month % 12 + 1, 1)
+    days_in_month = (month_end - month_start).days
+
+    # Фильтры по датам задает сам месяц
+    filters = {name: args.get(name) for name in ('sport_type', 'region')}
+    rows = apply_event_filters(
+        db.session.query(Event.id, Event.name, Event.sport_type_id, Event.start_date, Event.end_date),
+        filters
+    ).filter(
+        Event.start_date < month_end,
+        Event.end_date >= month_start
+    ).order_by(Event.start_date, Event.id).all()
+
+    now = datetime.utcnow()
+    days = [[] for _ in range(days_in_month)]
+    events = []
+    sport_type_name = dictionaries()['sport_type'].name
+
+    for row in rows:
+        events.append({
+            'id': row.id,
+            'name': row.name,
+            'sport_type': sport_type_name(row.sport_type_id),
+            'time_status': Event.time_status(row.start_date, row.end_date, now)['status']
+        })
+        first_day = max((row.start_date - month_start).days, 0)
+        last_day = min((row.end_date - month_start).days, days_in_month - 1)
+        for day in range(first_day, last_day + 1):
+            days[day].append(row.id)
+
+    return {
+        'year': year,
+        'month': month,
+        'total': len(events),
+        # Краткие карточки событий; дни ссылаются на них по id
+        'events': events,
+        'days': [
+            {
+                'date': (month_start + timedelta(days=day)).strftime('%Y-%m-%d'),
+                'count': len(event_ids),
+                'events': event_ids
+            }
+            for day, event_ids in enumerate(days)
+        ]
+    }
+
+
+def events_from_snapshot(per_page, favorite_ids=frozenset()):
+    """Ответ /events из снимка в памяти: тот же формат, что и у запросов к базе"""
+    snapshot = event_snapshot.get()
+
+    if 'cursor' not in request.args:
+        page = max(request.args.get('page', 1, type=int), 1)
+        positions = snapshot.positions(request.args)
+        offset = (page - 1) * per_page
+        return jsonify({
+            'events': Event.serialize_rows(
+                snapshot.rows(positions[offset:offset + per_page]), favorite_ids=favorite_ids
+            ),
+            'has_next': offset + per_page < len(positions),
+            'total': len(positions)
+        })
+
+    after = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    positions = snapshot.positions(request.args, after=after)
+    rows = snapshot.rows(positions[:per_page])
+    has_next = len(positions) > per_page
+
+    response = {
+        'events': Event.serialize_rows(rows, favorite_ids=favorite_ids),
+        'has_next': has_next,
+        'next_cursor': encode_cursor(rows[-1]) if has_next else None
+    }
+    if request.args.get('with_total', type=int):
+        response['total'] = len(snapshot.positions(request.args)) if after else len(positions)
+    return jsonify(response)
+
+
+def parse_near(args):
+    """Центр и радиус поиска из near=lat,lon и radius_km; ValueError при неверных значениях"""
+    latitude, longitude = (float(value) for value in args['near'].split(','))
+    radius_km = float(args.get('radius_km') or current_app.config['GEO_DEFAULT_RADIUS_KM'])
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180
+            and 0 < radius_km <= current_app.config['GEO_MAX_RADIUS_KM']):
+        raise ValueError(f"near={args['near']}, radius_km={radius_km}")
+    return latitude, longitude, radius_km
+
+
+def near_rows(index, matches, favorite_ids):
+    """Строки и сериализованные мероприятия для позиций индекса с расстоянием distance_km"""
+    ids = [index.ids[position] for position, _ in matches]
+    by_id = {
+        row.id: row
+        for row in db.session.query(*Event.serialized_columns()).filter(Event.id.in_(ids))
+    }
+
+    rows, distances = [], []
+    for event_id, (_, distance) in zip(ids, matches):
+        row = by_id.get(event_id)
+        if row is not None:
+            rows.append(row)
+            distances.append(distance)
+
+    events = Event.serialize_rows(rows, favorite_ids=favorite_ids)
+    for event, distance in zip(events, distances):
+        event['distance_km'] = round(distance, 1)
+    return rows, events
+
+
+def events_near(per_page, favorite_ids=frozenset()):
+    """
+    Ответ /events?near=lat,lon&radius_km=: мероприятия с координатами в
+    радиусе, в том же порядке и формате, что и /events, плюс distance_km.
+    Позиции ищутся в пространственном индексе, из базы читается только страница.
+    """
+    try:
+        latitude, longitude, radius_km = parse_near(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid near or radius_km'}), 400
+
+    index = geo_index.get()
+
+    if 'cursor' not in request.args:
+        page = max(request.args.get('page', 1, type=int), 1)
+        offset = (page - 1) * per_page
+        matches = index.search(latitude, longitude, radius_km, request.args, limit=offset + per_page)
+        total = index.count(latitude, longitude, radius_km, request.args)
+        _, events = near_rows(index, matches[offset:], favorite_ids)
+        return jsonify({'events': events, 'has_next': offset + per_page < total, 'total': total})
+
+    after = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    matches = index.search(latitude, longitude, radius_km, request.args, after=after, limit=per_page + 1)
+    has_next = len(matches) > per_page
+    rows, events = near_rows(index, matches[:per_page], favorite_ids)
+
+    response = {
+        'events': events,
+        'has_next': has_next,
+        'next_cursor': encode_cursor(rows[-1]) if has_next and rows else None
+    }
+    if request.args.get('with_total', type=int):
+        response['total'] = index.count(latitude, longitude, radius_km, request.args)
+    return jsonify(response)
+
+
+def event_search(args):
+    """Поиск по q из параметров /events с остальными фильтрами"""
+    filters = {name: args.get(name) for name in EVENT_FILTER_ARGS if name != 'q'}
+    return EventSearch(args['q'], filters, apply_event_filters)
+
+
+def search_rows(ids):
+    """Строки мероприятий для результатов поиска в порядке выдачи"""
+    by_id = {
+        row.id: row
+        for row in db.session.query(*Event.serialized_columns()).filter(Event.id.in_(ids))
+    }
+    return [by_id[event_id] for event_id in ids if event_id in by_id]
+
+
+def events_search(per_page, favorite_ids=frozenset()):
+    """
+    Ответ /events?q=: мероприятия из полнотекстового индекса со всеми словами
+    запроса, от последних загруженных к ранним (services/search.py), с
+    остальными фильтрами /events. Формат тот же, что у /events; из базы
+    читается только страница.
+    """
+    if not valid_search_query(request.args['q']):
+        return jsonify({'error': 'Invalid q'}), 400
+
+    search = event_search(request.args)
+
+    if 'cursor' not in request.args:
+        page = max(request.args.get('page', 1, type=int), 1)
+        offset = (page - 1) * per_page
+        rows = search_rows(search.page(offset, per_page))
+        total = filtered_events_total(request.args)
+        return jsonify({
+            'events': Event.serialize_rows(rows, favorite_ids=favorite_ids),
+            'has_next': offset + per_page < total,
+            'total': total
+        })
+
+    after = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after = decode_search_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    matches = search.after(after, per_page + 1)
+    has_next = len(matches) > per_page
+    matches = matches[:per_page]
+
+    response = {
+        'events': Event.serialize_rows(search_rows(matches), favorite_ids=favorite_ids),
+        'has_next': has_next,
+        'next_cursor': encode_search_cursor(matches[-1]) if has_next else None
+    }
+    if request.args.get('with_total', type=int):
+        response['total'] = filtered_events_total(request.args)
+    return jsonify(response)
+
+
+@bp.route('/calendar/<int:year>/<int:month>')
+@versioned_cache(time_dependent=True)
+def get_calendar(year, month):
+    if not 1 <= month <= 12 or not 1 <= year <= 9998:
+        return jsonify({'error': 'Invalid month'}), 400
+
+    try:
+        return jsonify(month_calendar(year, month, request.args))
+    except Exception as e:
+        logger.error(f"Error in get_calendar: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/events')
+@versioned_cache(time_dependent=True, vary=favorites_cache_part)
 def get_events():
     try:
-        sport_type = request.args.get('sport_type')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        region = request.args.get('region')
-        page = request.args.get('page', 1, type=int)
-        per_page = 10  # Количество записей на страницу
-
-        query = Event.query
-
-        if sport_type:
-            query = query.filter_by(sport_type=sport_type)
-        if region:
-            query = query.filter_by(location_region=region)
-        if start_date:
-            date_obj = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(Event.start_date >= date_obj)
-        if end_date:
-            date_obj = datetime.strptime(end_date, '%Y-%m-%d')
-            query = query.filter(Event.end_date <= date_obj)
-
-        paginated_events = query.paginate(page=page, per_page=per_page)
+        per_page = request.args.get('per_page', current_app.config['EVENTS_PER_PAGE'], type=int)
+        per_page = max(1, min(per_page, current_app.config['EVENTS_PER_PAGE_MAX']))
+        favorite_ids = request_favorite_ids()
+
+        if request.args.get('q'):
+            if request.args.get('near'):
+                return jsonify({'error': 'q cannot be combined with near'}), 400
+            return events_search(per_page, favorite_ids)
+
+        if request.args.get('near'):
+            return events_near(per_page, favorite_ids)
+
+        if current_app.config['EVENTS_SNAPSHOT']:
+            return events_from_snapshot(per_page, favorite_ids)
+
+        if 'cursor' not in request.args:
+            # Постраничный режим со смещением, оставлен для совместимости
+            page = request.args.get('page', 1, type=int)
+            query = apply_event_filters(Event.query, request.args).order_by(Event.start_date, Event.id)
+            paginated_events = query.paginate(page=page, per_page=per_page)
+
+            return jsonify({
+                'events': Event.serialize_rows(paginated_events.items, favorite_ids=favorite_ids),
+                'has_next': paginated_events.has_next,
+                'total': paginated_events.total
+            })
+
+        # Режим курсора: поиск по (start_date, id) без OFFSET и COUNT,
+        # выбираются только нужные колонки без ORM-объектов
+        query = apply_event_filters(db.session.query(*Event.serialized_columns()), request.args)
+
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(tuple_(Event.start_date, Event.id) > after)
+
+        rows = query.order_by(Event.start_date, Event.id).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+
+        response = {
+            'events': Event.serialize_rows(rows, favorite_ids=favorite_ids),
+            'has_next': has_next,
+            'next_cursor': encode_cursor(rows[-1]) if has_next else None
+        }
+        if request.args.get('with_total', type=int):
+            response['total'] = filtered_events_total(request.args)
 
-        return jsonify({
-            'events': [event.to_dict() for event in paginated_events.items],
-            'has_next': paginated_events.has_next,
-            'total': paginated_events.total
-        })
+        return jsonify(response)
 
     except Exception as e:
         logger.error(f"Error in get_events: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/events/export')
+def export_events():
+    """
+    Потоковая выгрузка всех событий под фильтрами /events в CSV, NDJSON или ICS.
+    Строки читаются пачками по EXPORT_CHUNK_SIZE (yield_per, на PostgreSQL -
+    серверный курсор), поэтому память не зависит от размера выгрузки.
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unknown format: {export_format}'}), 400
+
+    try:
+        query = apply_event_filters(db.session.query(*Event.serialized_columns()), request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    chunk_size = current_app.config['EXPORT_CHUNK_SIZE']
+    rows = query.order_by(Event.start_date, Event.id).yield_per(chunk_size)
+
+    generate, content_type, extension = EXPORT_FORMATS[export_format]
+    if export_format == 'ics':
+        chunks = generate(rows, chunk_size, uid_domain=request.host)
+    else:
+        chunks = generate(rows, chunk_size)
+
+    compress = 'gzip' in request.accept_encodings
+    headers = {
+        'Content-Disposition': f'attachment; filename=events.{extension}',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+        'Vary': 'Accept-Encoding'
+    }
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+
+    return Response(
+        stream_with_context(encode_stream(chunks, compress)),
+        content_type=content_type,
+        headers=headers
+    )
+
+
+@bp.route('/facets')
+@versioned_cache(time_dependent=True)
+def get_facets():
+    """
+    Количество событий по видам спорта, регионам, странам и статусу времени
+    под фильтрами /events за один запрос клиента
+    """
+    try:
+        if request.args.get('start_date') or request.args.get('end_date') or request.args.get('q'):
+            # Диапазон дат или поиск сужают выборку: группировка только по ним
+            narrow_args = {name: request.args.get(name) for name in ('start_date', 'end_date', 'q')}
+            rows = facet_rows(partial(apply_event_filters, args=narrow_args))
+        else:
+            rows = facet_rollup()
+        counts, total = count_facets(rows, request.args)
+
+        # Статусы считаются по индексам дат (или по снимку); завершенные - остаток.
+        # Снимок хранит даты с точностью до секунды
+        now = datetime.utcnow().replace(microsecond=0)
+        if current_app.config['EVENTS_SNAPSHOT'] and not request.args.get('q'):
+            snapshot = event_snapshot.get()
+            filtered = any(request.args.get(name) for name in EVENT_FILTER_ARGS)
+            positions = snapshot.positions(request.args) if filtered else None
+            upcoming = len(snapshot.upcoming(positions, now))
+            ongoing = len(snapshot.ongoing(positions, now))
+        else:
+            status_query = apply_event_filters(db.session.query(func.count(Event.id)), request.args)
+            upcoming = status_query.filter(Event.start_date > now).scalar()
+            ongoing = status_query.filter(Event.start_date <= now, Event.end_date >= now).scalar()
+
+        response = {
+            field: [
+                {'value': value, 'count': count}
+                for value, count in sorted(counts[field].items(), key=lambda item: (-item[1], item[0]))
+            ]
+            for field in FACET_FIELDS
+        }
+        response['time_status'] = {
+            'upcoming': upcoming,
+            'ongoing': ongoing,
+            'completed': total - upcoming - ongoing
+        }
+        response['total'] = total
+        return jsonify(response)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in get_facets: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/regions', methods=['GET'])
+@versioned_cache()
 def get_unique_regions():
     try:
-        # Извлекаем уникальные значения `location_region` из базы данных
-        unique_regions = db.session.query(Event.location_region).distinct().all()
-        regions = [region[0] for region in unique_regions if region[0] is not None]  # Убираем None
+        if current_app.config['EVENTS_SNAPSHOT']:
+            return jsonify(event_snapshot.get().regions), 200
+
+        regions = [name for name, in used_dictionary_values('location_region')]
         return jsonify(regions), 200
     except Exception as e:
         logger.error(f"Error in get_unique_regions: {str(e)}")
@@ -111,11 +603,13 @@ def process_status():
     return Response(stream_with_context(generate()), mimetype='text/event-stream')
 
 @bp.route('/sports', methods=['GET'])
+@versioned_cache()
 def get_unique_sports():
     try:
-        # Извлекаем уникальные значения `sport_type` из базы данных
-        unique_sports = db.session.query(Event.sport_type).distinct().all()
-        sports = [sport[0] for sport in unique_sports if sport[0] is not None]  # Убираем None
+        if current_app.config['EVENTS_SNAPSHOT']:
+            return jsonify(event_snapshot.get().sports), 200
+
+        sports = [name for name, in used_dictionary_values('sport_type')]
         return jsonify(sports), 200
     except Exception as e:
         logger.error(f"Error in get_unique_sports: {str(e)}")
@@ -133,43 +627,16 @@ def upload_file():
 
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        app = current_app._get_current_object()  # Получаем объект приложения
+        # Уникальное имя, чтобы одновременные загрузки не перезаписывали друг друга
+        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{secrets.token_hex(8)}_{filename}")
 
         try:
             file.save(filepath)
 
-            # Создаем парсер
-            parser = PDFParser()
-
-            # Устанавливаем callback для обновления статуса
-            def status_callback(status):
-                status_queue.put(status)
+            # Разбор выполняется воркером из ограниченного пула
+            job = enqueue_import(filename, filepath)
 
-            parser.set_status_callback(status_callback)
-
-            # Запускаем парсинг в отдельном потоке
-            def parse_with_app():
-                with app.app_context():  # Создаем контекст приложения внутри потока
-                    try:
-                        parser.parse_pdf(filepath)  # Теперь не нужно передавать app
-                    finally:
-                        # Даем файлу время закрыться
-                        import time
-                        time.sleep(1)
-
-                        # Пробуем удалить файл несколько раз
-                        for _ in range(3):
-                            try:
-                                if os.path.exists(filepath):
-                                    os.remove(filepath)
-                                    break
-                            except PermissionError:
-                                time.sleep(1)
-
-            threading.Thread(target=parse_with_app).start()
-
-            return jsonify({'message': 'Начата обработка файла', 'status': 'processing'}), 200
+            return jsonify({'message': 'Начата обработка файла', 'status': 'processing', 'job_id': job.id}), 200
 
         except Exception as e:
             logger.error(f"Error processing PDF: {str(e)}")
@@ -183,28 +650,144 @@ def upload_file():
     return jsonify({'error': 'Invalid file type'}), 400
 
 
+@bp.route('/favorites', methods=['GET'])
+def get_favorites():
+    user_id = favorites_user_id(request.args.get('user_id', type=int))
+    if not user_id:
+        return favorites_unavailable()
+    events = Event.get_user_favorites(user_id)
+    return jsonify(Event.serialize_rows(events, favorite_ids=Favorite.ids_for_user(user_id)))
+
+
+@bp.route('/favorites', methods=['POST'])
+def add_favorite():
+    data = request.get_json(silent=True) or {}
+    user_id, event_id = favorites_user_id(data.get('user_id')), data.get('event_id')
+    if not user_id:
+        return favorites_unavailable()
+    if not isinstance(event_id, int):
+        return jsonify({'error': 'event_id is required'}), 400
+    if db.session.get(Event, event_id) is None:
+        return jsonify({'error': 'Event not found'}), 404
+
+    if event_id not in Favorite.lookup(user_id, [event_id]):
+        db.session.add(Favorite(user_id=user_id, event_id=event_id))
+        db.session.commit()
+    return jsonify({'user_id': user_id, 'event_id': event_id, 'is_favorite': True}), 201
+
+
+@bp.route('/favorites/<int:event_id>', methods=['DELETE'])
+def remove_favorite(event_id):
+    user_id = favorites_user_id(request.args.get('user_id', type=int))
+    if not user_id:
+        return favorites_unavailable()
+    favorite = Favorite.query.filter_by(user_id=user_id, event_id=event_id).first()
+    if favorite is None:
+        return jsonify({'error': 'Favorite not found'}), 404
+    db.session.delete(favorite)
+    db.session.commit()
+    return '', 204
+
+
+@bp.route('/subscriptions', methods=['GET'])
+def get_subscriptions():
+    email = request.args.get('email')
+    if not email:
+        return jsonify({'error': 'email is required'}), 400
+    subscriptions = NotificationSubscription.query.filter_by(email=email).order_by(NotificationSubscription.id)
+    return jsonify([subscription.to_dict() for subscription in subscriptions])
+
+
+@bp.route('/subscriptions', methods=['POST'])
+def create_subscription():
+    data = request.get_json(silent=True) or {}
+    email, kind, value = data.get('email'), data.get('kind'), data.get('value')
+    if not email or kind not in NotificationSubscription.KINDS or not value:
+        return jsonify({'error': f"email, kind ({', '.join(NotificationSubscription.KINDS)}) and value are required"}), 400
+
+    subscription = NotificationSubscription.query.filter_by(email=email, kind=kind, value=str(value)).first()
+    if subscription is None:
+        # user_id связывает адрес с избранным пользователя (уведомления о нем),
+        # поэтому проверяется так же, как в /favorites
+        subscription = NotificationSubscription(
+            email=email, kind=kind, value=str(value), user_id=favorites_user_id(data.get('user_id'))
+        )
+        db.session.add(subscription)
+        db.session.commit()
+    return jsonify(subscription.to_dict()), 201
+
+
+@bp.route('/subscriptions/<int:subscription_id>', methods=['DELETE'])
+def delete_subscription(subscription_id):
+    subscription = db.session.get(NotificationSubscription, subscription_id)
+    if subscription is None:
+        return jsonify({'error': 'Subscription not found'}), 404
+    db.session.delete(subscription)
+    db.session.commit()
+    return '', 204
+
+
+@bp.route('/jobs/<job_id>')
+def get_job(job_id):
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+
+@bp.route('/jobs/<job_id>/profile', methods=['POST'])
+def profile_job(job_id):
+    """Включает семплирующий профилировщик для одного задания, в том числе уже идущего"""
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.is_finished:
+        return jsonify({'error': 'Job already finished'}), 409
+    job.profile = True
+    db.session.commit()
+    return jsonify(job.to_dict()), 202
+
+
+@bp.route('/metrics')
+def metrics():
+    return Response(registry.expose(), mimetype='text/plain; version=0.0.4')
+
+
+def load_job_status(app, job_id):
+    """Снимок статуса задания для StatusHub: (status, finished) или None"""
+    with app.app_context():
+        job = db.session.get(ImportJob, job_id)
+        return (job.to_status(), job.is_finished) if job else None
+
+
+@bp.route('/parse-status/<job_id>')
+def parse_status(job_id):
+    if db.session.get(ImportJob, job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    app = current_app._get_current_object()
+    subscription = status_hub.subscribe(job_id, partial(load_job_status, app))
+    keepalive_interval = app.config['STATUS_KEEPALIVE_INTERVAL']
+    min_interval = app.config['STATUS_MIN_INTERVAL']
 
-
-
-
-
-@bp.route('/parse-status')
-def parse_status():
     def generate():
         try:
             while True:
-                try:
-                    status = status_queue.get(timeout=30)
-                    logger.info(f"Sending status update: {status}")  # Добавим лог
-                    yield f"data: {json.dumps(status)}\n\n"
+                status = subscription.next(timeout=keepalive_interval)
+                if status is None:
+                    # Медленная страница не обрывает поток
+                    yield ": keepalive\n\n"
+                    continue
 
-                    if status['progress'] == 100:
-                        break
+                logger.info(f"Sending status update: {status}")  # Добавим лог
+                yield f"data: {json.dumps(status)}\n\n"
 
-                except queue.Empty:
-                    logger.warning("Status queue timeout")  # Добавим лог
+                if subscription.finished:
                     break
 
+                # Частые обновления схлопываются: клиент получает последний статус
+                time.sleep(min_interval)
+
         except Exception as e:
             logger.error(f"Error in parse_status: {str(e)}")  # Добавим лог
             status = {
@@ -217,8 +800,11 @@ def parse_status():
             }
             yield f"data: {json.dumps(status)}\n\n"
 
+        finally:
+            subscription.close()
+
     return Response(
-        stream_with_context(generate()),
+        generate(),
         mimetype='text/event-stream',
         headers={
             'Cache-Control': 'no-cache',
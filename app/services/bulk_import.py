@@ -0,0 +1,152 @@
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from app.models.document import ImportedDocument
+from app.services.documents import DocumentFingerprints, file_hash
+from app.services.ingest import EventIngestor
+from app.services.metrics import StageTimer
+from app.services.parser import PDFParser
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+class PageRecorder:
+    """Собирает отпечатки страниц в процессе разбора, без обращения к базе"""
+
+    def __init__(self):
+        self.pages = []
+
+    def match_page(self, page_hash, start_sport_type):
+        # Страницы файла целиком разбираются в процессе пула
+        return None
+
+    def record_page(self, page_num, page_hash, start_sport_type, end_sport_type, ekp_numbers):
+        self.pages.append((page_num, page_hash, start_sport_type, end_sport_type, list(ekp_numbers)))
+
+
+def _parse_file(file_path, mode, max_rss_mb):
+    """
+    Разбирает один файл в процессе пула прямо по исходному пути.
+    Возвращает (мероприятия, отпечатки страниц, страниц, секунд, времена стадий).
+    """
+    parser = PDFParser(incremental=False, mode=mode, max_rss_mb=max_rss_mb)
+    recorder = PageRecorder()
+    started = time.perf_counter()
+    events = list(parser.iter_events(file_path, fingerprints=recorder))
+    return events, recorder.pages, parser.total_pages, time.perf_counter() - started, parser.timings.as_dict()
+
+
+def find_pdfs(directory, recursive=True):
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files) if name.lower().endswith('.pdf'))
+        if not recursive:
+            break
+    return paths
+
+
+class BulkImportStats:
+    def __init__(self):
+        self.files = 0
+        self.imported = 0
+        self.skipped = 0
+        self.failed = 0
+        self.pages = 0
+        self.events = 0
+        self.written = 0
+        self.parse_seconds = 0.0
+        self.elapsed = 0.0
+        self.timings = StageTimer()
+
+
+def import_directory(directory, workers=None, mode=PDFParser.TEXT_MODE, batch_size=500, on_conflict='skip',
+                     max_rss_mb=None, recursive=True, echo=logger.info):
+    """
+    Импортирует все PDF каталога. Файлы разбираются параллельно в пуле из
+    workers процессов, основной процесс пишет мероприятия пакетами
+    EventIngestor и отпечатки документов в порядке имен файлов, поэтому
+    предыдущая версия календаря определяется так же, как при загрузке по
+    одному. Файлы, уже полностью импортированные с тем же хэшем содержимого,
+    и повторы внутри каталога пропускаются. Файлы не копируются в
+    UPLOAD_FOLDER и не удаляются.
+    """
+    started = time.perf_counter()
+    stats = BulkImportStats()
+    paths = find_pdfs(directory, recursive)
+    stats.files = len(paths)
+    workers = workers or os.cpu_count() or 1
+
+    imported_hashes = {
+        content_hash for content_hash, in
+        db.session.query(ImportedDocument.content_hash).filter(ImportedDocument.is_complete.is_(True))
+    }
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = []
+        seen = {}
+        for path, content_hash in zip(paths, executor.map(file_hash, paths, chunksize=8)):
+            name = os.path.relpath(path, directory)
+            if content_hash in imported_hashes or content_hash in seen:
+                stats.skipped += 1
+                echo(f"{name}: пропущен, " + (
+                    f"совпадает с {seen[content_hash]}" if content_hash in seen else "уже импортирован"
+                ))
+                continue
+            seen[content_hash] = name
+            pending.append((path, name, content_hash))
+
+        def submit(item):
+            return item, executor.submit(_parse_file, item[0], mode, max_rss_mb)
+
+        # Окно из 2 * workers файлов: разобранные результаты не копятся в памяти,
+        # пока основной процесс пишет в базу
+        queue = iter(pending)
+        window = deque(submit(item) for item in islice(queue, 2 * workers))
+
+        ingestor = EventIngestor(batch_size=batch_size, on_conflict=on_conflict)
+        while window:
+            (path, name, content_hash), future = window.popleft()
+            item = next(queue, None)
+            if item is not None:
+                window.append(submit(item))
+
+            try:
+                events, pages, page_count, parse_seconds, timings = future.result()
+                with stats.timings.stage('db_save'):
+                    _save_file(ingestor, path, name, content_hash, events, pages, page_count)
+            except Exception as e:
+                db.session.rollback()
+                stats.failed += 1
+                echo(f"{name}: ошибка: {str(e)}")
+                continue
+
+            stats.imported += 1
+            stats.pages += page_count
+            stats.events += len(events)
+            stats.parse_seconds += parse_seconds
+            stats.timings.merge(timings)
+            echo(f"{name}: {page_count} стр., {len(events)} мероприятий, разбор {parse_seconds:.1f} с")
+
+        stats.written = ingestor.written
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def _save_file(ingestor, path, name, content_hash, events, pages, page_count):
+    # Отпечатки документа отмечаются завершенными только после записи его мероприятий
+    fingerprints = DocumentFingerprints(path, name, content_hash=content_hash)
+    fingerprints.begin()
+    for page in pages:
+        fingerprints.record_page(*page)
+    for event_data in events:
+        ingestor.add(event_data)
+    ingestor.flush()
+    fingerprints.finish(page_count)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from app.models.dataset import DatasetState
+from app.models.event import Event
+from app import db
+
+_state_table = DatasetState.__table__
+_version_query = select(_state_table.c.version).where(_state_table.c.id == 1)
+
+
+def bump_dataset_version(session=None):
+    """Увеличивает версию набора данных в текущей транзакции сессии"""
+    connection = (session or db.session).connection()
+    result = connection.execute(
+        update(_state_table)
+        .where(_state_table.c.id == 1)
+        .values(version=_state_table.c.version + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        connection.execute(_state_table.insert().values(id=1, version=2, updated_at=datetime.utcnow()))
+
+
+def dataset_version():
+    """
+    Текущая версия набора мероприятий. Читается из базы при каждом вызове
+    (одна строка по первичному ключу): импорт в другом процессе виден со
+    следующего запроса
+    """
+    return db.session.execute(_version_query).scalar() or 1
+
+
+@event.listens_for(Session, 'before_flush')
+def _bump_on_event_changes(session, flush_context, instances):
+    # Изменения мероприятий через ORM тоже меняют версию
+    if any(isinstance(obj, Event) for obj in (*session.new, *session.dirty, *session.deleted)):
+        bump_dataset_version(session)
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import logging
+from collections import Counter
+from app.models.document import ImportedDocument, DocumentPage
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(file_path, chunk_size=1024 * 1024):
+    """SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class DocumentFingerprints:
+    """Отпечатки страниц документа для повторного импорта.
+
+    Страница считается неизменной, если страница с тем же хэшем текста и тем
+    же видом спорта на начале уже была импортирована. Такие страницы не
+    разбираются. EKP номера предыдущей версии документа, которых нет в новой,
+    попадают в removed_ekp_numbers.
+    """
+
+    def __init__(self, file_path, filename=None, content_hash=None):
+        self.content_hash = content_hash or file_hash(file_path)
+        self.filename = filename
+        self.document = None
+        self.matched_documents = Counter()
+        self.removed_ekp_numbers = []
+
+    def already_imported(self):
+        """Тот же файл уже полностью импортирован; его запись - в document"""
+        document = ImportedDocument.query.filter_by(content_hash=self.content_hash, is_complete=True).first()
+        if document is None:
+            return False
+        self.document = document
+        return True
+
+    def begin(self, start_page=1):
+        """Создает запись документа или продолжает незавершенную с start_page"""
+        self.document = ImportedDocument.query.filter_by(content_hash=self.content_hash).first()
+        if self.document is None:
+            self.document = ImportedDocument(content_hash=self.content_hash, filename=self.filename)
+            db.session.add(self.document)
+        else:
+            self.document.pages.filter(DocumentPage.page_num >= start_page).delete()
+            for page in self.document.pages:
+                self.match_page(page.text_hash, page.start_sport_type)
+        db.session.commit()
+
+    def match_page(self, page_hash, start_sport_type):
+        """Ранее импортированная страница с тем же содержимым или None"""
+        previous = DocumentPage.query.filter(
+            DocumentPage.text_hash == page_hash,
+            DocumentPage.start_sport_type.is_not_distinct_from(start_sport_type),
+            DocumentPage.document_id != self.document.id
+        ).order_by(DocumentPage.id.desc()).first()
+        if previous:
+            self.matched_documents[previous.document_id] += 1
+        return previous
+
+    def record_page(self, page_num, page_hash, start_sport_type, end_sport_type, ekp_numbers):
+        # Сохраняется вместе со следующей пачкой мероприятий
+        db.session.add(DocumentPage(
+            document=self.document,
+            page_num=page_num,
+            text_hash=page_hash,
+            start_sport_type=start_sport_type,
+            end_sport_type=end_sport_type,
+            ekp_numbers=json.dumps(sorted(set(ekp_numbers)))
+        ))
+
+    def _previous_document(self):
+        # Предыдущая версия - документ, с которым совпало больше всего страниц,
+        # иначе последний документ с тем же именем файла
+        if self.matched_documents:
+            return db.session.get(ImportedDocument, self.matched_documents.most_common(1)[0][0])
+        if self.filename:
+            return ImportedDocument.query.filter(
+                ImportedDocument.filename == self.filename,
+                ImportedDocument.id != self.document.id,
+                ImportedDocument.is_complete.is_(True)
+            ).order_by(ImportedDocument.id.desc()).first()
+        return None
+
+    def finish(self, page_count):
+        """Отмечает документ импортированным и вычисляет пропавшие мероприятия"""
+        db.session.flush()
+
+        previous = self._previous_document()
+        if previous:
+            self.removed_ekp_numbers = sorted(previous.ekp_numbers() - self.document.ekp_numbers())
+            if self.removed_ekp_numbers:
+                logger.warning(
+                    f"⚠️ {len(self.removed_ekp_numbers)} events removed since document {previous.id}"
+                )
+
+        self.document.page_count = page_count
+        self.document.is_complete = True
+        self.document.removed_ekp_numbers = json.dumps(self.removed_ekp_numbers)
+        db.session.commit()
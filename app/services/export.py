@@ -0,0 +1,154 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+from itertools import islice
+from app.models.dictionary import dictionaries
+from app.models.event import Event
+
+# Колонки выгрузки CSV: поля мероприятия без вычисляемого статуса
+CSV_COLUMNS = Event.SERIALIZED_COLUMNS
+
+ICS_LINE_LIMIT = 75
+
+
+def _chunks(rows, size):
+    """Разбивает поток строк на списки по size, не читая его целиком"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    return '' if value is None else value
+
+
+def iter_csv(rows, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM, чтобы Excel открыл файл в UTF-8
+    buffer.write('\ufeff')
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue()
+
+    # Справочные поля выбираются как id, в файл пишутся их названия
+    names = dictionaries()
+    columns = [
+        (column, names[name].name if name in names else None)
+        for name, column in zip(CSV_COLUMNS, Event.ROW_COLUMNS)
+    ]
+
+    for chunk in _chunks(rows, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [_csv_value(decode(getattr(row, column)) if decode else getattr(row, column)) for column, decode in columns]
+            for row in chunk
+        )
+        yield buffer.getvalue()
+
+
+def iter_ndjson(rows, chunk_size):
+    # Одно и то же время для всей выгрузки, как у пачки в serialize_rows
+    now = datetime.utcnow()
+    for chunk in _chunks(rows, chunk_size):
+        yield ''.join(
+            json.dumps(data, ensure_ascii=False) + '\n'
+            for data in Event.serialize_rows(chunk, now=now)
+        )
+
+
+def _ics_escape(value):
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _ics_fold(line):
+    """Переносит строку длиннее 75 октетов (RFC 5545, 3.1)"""
+    if len(line.encode('utf-8')) <= ICS_LINE_LIMIT:
+        return line + '\r\n'
+
+    parts = []
+    current, size = '', 0
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > ICS_LINE_LIMIT:
+            parts.append(current)
+            # Строка продолжения начинается с пробела
+            current, size = ' ', 1
+        current += char
+        size += char_size
+    parts.append(current)
+    return '\r\n'.join(parts) + '\r\n'
+
+
+def _ics_event(row, stamp, uid_domain, names):
+    location = ', '.join(part for part in (
+        row.venue, row.location_city,
+        names['location_region'].name(row.location_region_id),
+        names['location_country'].name(row.location_country_id)
+    ) if part)
+    description = ', '.join(part for part in (
+        names['sport_type'].name(row.sport_type_id),
+        names['discipline'].name(row.discipline_id),
+        row.age_group
+    ) if part)
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{row.ekp_number}@{uid_domain}',
+        f'DTSTAMP:{stamp}',
+        f'DTSTART;VALUE=DATE:{row.start_date:%Y%m%d}',
+        # DTEND для событий на весь день не включается в интервал
+        f'DTEND;VALUE=DATE:{row.end_date + timedelta(days=1):%Y%m%d}',
+        f'SUMMARY:{_ics_escape(row.name)}',
+    ]
+    if location:
+        lines.append(f'LOCATION:{_ics_escape(location)}')
+    if description:
+        lines.append(f'DESCRIPTION:{_ics_escape(description)}')
+    lines.append('END:VEVENT')
+    return ''.join(_ics_fold(line) for line in lines)
+
+
+def iter_ics(rows, chunk_size, uid_domain):
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    yield ('BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//EKP//Sport Calendar//RU\r\n'
+           'CALSCALE:GREGORIAN\r\n')
+    names = dictionaries()
+    for chunk in _chunks(rows, chunk_size):
+        yield ''.join(_ics_event(row, stamp, uid_domain, names) for row in chunk)
+    yield 'END:VCALENDAR\r\n'
+
+
+# Формат выгрузки: (генератор, Content-Type, расширение файла)
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv; charset=utf-8', 'csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson', 'ndjson'),
+    'ics': (iter_ics, 'text/calendar; charset=utf-8', 'ics'),
+}
+
+
+def encode_stream(chunks, compress=False):
+    """
+    Кодирует части выгрузки в UTF-8 и при compress сжимает gzip на лету.
+    Каждая часть сбрасывается (Z_SYNC_FLUSH), чтобы клиент получал данные
+    сразу, а не после заполнения буфера компрессора.
+    """
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
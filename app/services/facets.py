@@ -0,0 +1,67 @@
+from flask import current_app
+from sqlalchemy import func
+from app.models.dictionary import dictionaries
+from app.models.event import Event
+from app.services.dataset import dataset_version
+from app import db, cache
+
+FACET_FIELDS = ('sport_type', 'location_region', 'location_country')
+
+
+def facet_rows(apply_filters=None):
+    """
+    Счетчики событий по сочетаниям (вид спорта, регион, страна) одним GROUP BY
+    по id справочников; apply_filters(query) ограничивает выборку
+    """
+    columns = [getattr(Event, name + '_id') for name in FACET_FIELDS]
+    query = db.session.query(*columns, func.count(Event.id))
+    if apply_filters:
+        query = apply_filters(query)
+
+    names = [dictionaries()[name].name for name in FACET_FIELDS]
+    return [
+        (*(name(value_id) for name, value_id in zip(names, row[:-1])), row[-1])
+        for row in query.group_by(*columns)
+    ]
+
+
+def facet_rollup():
+    """
+    Сводка facet_rows по всей таблице для текущей версии данных.
+    Считается один раз на версию (после импорта ее прогревает run_import_job)
+    и хранится в общем кэше, поэтому запросы без фильтров по датам не читают events.
+    """
+    key = f'facets-rollup:{dataset_version()}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = facet_rows()
+        cache.set(key, rows, timeout=current_app.config['FACETS_ROLLUP_TIMEOUT'])
+    return rows
+
+
+def count_facets(rows, args):
+    """
+    Складывает строки сводки в счетчики по каждому полю. Для поля не
+    учитывается его собственный фильтр, чтобы в списке оставались другие
+    варианты; total учитывает все фильтры.
+    """
+    sport_filter = args.get('sport_type')
+    region_filter = args.get('region')
+    sports, regions, countries = {}, {}, {}
+    total = 0
+
+    for sport, region, country, count in rows:
+        sport_matches = not sport_filter or sport == sport_filter
+        region_matches = not region_filter or region == region_filter
+        if region_matches:
+            sports[sport] = sports.get(sport, 0) + count
+        if sport_matches:
+            regions[region] = regions.get(region, 0) + count
+            if region_matches:
+                countries[country] = countries.get(country, 0) + count
+                total += count
+
+    counts = {'sport_type': sports, 'location_region': regions, 'location_country': countries}
+    for values in counts.values():
+        values.pop(None, None)
+    return counts, total
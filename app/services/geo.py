@@ -0,0 +1,350 @@
+import csv
+import logging
+import math
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+from heapq import merge
+from sqlalchemy import func, select
+from app.models.dictionary import dictionaries
+from app.models.event import Event
+from app.services.dataset import bump_dataset_version
+from app.services.snapshot import SnapshotStore, _seconds
+from app import db
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'gazetteer.csv')
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+Place = namedtuple('Place', ('city', 'region', 'latitude', 'longitude'))
+
+
+def normalize_name(name):
+    """Ключ поиска города: без регистра, ё как е, дефис как пробел, без префикса «г.»"""
+    name = ' '.join(name.lower().replace('ё', 'е').replace('-', ' ').split())
+    for prefix in ('г. ', 'г.', 'город '):
+        if name.startswith(prefix):
+            return name[len(prefix):].lstrip()
+    return name
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Расстояние по большому кругу (гаверсинус)"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class Gazetteer:
+    """
+    Офлайн-справочник городов России из app/data/gazetteer.csv: каноническое
+    название, субъект РФ (как в PDFParser.SUBJECTS_RF) и координаты центра.
+    Колонка aliases - другие написания через «|», например «Ростов» у
+    Ростова-на-Дону, которое оставляет регулярное выражение города парсера.
+    """
+
+    def __init__(self, path=GAZETTEER_PATH):
+        self.places = []
+        self.by_name = {}
+        with open(path, encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                place = Place(row['city'], row['region'], float(row['lat']), float(row['lon']))
+                self.places.append(place)
+                names = [place.city] + [alias for alias in (row['aliases'] or '').split('|') if alias]
+                for name in names:
+                    candidates = self.by_name.setdefault(normalize_name(name), [])
+                    if place not in candidates:
+                        candidates.append(place)
+
+    def locate(self, city, region=None):
+        """
+        Place города или None. Одинаковые названия в разных субъектах
+        (Благовещенск, Кировск, Ростов) различаются по region; без региона
+        годится только однозначное название.
+        """
+        candidates = self.by_name.get(normalize_name(city)) if city else None
+        if not candidates:
+            return None
+
+        if region:
+            return next((place for place in candidates if place.region == region), None)
+        return candidates[0] if len(candidates) == 1 else None
+
+
+@lru_cache(maxsize=1)
+def gazetteer():
+    """Справочник процесса, читается из файла при первом обращении"""
+    return Gazetteer()
+
+
+def geocode(event_data):
+    """
+    Копия разобранного мероприятия с каноническим названием города,
+    регионом (если парсер его не нашел) и координатами; у ненайденных
+    городов и мероприятий за рубежом latitude и longitude равны None
+    """
+    event_data = dict(event_data)
+    event_data['latitude'] = event_data['longitude'] = None
+    if event_data.get('location_country') not in (None, 'РОССИЯ'):
+        return event_data
+
+    region = event_data.get('location_region')
+    place = gazetteer().locate(event_data.get('location_city'), region)
+    if place is not None:
+        event_data['location_city'] = place.city
+        event_data['location_region'] = place.region
+    elif region and region.startswith('Город '):
+        # Неизвестный город внутри города федерального значения (Зеленоград,
+        # Кронштадт): название остается, координаты - самого города
+        place = gazetteer().locate(region[len('Город '):], region)
+    if place is None:
+        return event_data
+
+    event_data['latitude'] = place.latitude
+    event_data['longitude'] = place.longitude
+    return event_data
+
+
+def _equals(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def geocode_events():
+    """
+    Проставляет координаты и нормализованные города уже загруженным
+    мероприятиям: один UPDATE на каждое сочетание (город, регион, страна).
+    Возвращает (обновлено строк, строк без координат).
+    """
+    names = dictionaries()
+    columns = (Event.location_city, Event.location_region_id, Event.location_country_id)
+    groups = db.session.query(*columns, func.count(Event.id)).group_by(*columns).all()
+
+    updated = missing = 0
+    for city, region_id, country_id, count in groups:
+        values = geocode({
+            'location_city': city,
+            'location_region': names['location_region'].name(region_id),
+            'location_country': names['location_country'].name(country_id),
+        })
+        if values['latitude'] is None:
+            missing += count
+        updated += db.session.query(Event).filter(
+            *(_equals(column, value) for column, value in zip(columns, (city, region_id, country_id)))
+        ).update({
+            Event.location_city: values['location_city'],
+            Event.location_region_id: names['location_region'].get_or_create(values['location_region']),
+            Event.latitude: values['latitude'],
+            Event.longitude: values['longitude'],
+        }, synchronize_session=False)
+
+    bump_dataset_version()
+    db.session.commit()
+    return updated, missing
+
+
+class GeoPoint:
+    __slots__ = ('latitude', 'longitude', 'positions')
+
+    def __init__(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.positions = array('i')
+
+
+class GeoIndex:
+    """
+    Пространственный индекс мероприятий с координатами в памяти процесса.
+
+    Координаты берутся из справочника, поэтому различных точек - сотни, а
+    мероприятий - сотни тысяч. Точки разложены по сетке ячеек в CELL_DEGREES
+    градусов; у каждой точки отсортированный массив позиций ее мероприятий в
+    порядке (start_date, id). Поиск в радиусе проверяет точки ячеек,
+    пересекающих круг, и сливает их массивы позиций - страница выдачи
+    читается без перебора всех мероприятий в радиусе.
+    """
+
+    CELL_DEGREES = 1.0
+
+    def __init__(self, version):
+        self.version = version
+        self.ids = array('q')
+        self.starts = array('q')
+        self.ends = array('q')
+        # id справочников вида спорта и региона, -1 - регион не указан
+        self.sport_ids = array('i')
+        self.region_ids = array('i')
+        self.points = {}
+        self.cells = {}
+
+    @classmethod
+    def build(cls, version, chunk_size=5000):
+        index = cls(version)
+        query = select(
+            Event.id, Event.start_date, Event.end_date, Event.sport_type_id, Event.location_region_id,
+            Event.latitude, Event.longitude
+        ).where(
+            Event.latitude.isnot(None), Event.longitude.isnot(None)
+        ).order_by(Event.start_date, Event.id).execution_options(yield_per=chunk_size)
+
+        ids, starts, ends = index.ids, index.starts, index.ends
+        sport_ids, region_ids, points = index.sport_ids, index.region_ids, index.points
+        # Различных дат на порядки меньше, чем строк
+        seconds = {}
+
+        rows = db.session.execute(query)
+        for position, (event_id, start, end, sport_id, region_id, latitude, longitude) in enumerate(rows):
+            start_seconds = seconds.get(start)
+            if start_seconds is None:
+                start_seconds = seconds[start] = _seconds(start)
+            end_seconds = seconds.get(end)
+            if end_seconds is None:
+                end_seconds = seconds[end] = _seconds(end)
+
+            ids.append(event_id)
+            starts.append(start_seconds)
+            ends.append(end_seconds)
+            sport_ids.append(sport_id)
+            region_ids.append(-1 if region_id is None else region_id)
+
+            point = points.get((latitude, longitude))
+            if point is None:
+                point = points[latitude, longitude] = GeoPoint(latitude, longitude)
+                index.cells.setdefault(index._cell(latitude, longitude), []).append(point)
+            point.positions.append(position)
+
+        return index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _cell(self, latitude, longitude):
+        return math.floor(latitude / self.CELL_DEGREES), math.floor(longitude / self.CELL_DEGREES)
+
+    def _candidate_points(self, latitude, longitude, radius_km):
+        """Точки ячеек, пересекающих квадрат вокруг круга поиска"""
+        delta_lat = radius_km / KM_PER_DEGREE
+        # Долготный размах круга наибольший на его самой полярной широте
+        cos_lat = math.cos(math.radians(min(abs(latitude) + delta_lat, 90.0)))
+        if cos_lat * 180 * KM_PER_DEGREE <= radius_km:
+            return list(self.points.values())
+
+        delta_lon = radius_km / (KM_PER_DEGREE * cos_lat)
+        size = self.CELL_DEGREES
+        lat_cells = range(math.floor(max(latitude - delta_lat, -90.0) / size),
+                          math.floor(min(latitude + delta_lat, 90.0) / size) + 1)
+        lon_first = math.floor((longitude - delta_lon) / size)
+        lon_last = math.floor((longitude + delta_lon) / size)
+        cells_per_turn = round(360 / size)
+        lon_cells = {
+            (cell + cells_per_turn // 2) % cells_per_turn - cells_per_turn // 2  # через антимеридиан
+            for cell in range(lon_first, min(lon_last, lon_first + cells_per_turn - 1) + 1)
+        }
+        if len(lat_cells) * len(lon_cells) > len(self.cells):
+            return list(self.points.values())
+
+        points = []
+        for lat_cell in lat_cells:
+            for lon_cell in lon_cells:
+                points.extend(self.cells.get((lat_cell, lon_cell), ()))
+        return points
+
+    def within(self, latitude, longitude, radius_km):
+        """[(точка, расстояние в км)] в радиусе от центра"""
+        result = []
+        for point in self._candidate_points(latitude, longitude, radius_km):
+            distance = distance_km(latitude, longitude, point.latitude, point.longitude)
+            if distance <= radius_km:
+                result.append((point, distance))
+        return result
+
+    def _after(self, cursor):
+        """Первая позиция строго после (start_date, id) курсора"""
+        start, event_id = _seconds(cursor[0]), cursor[1]
+        lo = bisect_left(self.starts, start)
+        hi = bisect_right(self.starts, start)
+        return bisect_right(self.ids, event_id, lo, hi)
+
+    def _filters(self, args, after):
+        """Диапазон позиций и проверки по фильтрам /events (те же, что apply_event_filters)"""
+        sport_type = args.get('sport_type')
+        region = args.get('region')
+        start_date = args.get('start_date')
+        end_date = args.get('end_date')
+
+        lo, hi = 0, len(self.ids)
+        end_limit = None
+        if start_date:
+            lo = bisect_left(self.starts, _seconds(datetime.strptime(start_date, '%Y-%m-%d')))
+        if end_date:
+            end_limit = _seconds(datetime.strptime(end_date, '%Y-%m-%d'))
+            hi = bisect_right(self.starts, end_limit)
+        if after is not None:
+            lo = max(lo, self._after(after))
+
+        names = dictionaries()
+        # Неизвестное название не совпадает ни с одним id
+        sport_id = (names['sport_type'].id(sport_type) or -2) if sport_type else None
+        region_id = (names['location_region'].id(region) or -2) if region else None
+        return lo, hi, sport_id, region_id, end_limit
+
+    def _accepts(self, sport_id, region_id, end_limit):
+        if sport_id is None and region_id is None and end_limit is None:
+            return None
+        sport_ids, region_ids, ends = self.sport_ids, self.region_ids, self.ends
+        return lambda position: (
+            (sport_id is None or sport_ids[position] == sport_id)
+            and (region_id is None or region_ids[position] == region_id)
+            and (end_limit is None or ends[position] <= end_limit)
+        )
+
+    def search(self, latitude, longitude, radius_km, args, after=None, limit=None):
+        """
+        [(позиция, расстояние в км)] мероприятий в радиусе под фильтрами
+        /events в порядке (start_date, id), не больше limit; after - курсор
+        (start_date, id)
+        """
+        lo, hi, sport_id, region_id, end_limit = self._filters(args, after)
+        accepts = self._accepts(sport_id, region_id, end_limit)
+
+        streams = []
+        for point, distance in self.within(latitude, longitude, radius_km):
+            positions = point.positions
+            first, last = bisect_left(positions, lo), bisect_left(positions, hi)
+            if first < last:
+                streams.append(_tagged(positions, first, last, distance))
+
+        result = []
+        for position, distance in merge(*streams):
+            if accepts is None or accepts(position):
+                result.append((position, distance))
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def count(self, latitude, longitude, radius_km, args):
+        """Число мероприятий в радиусе под фильтрами /events"""
+        lo, hi, sport_id, region_id, end_limit = self._filters(args, None)
+        accepts = self._accepts(sport_id, region_id, end_limit)
+
+        total = 0
+        for point, _ in self.within(latitude, longitude, radius_km):
+            positions = point.positions
+            first, last = bisect_left(positions, lo), bisect_left(positions, hi)
+            if accepts is None:
+                total += last - first
+            else:
+                total += sum(1 for i in range(first, last) if accepts(positions[i]))
+        return total
+
+
+def _tagged(positions, first, last, distance):
+    for i in range(first, last):
+        yield positions[i], distance
+
+
+geo_index = SnapshotStore(GeoIndex.build, 'Geo index')
@@ -0,0 +1,216 @@
+import json
+import logging
+import os
+import socket
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, or_, update
+from app.models.import_job import ImportJob, ParserStageTotal
+from app.services.status_hub import status_hub
+from app.services.dataset import bump_dataset_version
+from app.services.facets import facet_rollup
+from app.services.metrics import SamplingProfiler
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_import(filename, file_path):
+    """Создает задание на импорт и ставит его в очередь воркеров"""
+    from app.tasks import import_pdf
+
+    job = ImportJob(filename=filename, file_path=file_path, message='Файл поставлен в очередь')
+    db.session.add(job)
+    db.session.commit()
+
+    try:
+        import_pdf.delay(job.id)
+    except Exception as e:
+        # Брокер недоступен: задание не попало в очередь и не должно висеть в queued
+        logger.error(f"Failed to enqueue import job {job.id}: {str(e)}")
+        job.status = ImportJob.FAILED
+        job.error = str(e)
+        job.message = 'Не удалось поставить файл в очередь'
+        db.session.commit()
+        raise
+    return job
+
+
+def requeue_stale_jobs():
+    """
+    Возвращает в очередь задания, брошенные упавшими воркерами: в работе,
+    аренда которых истекла. Задания в статусе queued уже лежат в брокере,
+    и повторная задача только удлинила бы очередь. Каждое задание
+    переводится в queued условным UPDATE, как в claim_import_job: если
+    воркер успел продлить аренду, задание остается у него
+    """
+    from app.tasks import import_pdf
+
+    stale_before = datetime.utcnow() - current_app.config['IMPORT_JOB_STALE_AFTER']
+    stale = ImportJob.query.filter(
+        ImportJob.status == ImportJob.RUNNING,
+        ImportJob.updated_at < stale_before
+    ).all()
+
+    requeued = []
+    for job in stale:
+        result = db.session.execute(
+            update(ImportJob)
+            .where(
+                ImportJob.id == job.id,
+                ImportJob.status == ImportJob.RUNNING,
+                ImportJob.updated_at < stale_before
+            )
+            .values(status=ImportJob.QUEUED, worker=None, message='Задание возвращено в очередь')
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            logger.warning(f"Requeue stale import job {job.id} from page {job.pages_done + 1}")
+            requeued.append(job.id)
+    db.session.commit()
+
+    for job_id in requeued:
+        import_pdf.delay(job_id)
+    return len(requeued)
+
+
+def _remove_file(file_path):
+    try:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+    except OSError as e:
+        logger.error(f"Failed to remove {file_path}: {str(e)}")
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_import_job(job_id):
+    """
+    Забирает задание одним условным UPDATE: только из очереди или у воркера,
+    аренда которого истекла (нет записей прогресса дольше
+    IMPORT_JOB_STALE_AFTER). Повторная доставка задачи брокером, requeue
+    после рестарта и параллельный воркер не запустят второй разбор того же
+    файла. Возвращает True, если задание досталось этому процессу
+    """
+    now = datetime.utcnow()
+    stale_before = now - current_app.config['IMPORT_JOB_STALE_AFTER']
+    result = db.session.execute(
+        update(ImportJob)
+        .where(
+            ImportJob.id == job_id,
+            or_(
+                ImportJob.status == ImportJob.QUEUED,
+                and_(ImportJob.status == ImportJob.RUNNING, ImportJob.updated_at < stale_before)
+            )
+        )
+        .values(status=ImportJob.RUNNING, worker=worker_name(), error=None, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def run_import_job(job_id):
+    """Выполняет задание импорта, продолжая с последней сохраненной страницы"""
+    if not claim_import_job(job_id):
+        logger.info(f"Import job {job_id} is finished or held by another worker")
+        return
+    job = db.session.get(ImportJob, job_id)
+
+    if not os.path.exists(job.file_path):
+        job.status = ImportJob.FAILED
+        job.error = job.message = 'Файл задания не найден'
+        db.session.commit()
+        return
+
+    # pdfplumber и pdfminer загружаются только в процессе, который разбирает PDF,
+    # а не в каждом веб-воркере, импортирующем enqueue_import
+    from app.services.parser import PDFParser
+
+    config = current_app.config
+    parser = PDFParser(
+        workers=config['PDF_PARSER_WORKERS'],
+        pages_per_shard=config['PDF_PARSER_PAGES_PER_SHARD'],
+        batch_size=config['INGEST_BATCH_SIZE'],
+        on_conflict=config['INGEST_ON_CONFLICT'],
+        max_rss_mb=config['PDF_PARSER_MAX_RSS_MB'],
+        mode=config['PDF_PARSER_MODE']
+    )
+    parser.processed_events = job.processed_events
+
+    last_write = 0.0
+    profiler = None
+
+    def start_profiler():
+        # Семплируется поток разбора; в параллельном режиме это поток, собирающий шарды
+        nonlocal profiler
+        if job.profile and profiler is None:
+            logger.warning(f"Profiling import job {job.id}")
+            profiler = SamplingProfiler(interval=config['IMPORT_PROFILE_INTERVAL']).start()
+
+    def status_callback(status):
+        nonlocal last_write
+        job.message = status['message']
+        job.progress = status['progress']
+        job.current_page = status['current_page']
+        job.total_pages = status['total_pages']
+        job.processed_events = status['processed_events']
+        status_hub.publish(job.id, job.to_status())
+
+        # Прогресс пишется в базу не чаще IMPORT_STATUS_INTERVAL
+        now = time.monotonic()
+        if now - last_write >= config['IMPORT_STATUS_INTERVAL']:
+            last_write = now
+            db.session.commit()
+            # После commit флаг profile перечитывается из базы: POST /jobs/<id>/profile
+            # включает профилировщик без перезапуска воркера
+            start_profiler()
+
+    def checkpoint_callback(pages_done, sport_type):
+        job.pages_done = pages_done
+        job.checkpoint_sport_type = sport_type
+        job.processed_events = parser.processed_events
+        db.session.commit()
+
+    parser.set_status_callback(status_callback)
+    start_profiler()
+
+    try:
+        parser.parse_pdf(
+            job.file_path,
+            start_page=job.pages_done + 1,
+            sport_type=job.checkpoint_sport_type,
+            checkpoint_callback=checkpoint_callback,
+            filename=job.filename
+        )
+        job.document_id = parser.document_id
+        job.status = ImportJob.COMPLETED
+        # Повторная загрузка того же файла ничего не пишет, и кэши остаются действительными
+        if parser.written_events:
+            bump_dataset_version()
+    except Exception as e:
+        db.session.rollback()
+        job.status = ImportJob.FAILED
+        job.error = str(e)
+        job.message = f"Ошибка обработки файла: {str(e)}"
+
+    timings = parser.timings.as_dict()
+    job.stage_timings = json.dumps(timings)
+    ParserStageTotal.add(timings)
+    if profiler is not None:
+        job.profile_path = os.path.join(config['IMPORT_PROFILE_DIR'], f'{job.id}.txt')
+        samples = profiler.stop(job.profile_path)
+        logger.warning(f"Import job {job.id} profile: {samples} samples in {job.profile_path}")
+    db.session.commit()
+    status_hub.publish(job.id, job.to_status(), finished=True)
+    _remove_file(job.file_path)
+
+    if job.status == ImportJob.COMPLETED:
+        # Сводку фасетов новой версии считает воркер, а не первый запрос
+        try:
+            facet_rollup()
+        except Exception as e:
+            logger.error(f"Failed to warm facets rollup: {str(e)}")
@@ -0,0 +1,118 @@
+import logging
+from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.dictionary import dictionaries
+from app.models.event import Event
+from app.services.dataset import bump_dataset_version
+from app.services.geo import geocode
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+class EventIngestor:
+    """Пакетная запись разобранных мероприятий в базу.
+
+    Мероприятия накапливаются в пакеты по batch_size, каждый пакет
+    записывается одной транзакцией. При совпадении ekp_number существующая
+    запись либо пропускается (on_conflict='skip'), либо обновляется, если
+    её поля изменились (on_conflict='update'). Город нормализуется по
+    справочнику, к мероприятию добавляются координаты (geo.geocode).
+    Названия видов спорта, регионов и других справочных полей заменяются
+    на id из кэша справочников; запрос к базе нужен только для новых значений.
+    """
+
+    ON_CONFLICT_MODES = ('skip', 'update')
+    REQUIRED_FIELDS = ('ekp_number', 'name', 'sport_type', 'start_date', 'end_date', 'location_country')
+
+    def __init__(self, batch_size=500, on_conflict='skip'):
+        if on_conflict not in self.ON_CONFLICT_MODES:
+            raise ValueError(f"Unknown on_conflict mode: {on_conflict}")
+
+        self.batch_size = batch_size
+        self.on_conflict = on_conflict
+        self.batch = {}
+        self.batches = 0
+        self.written = 0
+        self.invalid = 0
+
+    def add(self, event_data):
+        """Добавляет мероприятие в текущий пакет; возвращает False, если данные неполные"""
+        missing = [field for field in self.REQUIRED_FIELDS if event_data.get(field) is None]
+        if missing:
+            self.invalid += 1
+            logger.warning(f"⚠️ Event {event_data.get('ekp_number')} skipped, missing: {', '.join(missing)}")
+            return False
+
+        self.batch[event_data['ekp_number']] = geocode({**Event.DICTIONARY_DEFAULTS, **event_data})
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Записывает накопленный пакет одной транзакцией"""
+        if not self.batch:
+            return
+
+        rows = list(self.batch.values())
+        self.batch = {}
+
+        try:
+            names = dictionaries()
+            rows = [names.encode(row) for row in rows]
+            if db.engine.dialect.name in ('sqlite', 'postgresql'):
+                written = self._upsert_native(rows)
+            else:
+                written = self._upsert_portable(rows)
+            if written:
+                bump_dataset_version()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"❌ Database error: {str(e)}")
+            raise
+
+        self.batches += 1
+        self.written += written
+        logger.info(f"✅ Batch of {len(rows)} events written, {written} rows changed")
+
+    def _upsert_native(self, rows):
+        dialect = postgresql if db.engine.dialect.name == 'postgresql' else sqlite
+        stmt = dialect.insert(Event.__table__)
+
+        if self.on_conflict == 'skip':
+            stmt = stmt.on_conflict_do_nothing(index_elements=['ekp_number'])
+        else:
+            columns = [name for name in rows[0] if name != 'ekp_number']
+            table = Event.__table__
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['ekp_number'],
+                set_={name: stmt.excluded[name] for name in columns},
+                # Не трогаем строки, у которых ничего не изменилось
+                where=or_(*[table.c[name].is_distinct_from(stmt.excluded[name]) for name in columns])
+            )
+
+        return db.session.execute(stmt, rows).rowcount
+
+    def _upsert_portable(self, rows):
+        # Один IN-запрос на пакет вместо запроса на каждое мероприятие
+        existing = {
+            event.ekp_number: event
+            for event in Event.query.filter(Event.ekp_number.in_([row['ekp_number'] for row in rows]))
+        }
+
+        written = 0
+        for row in rows:
+            event = existing.get(row['ekp_number'])
+            if event is None:
+                db.session.add(Event(**row))
+                written += 1
+            elif self.on_conflict == 'update':
+                changed = False
+                for name, value in row.items():
+                    if getattr(event, name) != value:
+                        setattr(event, name, value)
+                        changed = True
+                written += changed
+
+        return written
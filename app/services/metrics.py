@@ -0,0 +1,376 @@
+import atexit
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class CounterMetric:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def reset(self):
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def state(self):
+        """Значения в виде, пригодном для JSON"""
+        with self._lock:
+            return [[list(label_values), value] for label_values, value in self.values.items()]
+
+    def expose(self, states=()):
+        """Текст метрики; states - значения state() других процессов, которые прибавляются к своим"""
+        with self._lock:
+            values = dict(self.values)
+        for state in states:
+            for label_values, value in state:
+                label_values = tuple(label_values)
+                values[label_values] = values.get(label_values, 0) + value
+
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {value}')
+        return lines
+
+
+class HistogramMetric:
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # label_values -> [счетчики по корзинам..., +Inf], сумма
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(label_values)
+            if entry is None:
+                entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def reset(self):
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def state(self):
+        with self._lock:
+            return [[list(label_values), list(counts), total] for label_values, (counts, total) in self.values.items()]
+
+    def expose(self, states=()):
+        with self._lock:
+            values = {label_values: [list(counts), total] for label_values, (counts, total) in self.values.items()}
+        for state in states:
+            for label_values, counts, total in state:
+                if len(counts) != len(self.buckets) + 1:
+                    # Файл процесса со старыми границами корзин
+                    continue
+                entry = values.setdefault(tuple(label_values), [[0] * (len(self.buckets) + 1), 0.0])
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for label_values, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                labels = _format_labels((*self.labels, 'le'), (*label_values, bound))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Метрики в текстовом формате Prometheus. Значения хранятся в памяти
+    процесса; если задан каталог multiproc_dir (PROMETHEUS_MULTIPROC_DIR),
+    процесс не чаще раза в flush_interval секунд записывает их в свой файл
+    <pid>.json (изменения внутри интервала записывает таймер в его конце), а
+    /metrics складывает свои значения с файлами остальных воркеров gunicorn.
+    Файлы завершившихся воркеров остаются, чтобы счетчики не убывали; каталог
+    очищается при старте сервера (gunicorn.conf.py).
+    """
+
+    FILE_SUFFIX = '.json'
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.multiproc_dir = None
+        self.flush_interval = 1.0
+        self._flushed_at = 0.0
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self._timer_lock = threading.Lock()
+
+    def configure(self, multiproc_dir, flush_interval=1.0):
+        if multiproc_dir:
+            os.makedirs(multiproc_dir, exist_ok=True)
+        self.multiproc_dir = multiproc_dir or None
+        self.flush_interval = flush_interval
+
+    def counter(self, name, documentation, labels=()):
+        metric = CounterMetric(name, documentation, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        metric = HistogramMetric(name, documentation, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, func):
+        """Регистрирует func() -> список строк, вычисляемых при каждом запросе /metrics"""
+        self.collectors.append(func)
+        return func
+
+    def reset(self):
+        """Значения дочернего процесса после fork начинаются с нуля, а не с копии родителя"""
+        for metric in self.metrics:
+            metric.reset()
+        self._flushed_at = 0.0
+        self._flush_lock = threading.Lock()
+        # Таймер родителя в дочернем процессе не работает
+        self._timer = None
+        self._timer_lock = threading.Lock()
+
+    def _process_file(self, pid):
+        return os.path.join(self.multiproc_dir, f'{pid}{self.FILE_SUFFIX}')
+
+    def flush(self, force=False):
+        """
+        Записывает значения процесса в его файл; без force - не чаще
+        flush_interval, а запись, пропущенную внутри интервала, выполнит
+        таймер в его конце
+        """
+        if not self.multiproc_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed_at < self.flush_interval:
+            self._schedule_flush(self._flushed_at + self.flush_interval - now)
+            return
+        # Идущая запись могла собрать значения до этого изменения: принудительная
+        # ждет ее, обычная откладывается на таймер
+        if not self._flush_lock.acquire(blocking=force):
+            self._schedule_flush(self.flush_interval)
+            return
+        try:
+            self._flushed_at = now
+            path = self._process_file(os.getpid())
+            state = {metric.name: metric.state() for metric in self.metrics}
+            # Файл заменяется целиком: читатель видит старую или новую версию, но не половину
+            with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(f'{path}.tmp', path)
+        finally:
+            self._flush_lock.release()
+
+    def _schedule_flush(self, delay):
+        # Один отложенный таймер на процесс: все изменения интервала запишутся вместе
+        with self._timer_lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(delay, self._flush_pending)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_pending(self):
+        with self._timer_lock:
+            self._timer = None
+        self.flush(force=True)
+
+    def _other_processes(self):
+        """Значения остальных процессов из их файлов; свой файл заменяют значения в памяти"""
+        own = os.path.basename(self._process_file(os.getpid()))
+        states = []
+        for name in os.listdir(self.multiproc_dir):
+            if name == own or not name.endswith(self.FILE_SUFFIX):
+                continue
+            try:
+                with open(os.path.join(self.multiproc_dir, name), encoding='utf-8') as f:
+                    states.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return states
+
+    def expose(self):
+        states = self._other_processes() if self.multiproc_dir else []
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.expose([state.get(metric.name, []) for state in states]))
+        for func in self.collectors:
+            lines.extend(func())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry.reset)
+atexit.register(registry.flush, True)
+
+request_latency = registry.histogram(
+    'http_request_duration_seconds', 'Время обработки запроса', ('method', 'route', 'status')
+)
+request_queries = registry.histogram(
+    'http_request_db_queries', 'Число SQL-запросов на HTTP-запрос', ('method', 'route'), QUERY_BUCKETS
+)
+
+@registry.collector
+def parser_stage_metrics():
+    """
+    Время стадий разбора по всем заданиям импорта. Разбор идет в воркерах
+    Celery, у которых нет своего /metrics, поэтому суммы берутся из
+    parser_stage_totals: задание прибавляет к ним свои времена по завершении.
+    """
+    from app.models.import_job import ParserStageTotal
+
+    seconds = {}
+    calls = {}
+    for total in ParserStageTotal.query.all():
+        seconds[total.stage] = total.seconds
+        calls[total.stage] = total.calls
+
+    lines = [
+        '# HELP pdf_parser_stage_seconds_total Время стадий разбора PDF',
+        '# TYPE pdf_parser_stage_seconds_total counter',
+    ]
+    lines += [f'pdf_parser_stage_seconds_total{{stage="{name}"}} {round(seconds[name], 4)}' for name in sorted(seconds)]
+    lines += [
+        '# HELP pdf_parser_stage_calls_total Число выполнений стадий разбора PDF',
+        '# TYPE pdf_parser_stage_calls_total counter',
+    ]
+    lines += [f'pdf_parser_stage_calls_total{{stage="{name}"}} {calls[name]}' for name in sorted(calls)]
+    return lines
+
+
+class StageTimer:
+    """Суммарное время и число вызовов стадий разбора одного задания"""
+
+    def __init__(self):
+        self.seconds = Counter()
+        self.calls = Counter()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+            self.calls[name] += 1
+
+    def merge(self, timings):
+        """Добавляет сводку as_dict() другого таймера (например, из процесса шарда)"""
+        for name, values in timings.items():
+            self.seconds[name] += values['seconds']
+            self.calls[name] += values['calls']
+
+    def as_dict(self):
+        return {
+            name: {'seconds': round(self.seconds[name], 4), 'calls': self.calls[name]}
+            for name in self.seconds
+        }
+
+
+class SamplingProfiler:
+    """
+    Семплирующий профилировщик одного потока без внешних зависимостей.
+    Раз в interval секунд снимает стек потока и считает одинаковые стеки;
+    результат сохраняется в формате collapsed stacks (flamegraph.pl, speedscope).
+    """
+
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self, path):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        return sum(self.stacks.values())
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+
+def init_app(app, db):
+    """Гистограммы времени и числа SQL-запросов по маршрутам"""
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.query_count = 0
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            # Потоковые ответы учитываются по времени до первого байта
+            request_latency.observe(time.perf_counter() - started, request.method, route, response.status_code)
+            request_queries.observe(g.get('query_count', 0), request.method, route)
+            registry.flush()
+        return response
+
+    registry.configure(app.config['METRICS_MULTIPROC_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _count_query)
@@ -0,0 +1,263 @@
+import json
+import logging
+import os
+import smtplib
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from flask import current_app
+from sqlalchemy import and_, func, or_, update
+from app.models.dictionary import dictionaries
+from app.models.event import Event, format_date
+from app.models.favorite import Favorite
+from app.models.notification import NotificationSubscription, Notification, NotificationState
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+class FileSender:
+    """Пишет письма строками JSON в файл; замена почты для разработки"""
+
+    def __init__(self, app):
+        self.path = app.config['NOTIFICATION_FILE']
+
+    def send(self, messages):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for message in messages:
+                f.write(json.dumps(message, ensure_ascii=False) + '\n')
+
+
+class SmtpSender:
+    """Отправляет пачку писем через одно SMTP-соединение (например, локальный отладочный сервер)"""
+
+    def __init__(self, app):
+        self.host = app.config['SMTP_HOST']
+        self.port = app.config['SMTP_PORT']
+        self.sender = app.config['MAIL_FROM']
+
+    def send(self, messages):
+        with smtplib.SMTP(self.host, self.port) as smtp:
+            for message in messages:
+                email = EmailMessage()
+                email['From'] = self.sender
+                email['To'] = message['to']
+                email['Subject'] = message['subject']
+                email.set_content(message['body'])
+                smtp.send_message(email)
+
+
+# Отправители по имени из NOTIFICATION_SENDER; register_sender добавляет свои
+SENDERS = {
+    'file': FileSender,
+    'smtp': SmtpSender,
+}
+
+
+def register_sender(name, factory):
+    """factory(app) возвращает объект с методом send(messages)"""
+    SENDERS[name] = factory
+
+
+def get_sender():
+    name = current_app.config['NOTIFICATION_SENDER']
+    if name not in SENDERS:
+        raise ValueError(f"Unknown notification sender: {name}")
+    return SENDERS[name](current_app)
+
+
+def _newly_upcoming_events(state, now, days):
+    """
+    Мероприятия, которые впервые попали в окно уведомлений с прошлой проверки:
+    начало перешло через старую границу окна или мероприятие добавлено в базу
+    уже внутри окна
+    """
+    events = Event.get_upcoming_events(days=days, now=now, since=state.horizon)
+    if state.horizon > now:
+        events += Event.query.filter(
+            Event.id > state.last_event_id,
+            Event.start_date >= now,
+            Event.start_date <= state.horizon
+        ).all()
+    return events
+
+
+def _match_subscriptions(events, recipients, chunk_size=500):
+    """Добавляет мероприятия в recipients[email] по подпискам; один запрос на пачку мероприятий"""
+    for first in range(0, len(events), chunk_size):
+        chunk = events[first:first + chunk_size]
+        by_sport, by_region, by_id = {}, {}, {}
+        for event in chunk:
+            by_sport.setdefault(event.sport_type, []).append(event.id)
+            if event.location_region_id is not None:
+                by_region.setdefault(event.location_region, []).append(event.id)
+            by_id[str(event.id)] = [event.id]
+
+        matches = {
+            NotificationSubscription.SPORT: by_sport,
+            NotificationSubscription.REGION: by_region,
+            NotificationSubscription.EVENT: by_id,
+        }
+        conditions = [
+            and_(NotificationSubscription.kind == kind, NotificationSubscription.value.in_(list(values)))
+            for kind, values in matches.items() if values
+        ]
+
+        subscriptions = db.session.query(
+            NotificationSubscription.email,
+            NotificationSubscription.user_id,
+            NotificationSubscription.kind,
+            NotificationSubscription.value
+        ).filter(or_(*conditions))
+
+        for email, user_id, kind, value in subscriptions.yield_per(5000):
+            recipient = recipients.get(email)
+            if recipient is None:
+                recipient = recipients[email] = (user_id, set())
+            recipient[1].update(matches[kind][value])
+
+
+def _match_favorites(events, recipients, chunk_size=500):
+    """
+    Добавляет получателям мероприятия из избранного: пользователь избранного
+    связан с адресом через user_id своих подписок. Один запрос на пачку
+    мероприятий по индексам favorites.event_id и подписок по user_id.
+    """
+    for first in range(0, len(events), chunk_size):
+        event_ids = [event.id for event in events[first:first + chunk_size]]
+        favorites = db.session.query(
+            NotificationSubscription.email,
+            NotificationSubscription.user_id,
+            Favorite.event_id
+        ).join(
+            Favorite, Favorite.user_id == NotificationSubscription.user_id
+        ).filter(Favorite.event_id.in_(event_ids)).distinct()
+
+        for email, user_id, event_id in favorites.yield_per(5000):
+            recipient = recipients.get(email)
+            if recipient is None:
+                recipient = recipients[email] = (user_id, set())
+            recipient[1].add(event_id)
+
+
+def check_upcoming_events(now=None, batch_size=1000):
+    """
+    Создает уведомления о мероприятиях, начинающихся в ближайшие
+    NOTIFICATION_LEAD_DAYS дней, по подпискам и избранному. Каждая проверка разбирает только мероприятия,
+    которых не было в окне при прошлой проверке (отметка в notification_state),
+    и дает одно уведомление на получателя. Уведомления и новая отметка
+    записываются одной транзакцией.
+    """
+    now = now or datetime.utcnow()
+    days = current_app.config['NOTIFICATION_LEAD_DAYS']
+
+    state = db.session.query(NotificationState).filter_by(id=1).with_for_update().first()
+    if state is None:
+        state = NotificationState(id=1, horizon=now, last_event_id=0)
+        db.session.add(state)
+
+    last_event_id = db.session.query(func.max(Event.id)).scalar() or 0
+    events = [event for event in _newly_upcoming_events(state, now, days) if event.id <= last_event_id]
+
+    recipients = {}
+    _match_subscriptions(events, recipients)
+    _match_favorites(events, recipients)
+
+    rows = [
+        {'email': email, 'user_id': user_id, 'event_ids': json.dumps(sorted(event_ids)), 'created_at': now}
+        for email, (user_id, event_ids) in recipients.items()
+    ]
+    for first in range(0, len(rows), batch_size):
+        db.session.execute(Notification.__table__.insert(), rows[first:first + batch_size])
+
+    state.horizon = max(state.horizon, now + timedelta(days=days))
+    state.last_event_id = max(state.last_event_id, last_event_id)
+    state.updated_at = now
+    db.session.commit()
+
+    logger.info(f"Upcoming events check: {len(events)} new events, {len(rows)} notifications")
+    return len(rows)
+
+
+def _render(notification, events):
+    names = dictionaries()
+    lines = []
+    for event_id in notification.event_id_list():
+        event = events.get(event_id)
+        if event is None:
+            continue
+        region = names['location_region'].name(event.location_region_id)
+        place = ', '.join(part for part in (event.location_city, region) if part)
+        sport_type = names['sport_type'].name(event.sport_type_id)
+        lines.append(f"{format_date(event.start_date)} - {event.name} ({sport_type}{', ' + place if place else ''})")
+
+    if not lines:
+        return None
+    return {
+        'to': notification.email,
+        'subject': f"Ближайшие мероприятия: {len(lines)}",
+        'body': "Скоро начнутся мероприятия из ваших подписок и избранного:\n\n" + '\n'.join(lines)
+    }
+
+
+def send_notifications(sender=None, batch_size=500, now=None):
+    """
+    Отправляет накопленные уведомления пачками по batch_size. Уведомления
+    старше NOTIFICATION_EXPIRE_TIME не отправляются. Если отправитель упал,
+    текущая пачка остается в очереди до следующего запуска.
+    """
+    sender = sender or get_sender()
+    now = now or datetime.utcnow()
+
+    db.session.execute(
+        update(Notification)
+        .where(
+            Notification.sent_at.is_(None),
+            Notification.expired.is_(False),
+            Notification.created_at < now - current_app.config['NOTIFICATION_EXPIRE_TIME']
+        )
+        .values(expired=True)
+    )
+    db.session.commit()
+
+    sent = 0
+    last_id = 0
+    while True:
+        notifications = Notification.query.filter(
+            Notification.sent_at.is_(None),
+            Notification.expired.is_(False),
+            Notification.id > last_id
+        ).order_by(Notification.id).limit(batch_size).all()
+        if not notifications:
+            break
+        last_id = notifications[-1].id
+
+        # Мероприятия всей пачки одним запросом
+        event_ids = {event_id for notification in notifications for event_id in notification.event_id_list()}
+        events = {
+            event.id: event
+            for event in db.session.query(
+                Event.id, Event.name, Event.sport_type_id, Event.start_date,
+                Event.location_city, Event.location_region_id
+            ).filter(Event.id.in_(event_ids))
+        }
+
+        messages = [message for message in (_render(n, events) for n in notifications) if message]
+        try:
+            if messages:
+                sender.send(messages)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to send notifications: {str(e)}")
+            break
+
+        db.session.execute(
+            update(Notification)
+            .where(Notification.id.in_([notification.id for notification in notifications]))
+            .values(sent_at=now)
+        )
+        db.session.commit()
+        sent += len(messages)
+
+    logger.info(f"Sent {sent} notifications")
+    return sent
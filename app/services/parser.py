@@ -1,9 +1,17 @@
 import re
+import gc
+import bisect
+import os
 from datetime import datetime
+from functools import lru_cache
 import logging
-from app.models.event import Event
-from app import db
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from app.services.ingest import EventIngestor
+from app.services.documents import DocumentFingerprints, text_hash
+from app.services.metrics import StageTimer
 import pdfplumber
+from pdfminer.layout import LTChar, LTContainer
 
 ENABLE_DEBUG_LOGGING = False  # Измените на True чтобы включить подробное логирование
 
@@ -13,6 +21,300 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Регулярные выражения разбора блоков компилируются один раз при импорте
+EKP_RE = re.compile(r'\d{13}')
+BLOCK_SPLIT_RE = re.compile(r'(?=\d{13})')
+SPORT_TYPE_RE = re.compile(r'^([А-ЯЁ\s]+)\nОсновной состав', re.MULTILINE)
+SPORT_NAME_RE = re.compile(r'[А-ЯЁ\s]+')
+DISCIPLINE_RE = re.compile(r'\b([A-Z][A-Z0-9-]+(?:,?\s?))+')
+DISCIPLINE_CLEAN_RE = re.compile(r'^[A-Z0-9-]+$')
+DATE_RE = re.compile(r'\d{2}\.\d{2}\.\d{4}')
+CITY_PATTERN = r'г\.\s*(?P<city>[А-ЯЁ][а-яё]+(?:-[А-ЯЁ][а-яё]+)*(?:\s+[А-ЯЁ][а-яё]+)?)'
+CITY_RE = re.compile(CITY_PATTERN)
+NAME_FALLBACK_RE = re.compile(
+    r'(ЧЕМПИОНАТ|ВСЕРОССИЙСКИЕ СОРЕВНОВАНИЯ|КУБОК РОССИИ|МЕЖДУНАРОДНЫЕ СОРЕВНОВАНИЯ|ПЕРВЕНСТВО|[А-ЯЁ\s]{5,})'
+)
+
+
+def current_rss_mb():
+    """Текущий резидентный объем памяти процесса в МБ или None, если его не узнать"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _build_trie_pattern(words):
+    """Строит регулярное выражение в виде префиксного дерева из списка слов.
+
+    Общие префиксы проверяются один раз, поэтому поиск не перебирает все
+    альтернативы в каждой позиции; жадные ветки дают самое длинное совпадение.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def to_pattern(node):
+        branches = [re.escape(char) + to_pattern(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            pattern = '(?:' + pattern + ')?'
+        return pattern
+
+    return to_pattern(trie)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value):
+    # В календаре много повторяющихся дат, strptime для каждой не нужен
+    return datetime.strptime(value, '%d.%m.%Y')
+
+
+class PageLayout:
+    """Слова страницы с размерами шрифта и координатами.
+
+    Извлекается один раз на страницу и хранит индекс, сопоставляющий
+    каждому EKP номеру его собственный диапазон слов.
+    """
+
+    NAME_FONT_SIZE = 8.0
+
+    def __init__(self, page):
+        self.words = page.extract_words(
+            extra_attrs=['fontname', 'size'],
+            keep_blank_chars=True
+        )
+        self.ekp_spans = {}
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for word in self.words:
+                logger.debug(f"Word: {word['text']}, Size: {word['size']}, Font: {word['fontname']}")
+
+        # Индекс: EKP номер -> [начало, конец) среди слов страницы
+        starts = []
+        for index, word in enumerate(self.words):
+            match = EKP_RE.search(word['text'])
+            if match and match.group(0) not in self.ekp_spans:
+                self.ekp_spans[match.group(0)] = None
+                starts.append((match.group(0), index))
+
+        for position, (ekp_number, start) in enumerate(starts):
+            end = starts[position + 1][1] if position + 1 < len(starts) else len(self.words)
+            self.ekp_spans[ekp_number] = (start, end)
+
+    def words_for(self, ekp_number):
+        """Возвращает слова, относящиеся к мероприятию с указанным EKP номером"""
+        span = self.ekp_spans.get(ekp_number)
+        if not span:
+            return []
+        return self.words[span[0]:span[1]]
+
+    @classmethod
+    def _is_name_word(cls, word):
+        # Название набрано шрифтом 8 (с погрешностью 0.1) и капсом
+        return abs(float(word['size']) - cls.NAME_FONT_SIZE) < 0.1 and word['text'].isupper()
+
+    def find_event_name(self, ekp_number):
+        """Ищет название мероприятия по размеру шрифта в пределах его блока"""
+        name_parts = []
+
+        for word in self.words_for(ekp_number):
+            if self._is_name_word(word):
+                text = word['text'].strip()
+                if text and not text.isdigit():  # игнорируем числа
+                    name_parts.append(text)
+            elif name_parts:  # если уже начали собирать название и встретили другой текст
+                break
+
+        return ' '.join(name_parts) if name_parts else None
+
+
+class TableRow:
+    """Строка таблицы календаря: слова по столбцам, в порядке строк документа"""
+
+    __slots__ = ('ekp_number', 'cells')
+
+    def __init__(self, column_count):
+        self.ekp_number = None
+        # Столбец -> список строк ячейки, строка ячейки - список слов
+        self.cells = [[] for _ in range(column_count)]
+
+    def add_line(self, words_by_column):
+        for column, words in enumerate(words_by_column):
+            if words:
+                self.cells[column].append(words)
+
+    def lines(self, column):
+        return [' '.join(word['text'].strip() for word in line) for line in self.cells[column]]
+
+
+class PageTable:
+    """Строки таблицы календаря ЕКП по геометрии столбцов.
+
+    Начала столбцов (номер ЕКП, название с дисциплинами, сроки, место
+    проведения, число участников, возрастная группа) определяются на каждой
+    странице по левому краю опорных слов: номеров ЕКП, названий шрифта 8,
+    дат, стран и чисел. Каждое слово за один проход попадает в строку
+    документа по вертикали и в столбец по левому краю, поэтому поля берутся
+    прямо из ячеек без повторного разбора текста.
+
+    Строка таблицы начинается с первой строки названия или с нового номера
+    ЕКП; номер, выровненный по центру высокой ячейки, остается в своей
+    строке. Заголовок вида спорта (текст только в первом столбце) закрывает
+    текущую строку.
+    """
+
+    EKP, NAME, DATES, PLACE, PARTICIPANTS, AGE_GROUP = range(6)
+    COLUMN_COUNT = 6
+    LINE_TOLERANCE = 3  # pt по вертикали между словами одной строки документа
+    COLUMN_TOLERANCE = 2  # pt влево от начала столбца
+
+    def __init__(self, words, countries):
+        self.words = words
+        self.starts = self._detect_columns(words, countries)
+        self.end_sport_type = None
+
+    @staticmethod
+    def _iter_chars(objects):
+        for obj in objects:
+            if isinstance(obj, LTChar):
+                yield obj
+            elif isinstance(obj, LTContainer):
+                yield from PageTable._iter_chars(obj)
+
+    @classmethod
+    def extract_words(cls, page, x_tolerance=3):
+        """
+        Слова страницы (text, x0, top, size) прямо из символов разметки
+        pdfminer. Повторяет page.extract_words(extra_attrs=['size'],
+        keep_blank_chars=True), но не переводит каждый символ в словарь
+        pdfplumber со всеми атрибутами: для таблицы нужны только положение и
+        размер шрифта, а это преобразование - половина времени извлечения.
+        """
+        offset = page.height + page.mediabox[1]
+        chars = sorted(
+            (offset - char.y1, char.x0, char.x1, char.size, char.get_text())
+            for char in cls._iter_chars(page.layout)
+        )
+
+        words = []
+        line, line_top = [], None
+        for char in chars:
+            if line and char[0] - line_top > cls.LINE_TOLERANCE:
+                cls._split_words(line, words, x_tolerance)
+                line = []
+            if not line:
+                line_top = char[0]
+            line.append(char)
+        if line:
+            cls._split_words(line, words, x_tolerance)
+        return words
+
+    @staticmethod
+    def _split_words(line, words, x_tolerance):
+        word = None
+        for top, x0, x1, size, text in sorted(line, key=lambda char: char[1]):
+            if word and x0 - word['x1'] <= x_tolerance and size == word['size']:
+                word['text'] += text
+                word['x1'] = x1
+                word['top'] = min(word['top'], top)
+                continue
+            word = {'text': text, 'x0': x0, 'x1': x1, 'top': top, 'size': size}
+            words.append(word)
+
+    @staticmethod
+    def _min_x(words, predicate, after=None):
+        xs = [word['x0'] for word in words if (after is None or word['x0'] > after) and predicate(word)]
+        return min(xs) if xs else None
+
+    def _detect_columns(self, words, countries):
+        """Левые края столбцов или None, если на странице нет таблицы мероприятий"""
+        ekp_x = self._min_x(words, lambda word: EKP_RE.fullmatch(word['text'].strip()))
+        if ekp_x is None:
+            return None
+        name_x = self._min_x(words, PageLayout._is_name_word, ekp_x)
+        dates_x = self._min_x(words, lambda word: DATE_RE.fullmatch(word['text'].strip()), name_x)
+        place_x = self._min_x(words, lambda word: word['text'].strip() in countries, dates_x)
+        if name_x is None or dates_x is None or place_x is None:
+            return None
+        participants_x = self._min_x(words, lambda word: word['text'].strip().isdigit(), place_x)
+        age_x = None
+        if participants_x is not None:
+            age_x = self._min_x(words, lambda word: not word['text'].strip().isdigit(), participants_x)
+        # Без числа участников или возрастной группы столбец остается пустым
+        far = float('inf')
+        return [ekp_x, name_x, dates_x, place_x, participants_x or far, age_x or far]
+
+    def _column(self, word):
+        return max(bisect.bisect_right(self.starts, word['x0'] + self.COLUMN_TOLERANCE) - 1, 0)
+
+    def _document_lines(self):
+        """Слова, сгруппированные в строки документа по верхнему краю"""
+        line, line_top = [], None
+        for word in sorted(self.words, key=lambda word: (word['top'], word['x0'])):
+            if line and word['top'] - line_top > self.LINE_TOLERANCE:
+                yield line
+                line = []
+            if not line:
+                line_top = word['top']
+            line.append(word)
+        if line:
+            yield line
+
+    def rows(self, sport_type):
+        """
+        Генератор (строка таблицы, вид спорта). Вид спорта задается
+        заголовком над строкой "Основной состав", до первого заголовка
+        действует sport_type с предыдущей страницы. После обхода
+        end_sport_type - вид спорта на конце страницы.
+        """
+        self.end_sport_type = sport_type
+        if self.starts is None:
+            return
+
+        row = None
+        header = None
+        previous_has_name = False
+
+        for line in self._document_lines():
+            by_column = [[] for _ in range(self.COLUMN_COUNT)]
+            for word in sorted(line, key=lambda word: word['x0']):
+                by_column[self._column(word)].append(word)
+
+            ekp_words = [word for word in by_column[self.EKP] if EKP_RE.fullmatch(word['text'].strip())]
+            if not ekp_words and not any(by_column[self.NAME:]):
+                # Заголовок вида спорта
+                text = ' '.join(word['text'].strip() for word in line)
+                if text == 'Основной состав' and header and SPORT_NAME_RE.fullmatch(header):
+                    sport_type = self.end_sport_type = header.strip()
+                header = text
+                if row is not None and row.ekp_number:
+                    yield row, row_sport_type
+                row = None
+                previous_has_name = False
+                continue
+
+            has_name = any(PageLayout._is_name_word(word) for word in by_column[self.NAME])
+            if row is None or (has_name and not previous_has_name) or (ekp_words and row.ekp_number):
+                if row is not None and row.ekp_number:
+                    yield row, row_sport_type
+                row = TableRow(self.COLUMN_COUNT)
+                row_sport_type = sport_type
+
+            if ekp_words:
+                row.ekp_number = ekp_words[0]['text'].strip()
+            row.add_line(by_column)
+            previous_has_name = has_name
+
+        if row is not None and row.ekp_number:
+            yield row, row_sport_type
+
 
 class PDFParser:
     COUNTRIES = [
@@ -65,12 +367,48 @@ class PDFParser:
         "Чукотский автономный округ", "Ямало-Ненецкий автономный округ"
     ]
 
-    def __init__(self):
+    # Один проход по тексту блока: даты, страна с числом участников и город
+    FIELDS_RE = re.compile(
+        r'(?P<date>\d{2}\.\d{2}\.\d{4})'
+        r'|(?P<country>' + '|'.join(COUNTRIES) + r')\s+(?P<participants>\d+)\s+'
+        r'|' + CITY_PATTERN
+    )
+
+    # Все субъекты одним выражением-деревом, сопоставляется с текстом в верхнем регистре
+    REGION_RE = re.compile(_build_trie_pattern([s.upper() for s in SUBJECTS_RF]))
+    REGION_BY_NAME = {s.upper(): s for s in SUBJECTS_RF}
+
+    # Режимы разбора страницы: текст, разрезанный по номерам ЕКП, или ячейки таблицы по геометрии
+    TEXT_MODE = 'text'
+    TABLE_MODE = 'table'
+    MODES = (TEXT_MODE, TABLE_MODE)
+
+    COUNTRY_SET = frozenset(COUNTRIES)
+
+    def __init__(self, workers=1, pages_per_shard=25, batch_size=500, on_conflict='skip', incremental=True,
+                 max_rss_mb=None, mode=TEXT_MODE):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown parser mode: {mode}")
+
+        self.mode = mode
+        self.workers = workers
+        self.max_rss_mb = max_rss_mb
+        self.pages_per_shard = pages_per_shard
+        self.batch_size = batch_size
+        self.on_conflict = on_conflict
+        self.incremental = incremental
+        self.document_id = None
+        self.written_events = 0
+        self.skipped_pages = 0
+        self.removed_ekp_numbers = []
         self.total_pages = 0
         self.current_page = 0
         self.processed_events = 0
         self.total_events = 0
+        self.page_start_sport_type = None
         self.status_callback = None
+        # Суммарное время стадий: extract_text, extract_words, split_blocks, parse_fields, db_save
+        self.timings = StageTimer()
 
     def set_status_callback(self, callback):
         """Установка callback-функции для отправки статуса"""
@@ -91,103 +429,84 @@ class PDFParser:
     @staticmethod
     def _extract_sport_type(block):
         """Извлекает вид спорта перед фразой 'Основной состав'."""
-        match = re.search(r'^([А-ЯЁ\s]+)\nОсновной состав', block, re.MULTILINE)
+        match = SPORT_TYPE_RE.search(block)
         return match.group(1).strip() if match else None
 
     @staticmethod
     def _extract_discipline(full_text):
         """Извлекает дисциплины из текста."""
-        discipline_matches = re.findall(r'\b([A-Z][A-Z0-9-]+(?:,?\s?))+', full_text)
+        discipline_matches = DISCIPLINE_RE.findall(full_text)
         disciplines = set()
         for match in discipline_matches:
             cleaned = match.replace(" ", "").replace(",", ", ").strip(", ")
-            if re.match(r'^[A-Z0-9-]+$', cleaned):
+            if DISCIPLINE_CLEAN_RE.match(cleaned):
                 disciplines.add(cleaned)
         return ", ".join(sorted(disciplines)) if disciplines else None
 
-    def _parse_event_block(self, block, sport_type, page):
+    @classmethod
+    def _extract_fields(cls, full_text):
+        """Извлекает даты, место проведения, число участников и возрастную группу."""
+        dates = []
+        country_match = None
+        city = None
+
+        for match in cls.FIELDS_RE.finditer(full_text):
+            if match.group('date'):
+                dates.append(match.group('date'))
+            elif match.group('country'):
+                country_match = country_match or match
+            elif city is None:
+                city = match.group('city').strip()
+
+        region_match = cls.REGION_RE.search(full_text.upper())
+
+        # Возрастная группа - текст после числа участников до даты окончания
+        age_group = None
+        if country_match:
+            rest = full_text[country_match.end():]
+            if len(dates) > 1:
+                end_pos = rest.find(dates[1])
+                if end_pos != -1:
+                    rest = rest[:end_pos]
+            age_group = rest.strip()
+
+        return {
+            'start_date': _parse_date(dates[0]) if dates else None,
+            'end_date': _parse_date(dates[1]) if len(dates) > 1 else None,
+            'location_country': country_match.group('country') if country_match else None,
+            'location_region': cls.REGION_BY_NAME[region_match.group(0)] if region_match else None,
+            'location_city': city,
+            'participants_count': int(country_match.group('participants')) if country_match else None,
+            'age_group': age_group
+        }
+
+    def _parse_event_block(self, block, sport_type, layout):
+        # Отладочный вывод каждого блока только при уровне DEBUG: форматирование дорогое
+        debug = logger.isEnabledFor(logging.DEBUG)
         try:
-            logger.info(f"Parsing block:\n{block}\n{'-' * 50}")
-
-            # Извлекаем слова со стилями
-            words = page.extract_words(
-                extra_attrs=['fontname', 'size'],
-                keep_blank_chars=True
-            )
-
-            # Debug: печатаем все слова с их характеристиками
-            for word in words:
-                logger.debug(f"Word: {word['text']}, Size: {word['size']}, Font: {word['fontname']}")
+            if debug:
+                logger.debug(f"Parsing block:\n{block}\n{'-' * 50}")
 
             # Поиск EKP номера
-            ekp_match = re.search(r'(\d{13})', block)
-            ekp_number = ekp_match.group(1) if ekp_match else None
+            ekp_match = EKP_RE.search(block)
+            ekp_number = ekp_match.group(0) if ekp_match else None
 
-            # Поиск названия мероприятия
+            # Поиск названия мероприятия только среди слов своего блока
             event_name = None
             if ekp_number:
-                ekp_pos = block.find(ekp_number) + len(ekp_number)
-                name_parts = []
-
-                for word in words:
-                    # Проверяем размер шрифта (8) и что текст написан капсом
-                    if abs(float(word['size']) - 8.0) < 0.1 and word[
-                        'text'].isupper():  # используем 0.1 для погрешности
-                        text = word['text'].strip()
-                        if text and not text.isdigit():  # игнорируем числа
-                            name_parts.append(text)
-                    elif name_parts:  # если уже начали собирать название и встретили другой текст
-                        # Проверяем, не является ли следующее слово частью названия
-                        next_text = word['text'].strip()
-                        if not (abs(float(word['size']) - 8.0) < 0.1 and next_text.isupper()):
-                            break
-
-                if name_parts:
-                    event_name = ' '.join(name_parts)
-                    logger.info(f"Found name by font size: {event_name}")
+                event_name = layout.find_event_name(ekp_number)
+                if event_name and debug:
+                    logger.debug(f"Found name by font size: {event_name}")
 
             # Если не нашли название по размеру шрифта, используем запасной вариант
             if not event_name:
-                name_match = re.search(
-                    r'(ЧЕМПИОНАТ|ВСЕРОССИЙСКИЕ СОРЕВНОВАНИЯ|КУБОК РОССИИ|МЕЖДУНАРОДНЫЕ СОРЕВНОВАНИЯ|ПЕРВЕНСТВО|[А-ЯЁ\s]{5,})',
-                    block
-                )
+                name_match = NAME_FALLBACK_RE.search(block)
                 event_name = name_match.group(0).strip() if name_match else 'Неизвестное мероприятие'
-                logger.info(f"Found name by regex: {event_name}")
+                if debug:
+                    logger.debug(f"Found name by regex: {event_name}")
 
             full_text = " ".join(line.strip() for line in block.split('\n') if line.strip())
-            # Поиск дат
-            dates = re.findall(r'(\d{2}\.\d{2}\.\d{4})', full_text)
-            start_date = datetime.strptime(dates[0], '%d.%m.%Y') if dates else None
-            end_date = datetime.strptime(dates[1], '%d.%m.%Y') if len(dates) > 1 else None
-
-            # Поиск страны и количества участников
-            country_participants_match = re.search(
-                r'(РОССИЯ|УЗБЕКИСТАН|КАЗАХСТАН|БЕЛАРУСЬ|КЫРГЫЗСТАН|ТАДЖИКИСТАН|ТУРКМЕНИСТАН|АРМЕНИЯ|АЗЕРБАЙДЖАН|ГРУЗИЯ)\s+(\d+)\s+',
-                full_text)
-            location_country = country_participants_match.group(1) if country_participants_match else None
-            participants_count = int(country_participants_match.group(2)) if country_participants_match else None
-
-            # Поиск региона
-            location_region = next((s for s in self.SUBJECTS_RF if s.upper() in full_text.upper()), None)
-
-            # Поиск города
-            city_match = re.search(
-                r'г\.\s*([А-ЯЁ][а-яё]+(?:-[А-ЯЁ][а-яё]+)*(?:\s+[А-ЯЁ][а-яё]+)?)', full_text
-            )
-            location_city = None
-            if city_match:
-                location_city = city_match.group(1).replace("\n", " ").strip()
-
-            # Поиск возрастной группы
-            age_group = None
-            if country_participants_match:
-                age_group_match = re.search(
-                    fr'{country_participants_match.group(2)}\s+(.*?)(?={dates[1]}|$)',
-                    full_text
-                )
-                if age_group_match:
-                    age_group = age_group_match.group(1).strip()
+            fields = self._extract_fields(full_text)
 
             # Извлечение дисциплин
             discipline = self._extract_discipline(full_text)
@@ -198,83 +517,300 @@ class PDFParser:
                 'name': event_name,
                 'sport_type': sport_type,
                 'discipline': discipline,
-                'start_date': start_date,
-                'end_date': end_date,
-                'location_country': location_country,
-                'location_region': location_region,
-                'location_city': location_city,
-                'participants_count': participants_count,
-                'age_group': age_group
+                **fields
             }
 
-            logger.info(f"Parsed Event Data: {event_data}")
-            return Event(**event_data)
+            if debug:
+                logger.debug(f"Parsed Event Data: {event_data}")
+            return event_data
 
         except Exception as e:
             logger.error(f"Error parsing block: {str(e)}\nBlock: {block}")
             return None
 
-    def _save_event(self, event):
-        try:
-            existing = Event.query.filter_by(ekp_number=event.ekp_number).first()
-            if not existing:
-                db.session.add(event)
-                db.session.commit()
-                logger.info(f"✅ Saved: {event.name[:50]}...")
-            else:
-                logger.info(f"⚠️ Event exists: {event.ekp_number}")
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"❌ Database error: {str(e)}")
-            raise
-
-    def parse_pdf(self, file_path):
-        """Основной метод парсинга PDF файла"""
-        logger.info(f"Starting to parse PDF: {file_path}")
-        processed_ekp = set()
-        current_sport_type = None
-        pdf = None
+    def _extract_page(self, page):
+        """Содержимое страницы для разбора: текст в режиме text, слова с координатами в режиме table"""
+        if self.mode == self.TABLE_MODE:
+            with self.timings.stage('extract_words'):
+                return PageTable.extract_words(page)
+        with self.timings.stage('extract_text'):
+            return page.extract_text() or ''
 
+    @staticmethod
+    def _content_hash(content):
+        """
+        Отпечаток страницы по извлеченному содержимому. В режимах text и
+        table отпечатки разные, после смены режима документ один раз
+        разбирается целиком.
+        """
+        if isinstance(content, str):
+            return text_hash(content)
+        return text_hash('\n'.join(word['text'] for word in content))
+
+    def _parse_page(self, page, sport_type, content=None):
+        """Разбирает одну страницу.
+
+        content - результат _extract_page, если он уже получен.
+        Возвращает список данных мероприятий страницы и вид спорта,
+        действующий на её конце.
+        """
+        if content is None:
+            content = self._extract_page(page)
+        if self.mode == self.TABLE_MODE:
+            return self._parse_table_page(content, sport_type)
+
+        timings = self.timings
+        text = content
+        with timings.stage('extract_words'):
+            layout = PageLayout(page)
+        with timings.stage('split_blocks'):
+            blocks = BLOCK_SPLIT_RE.split(text)
+        events = []
+
+        with timings.stage('parse_fields'):
+            for block in blocks:
+                if not block.strip():
+                    continue
+
+                new_sport_type = self._extract_sport_type(block)
+                if new_sport_type:
+                    sport_type = new_sport_type
+
+                if EKP_RE.search(block):
+                    event_data = self._parse_event_block(block, sport_type, layout)
+                    if event_data:
+                        events.append(event_data)
+
+        return events, sport_type
+
+    def _parse_table_page(self, words, sport_type):
+        """Разбирает страницу по ячейкам таблицы, см. PageTable"""
+        with self.timings.stage('split_blocks'):
+            table = PageTable(words, self.COUNTRY_SET)
+            rows = list(table.rows(sport_type))
+        with self.timings.stage('parse_fields'):
+            events = [self._parse_table_row(row, row_sport_type) for row, row_sport_type in rows]
+        return events, table.end_sport_type
+
+    @classmethod
+    def _parse_table_row(cls, row, sport_type):
+        """Поля мероприятия из ячеек строки таблицы"""
+        name_parts = []
+        disciplines = []
+        for line in row.cells[PageTable.NAME]:
+            text = ' '.join(word['text'].strip() for word in line)
+            if all(PageLayout._is_name_word(word) for word in line):
+                name_parts.append(text)
+            else:
+                disciplines.extend(part.strip() for part in text.split(','))
+
+        name = ' '.join(name_parts)
+        if not name:
+            name_match = NAME_FALLBACK_RE.search(' '.join(row.lines(PageTable.NAME)))
+            name = name_match.group(0).strip() if name_match else 'Неизвестное мероприятие'
+
+        # Однодневное мероприятие: в ячейке сроков только дата начала
+        dates = [value for value in row.lines(PageTable.DATES) if DATE_RE.fullmatch(value)]
+        start_date = _parse_date(dates[0]) if dates else None
+        end_date = _parse_date(dates[1]) if len(dates) > 1 else start_date
+
+        place = row.lines(PageTable.PLACE)
+        country = next((line for line in place if line in cls.COUNTRY_SET), None)
+        place_text = ' '.join(place)
+        region_match = cls.REGION_RE.search(place_text.upper())
+        city_match = CITY_RE.search(place_text)
+
+        participants = ''.join(row.lines(PageTable.PARTICIPANTS))
+        age_group = ' '.join(row.lines(PageTable.AGE_GROUP))
+
+        return {
+            'ekp_number': row.ekp_number,
+            'name': name,
+            'sport_type': sport_type,
+            'discipline': ', '.join(sorted({part for part in disciplines if part})) or None,
+            'start_date': start_date,
+            'end_date': end_date,
+            'location_country': country,
+            'location_region': cls.REGION_BY_NAME[region_match.group(0)] if region_match else None,
+            'location_city': city_match.group('city').strip() if city_match else None,
+            'participants_count': int(participants) if participants.isdigit() else None,
+            'age_group': age_group or None
+        }
+
+    def _enter_page(self, page_num, sport_type):
+        # Вид спорта на начало страницы нужен, чтобы продолжить разбор с неё
+        self.current_page = page_num
+        self.page_start_sport_type = sport_type
+        progress = (page_num / self.total_pages) * 100
+        self.update_status(
+            f"Обработка страницы {page_num} из {self.total_pages}",
+            progress
+        )
+
+    def _check_memory(self, pdf, file_path):
+        """
+        Следит за потолком памяти max_rss_mb. При превышении документ
+        открывается заново, чтобы сбросить кэши pdfminer; если память не
+        вернулась под потолок, разбор останавливается с MemoryError, и задание
+        можно продолжить с последней контрольной точки.
+        """
+        if not self.max_rss_mb:
+            return pdf
+        rss = current_rss_mb()
+        if rss is None or rss <= self.max_rss_mb:
+            return pdf
+
+        logger.warning(f"⚠️ RSS {rss} MB over {self.max_rss_mb} MB, reopening {file_path}")
+        pdf.close()
+        gc.collect()
+        pdf = pdfplumber.open(file_path)
+
+        rss = current_rss_mb()
+        if rss is not None and rss > self.max_rss_mb:
+            pdf.close()
+            raise MemoryError(f"Parser memory {rss} MB exceeds limit {self.max_rss_mb} MB")
+        return pdf
+
+    def _iter_events_serial(self, file_path, start_page, sport_type, fingerprints):
+        pdf = pdfplumber.open(file_path)
         try:
-            pdf = pdfplumber.open(file_path)
             self.total_pages = len(pdf.pages)
             self.update_status(f"Всего страниц: {self.total_pages}", 0)
 
-            # Обработка страниц
-            for page_num, page in enumerate(pdf.pages, 1):
-                self.current_page = page_num
-                text = page.extract_text()
-                event_blocks = re.split(r'(?=\d{13})', text)
-
-                # Вычисляем прогресс
-                progress = (page_num / self.total_pages) * 100
-                self.update_status(
-                    f"Обработка страницы {page_num} из {self.total_pages}",
-                    progress
-                )
-
-                for block in event_blocks:
-                    if not block.strip():
-                        continue
-
-                    new_sport_type = self._extract_sport_type(block)
-                    if new_sport_type:
-                        current_sport_type = new_sport_type
-
-                    try:
-                        ekp_match = re.search(r'(\d{13})', block)
-                        if ekp_match and ekp_match.group(1) not in processed_ekp:
-                            event = self._parse_event_block(block, current_sport_type, page)
-                            if event:
-                                self._save_event(event)
-                                processed_ekp.add(ekp_match.group(1))
-                                self.processed_events += 1
-
-                    except Exception as e:
-                        logger.error(f"Failed to process block: {str(e)}")
+            for page_num in range(start_page, self.total_pages + 1):
+                self._enter_page(page_num, sport_type)
+                pdf = self._check_memory(pdf, file_path)
+                page = pdf.pages[page_num - 1]
+
+                try:
+                    if fingerprints is None:
+                        events, sport_type = self._parse_page(page, sport_type)
+                    else:
+                        # Страница с тем же текстом и видом спорта уже импортирована
+                        content = self._extract_page(page)
+                        page_hash = self._content_hash(content)
+                        previous = fingerprints.match_page(page_hash, sport_type)
+                        if previous:
+                            self.skipped_pages += 1
+                            fingerprints.record_page(page_num, page_hash, sport_type,
+                                                     previous.end_sport_type, previous.ekp_list)
+                            sport_type = previous.end_sport_type
+                            continue
+
+                        start_sport_type = sport_type
+                        events, sport_type = self._parse_page(page, sport_type, content)
+                        fingerprints.record_page(page_num, page_hash, start_sport_type, sport_type,
+                                                 [event_data['ekp_number'] for event_data in events])
+                finally:
+                    # pdfplumber хранит разметку каждой открытой страницы до закрытия документа
+                    page.close()
+
+                yield from events
+        finally:
+            pdf.close()
+
+    def _iter_events_parallel(self, file_path, start_page, sport_type, fingerprints):
+        with pdfplumber.open(file_path) as pdf:
+            self.total_pages = len(pdf.pages)
+        self.update_status(f"Всего страниц: {self.total_pages}", 0)
+
+        shards = [
+            (first, min(first + self.pages_per_shard - 1, self.total_pages))
+            for first in range(start_page, self.total_pages + 1, self.pages_per_shard)
+        ]
+
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(_parse_page_range, file_path, first, last, self.mode)
+                for first, last in shards
+            ]
+
+            # Результаты объединяются в порядке страниц. Мероприятия до первого
+            # заголовка в шарде получают вид спорта с конца предыдущего шарда.
+            # Параллельный режим разбирает все страницы, отпечатки только записываются.
+            for future in futures:
+                results, timings = future.result()
+                self.timings.merge(timings)
+                for page_num, page_hash, events, page_sport_type in results:
+                    self._enter_page(page_num, sport_type)
+                    start_sport_type = sport_type
+                    for event_data in events:
+                        if event_data['sport_type'] is None:
+                            event_data['sport_type'] = sport_type
+                        yield event_data
+                    if page_sport_type:
+                        sport_type = page_sport_type
+                    if fingerprints:
+                        fingerprints.record_page(page_num, page_hash, start_sport_type, sport_type,
+                                                 [event_data['ekp_number'] for event_data in events])
+
+    def iter_events(self, file_path, start_page=1, sport_type=None, fingerprints=None):
+        """Генератор данных мероприятий документа в порядке страниц без повторов EKP.
+
+        start_page и sport_type позволяют продолжить разбор с контрольной точки.
+        С fingerprints отпечатки страниц записываются, а неизменные страницы
+        пропускаются.
+        """
+        if self.workers > 1:
+            events = self._iter_events_parallel(file_path, start_page, sport_type, fingerprints)
+        else:
+            events = self._iter_events_serial(file_path, start_page, sport_type, fingerprints)
+
+        processed_ekp = set()
+        for event_data in events:
+            if event_data['ekp_number'] in processed_ekp:
+                continue
+            processed_ekp.add(event_data['ekp_number'])
+            yield event_data
+
+    def parse_pdf(self, file_path, start_page=1, sport_type=None, checkpoint_callback=None, filename=None):
+        """Основной метод парсинга PDF файла.
+
+        После каждой записанной пачки вызывается checkpoint_callback(pages_done, sport_type):
+        все страницы до pages_done сохранены, и разбор можно продолжить
+        со следующей страницы с указанным видом спорта.
+        """
+        logger.info(f"Starting to parse PDF: {file_path}")
+
+        ingestor = EventIngestor(batch_size=self.batch_size, on_conflict=self.on_conflict)
+
+        try:
+            fingerprints = None
+            if self.incremental:
+                fingerprints = DocumentFingerprints(file_path, filename)
+                if start_page == 1 and fingerprints.already_imported():
+                    self.document_id = fingerprints.document.id
+                    self.update_status("Документ уже импортирован, изменений нет", 100)
+                    return
+                fingerprints.begin(start_page)
+                self.document_id = fingerprints.document.id
+
+            batches = 0
+            save = self.timings.stage
+            for event_data in self.iter_events(file_path, start_page, sport_type, fingerprints):
+                with save('db_save'):
+                    added = ingestor.add(event_data)
+                if added:
+                    self.processed_events += 1
+                if checkpoint_callback and ingestor.batches != batches:
+                    batches = ingestor.batches
+                    checkpoint_callback(self.current_page - 1, self.page_start_sport_type)
+            with save('db_save'):
+                ingestor.flush()
+            self.written_events = ingestor.written
+
+            if fingerprints:
+                fingerprints.finish(self.total_pages)
+                self.removed_ekp_numbers = fingerprints.removed_ekp_numbers
+
+            if checkpoint_callback:
+                checkpoint_callback(self.total_pages, None)
 
             self.update_status(
-                f"Обработка завершена. Обработано {self.processed_events} событий",
+                f"Обработка завершена. Обработано {self.processed_events} событий, "
+                f"без изменений страниц: {self.skipped_pages}, "
+                f"удалено из календаря: {len(self.removed_ekp_numbers)}",
                 100
             )
 
@@ -283,6 +819,24 @@ class PDFParser:
             self.update_status(f"Ошибка обработки файла: {str(e)}", 0)
             raise
 
-        finally:
-            if pdf:
-                pdf.close()
\ No newline at end of file
+
+def _parse_page_range(file_path, first_page, last_page, mode=PDFParser.TEXT_MODE):
+    """Разбирает диапазон страниц в отдельном процессе.
+
+    Каждый воркер открывает файл сам. Вид спорта в начале диапазона неизвестен,
+    поэтому у мероприятий до первого заголовка sport_type остаётся None.
+    Возвращает результаты страниц и времена стадий шарда.
+    """
+    parser = PDFParser(mode=mode)
+    results = []
+    sport_type = None
+
+    with pdfplumber.open(file_path) as pdf:
+        for page_num in range(first_page, last_page + 1):
+            page = pdf.pages[page_num - 1]
+            content = parser._extract_page(page)
+            events, sport_type = parser._parse_page(page, sport_type, content)
+            page.close()
+            results.append((page_num, parser._content_hash(content), events, sport_type))
+
+    return results, parser.timings.as_dict()
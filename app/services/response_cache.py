@@ -0,0 +1,71 @@
+import hashlib
+import json
+import time
+from functools import wraps
+from flask import g, request, current_app, Response
+from app.services.dataset import dataset_version
+from app import cache
+
+
+def normalized_args():
+    """
+    Параметры запроса в стабильном порядке. Пустые значения остаются в ключе:
+    присутствие параметра меняет ответ (cursor= включает режим курсора)
+    """
+    return sorted(
+        (name, value) for name, values in request.args.lists()
+        for value in values
+    )
+
+
+def skip_response_cache():
+    """
+    Ответ текущего запроса не кэшируется и не получает ETag: он построен по
+    данным предыдущей версии (например, из снимка, который еще обновляется)
+    """
+    g.skip_response_cache = True
+
+
+def versioned_cache(timeout=None, time_dependent=False, vary=None):
+    """
+    Кэширует ответ представления по версии набора данных и параметрам запроса.
+
+    Ключ содержит версию, поэтому после импорта устаревший ответ не отдается.
+    Ответ получает ETag; совпавший If-None-Match дает 304. Для ответов,
+    зависящих от текущего времени (статус и дни до начала), в ключ добавляется
+    интервал времени длиной timeout. vary() возвращает дополнительную часть
+    ключа для ответов, зависящих не только от данных (например, избранное).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache_timeout = timeout or current_app.config['CACHE_DEFAULT_TIMEOUT']
+            parts = [request.path, dataset_version(), normalized_args()]
+            if time_dependent:
+                parts.append(int(time.time() // cache_timeout))
+            if vary:
+                parts.append(vary())
+
+            digest = hashlib.sha1(json.dumps(parts, ensure_ascii=False).encode()).hexdigest()
+            key = f'view:{digest}'
+
+            if request.if_none_match.contains(digest):
+                response = Response(status=304)
+                response.set_etag(digest)
+                return response
+
+            cached = cache.get(key)
+            if cached is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or g.pop('skip_response_cache', False):
+                    return response
+                cached = (response.get_data(), response.mimetype)
+                cache.set(key, cached, timeout=cache_timeout)
+
+            response = Response(cached[0], mimetype=cached[1])
+            response.set_etag(digest)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        return wrapper
+    return decorator
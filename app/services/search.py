@@ -0,0 +1,264 @@
+import re
+from sqlalchemy import column, false, select, table, text
+from app import db
+from app.models.dictionary import dictionaries
+from app.models.event import Event
+
+# Длины префиксов, для которых FTS5 хранит отдельные индексы (prefix='3 4 5 6')
+PREFIX_LENGTH = 6
+MAX_TERMS = 8
+
+# Таблица индекса без модели: ее создают DDL из models/search.py (колонки
+# обоих вариантов: FTS5 на SQLite, tsvector на PostgreSQL)
+event_search = table(
+    'event_search', column('rowid'), column('name'), column('sport'), column('discipline'), column('place'),
+    column('event_id'), column('document'),
+)
+
+_WORD_RE = re.compile(r'\w+')
+_CYRILLIC_RE = re.compile(r'^[а-я]+$')
+_VOWELS = frozenset('аеиоуыэюя')
+
+
+def _endings(*groups):
+    """
+    Окончания по убыванию длины. Окончания первой группы (after_a=True)
+    удаляются, только если перед ними стоит «а» или «я»
+    """
+    endings = [(suffix, after_a) for suffixes, after_a in groups for suffix in suffixes.split()]
+    return sorted(endings, key=lambda item: -len(item[0]))
+
+
+PERFECTIVE_GERUND = _endings(('в вши вшись', True), ('ив ивши ившись ыв ывши ывшись', False))
+ADJECTIVE = _endings((
+    'ее ие ые ое ими ыми ей ий ый ой ем им ым ом его ого ему ому их ых ую юю ая яя ою ею', False
+))
+PARTICIPLE = _endings(('ем нн вш ющ щ', True), ('ивш ывш ующ', False))
+REFLEXIVE = _endings(('ся сь', False))
+VERB = _endings(
+    ('ла на ете йте ли й л ем н ло но ет ют ны ть ешь нно', True),
+    ('ила ыла ена ейте уйте ите или ыли ей уй ил ыл им ым ен ило ыло ено ят ует уют ит ыт ены '
+     'ить ыть ишь ую ю', False),
+)
+SUPERLATIVE = _endings(('ейш ейше', False))
+NOUN = _endings((
+    'а ев ов ие ье е иями ями ами еи ии и ией ей ой ий й иям ям ием ем ам ом о у ах иях ях ы ь '
+    'ию ью ю ия ья я', False
+))
+
+
+def _strip_ending(word, endings):
+    """
+    Слово без самого длинного подходящего окончания или None. Как в Snowball,
+    при невыполненном условии более короткие окончания не проверяются
+    """
+    for suffix, after_a in endings:
+        if word.endswith(suffix):
+            stem = word[:len(word) - len(suffix)]
+            if after_a and not stem.endswith(('а', 'я')):
+                return None
+            return stem
+    return None
+
+
+def _regions(word):
+    """Начало областей RV и R2 алгоритма Snowball"""
+    rv = r1 = r2 = len(word)
+    for position, char in enumerate(word):
+        if char in _VOWELS:
+            rv = position + 1
+            break
+    for position in range(1, len(word)):
+        if word[position - 1] in _VOWELS and word[position] not in _VOWELS:
+            r1 = position + 1
+            break
+    for position in range(r1 + 1, len(word)):
+        if word[position - 1] in _VOWELS and word[position] not in _VOWELS:
+            r2 = position + 1
+            break
+    return rv, r2
+
+
+def stem(word):
+    """Основа русского слова по алгоритму Snowball (Porter) в нижнем регистре"""
+    word = word.lower().replace('ё', 'е')
+    rv_start, r2_start = _regions(word)
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    # Шаг 1: деепричастие, иначе возвратное окончание и прилагательное, глагол или существительное
+    stemmed = _strip_ending(rv, PERFECTIVE_GERUND)
+    if stemmed is None:
+        stemmed = _strip_ending(rv, REFLEXIVE)
+        if stemmed is not None:
+            rv = stemmed
+        stemmed = _strip_ending(rv, ADJECTIVE)
+        if stemmed is not None:
+            participle = _strip_ending(stemmed, PARTICIPLE)
+            stemmed = stemmed if participle is None else participle
+        else:
+            stemmed = _strip_ending(rv, VERB)
+            if stemmed is None:
+                stemmed = _strip_ending(rv, NOUN)
+    if stemmed is not None:
+        rv = stemmed
+
+    # Шаг 2
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательное окончание целиком в R2
+    r2 = max(r2_start - rv_start, 0)
+    for suffix in ('ость', 'ост'):
+        if rv.endswith(suffix):
+            if len(rv) - len(suffix) >= r2:
+                rv = rv[:-len(suffix)]
+            break
+
+    # Шаг 4: превосходная степень, двойное «н» или мягкий знак
+    superlative = _strip_ending(rv, SUPERLATIVE)
+    if superlative is not None:
+        rv = superlative[:-1] if superlative.endswith('нн') else superlative
+    elif rv.endswith('нн') or rv.endswith('ь'):
+        rv = rv[:-1]
+
+    return prefix + rv
+
+
+def search_terms(q):
+    """Основы слов запроса; слова не на кириллице остаются как есть в нижнем регистре"""
+    terms = []
+    for word in _WORD_RE.findall(q.lower().replace('ё', 'е'))[:MAX_TERMS]:
+        terms.append(stem(word) if _CYRILLIC_RE.match(word) else word)
+    return terms
+
+
+def valid_search_query(q):
+    """В запросе есть хотя бы одно слово"""
+    return bool(search_terms(q))
+
+
+def match_terms(q):
+    """
+    Слова запроса для поиска: [(основа, по префиксу)]. Основа обрезается до
+    PREFIX_LENGTH букв: для префиксов до этой длины у event_search есть готовые
+    индексы, и частое слово читается одним списком документов вместо слияния
+    списков всех слов с этим префиксом. Предлоги и сокращения короче 3 букв
+    («по», «г») отбрасываются, если в запросе есть слова длиннее; иначе
+    ищутся как слово целиком
+    """
+    terms = [term.replace('"', '') for term in search_terms(q)]
+    long_terms = [term[:PREFIX_LENGTH] for term in terms if len(term) >= 3]
+    if long_terms:
+        return [(term, True) for term in dict.fromkeys(long_terms)]
+    return [(term, False) for term in dict.fromkeys(terms) if term]
+
+
+def fts5_query(q, tags=()):
+    """
+    Запрос FTS5: все слова обязательны, каждое ищется по префиксу-основе, так
+    что «первенства» находит «ПЕРВЕНСТВО», а «россии» - «России» и «Российский».
+    tags - метки фильтров из колонки tags (search_tags)
+    """
+    parts = [f'"{term}"*' if prefix else f'"{term}"' for term, prefix in match_terms(q)]
+    parts.extend(f'tags : {tag}' for tag in tags)
+    return ' '.join(parts)
+
+
+def search_tags(args):
+    """
+    Метки фильтров вида спорта и региона для поиска в event_search или None,
+    если такого значения нет в справочнике (поиск ничего не найдет)
+    """
+    names = dictionaries()
+    tags = []
+    for field, arg, prefix in (('sport_type', 'sport_type', 's'), ('location_region', 'region', 'r')):
+        if args.get(arg):
+            value_id = names[field].id(args[arg])
+            if value_id is None:
+                return None
+            tags.append(f'{prefix}{value_id}')
+    return tags
+
+
+class EventSearch:
+    """
+    Поиск мероприятий по q с фильтрами /events (sport_type, region,
+    start_date, end_date).
+
+    Найдены мероприятия, в которых есть все слова запроса (в названии, виде
+    спорта, дисциплине или месте). Выдача упорядочена от последних
+    загруженных к ранним (по убыванию id), а не по релевантности: точный
+    порядок по оценке требует прохода по всем совпадениям, и для частых слов
+    вроде «россии» или «среди» (десятки и сотни тысяч строк) один такой проход
+    дольше бюджета запроса. В порядке id индекс отдает страницу, прочитав
+    только ее строки. Индекс event_search поддерживают триггеры на events
+    (models/search.py) при любой записи, в том числе при импорте PDF.
+    """
+
+    def __init__(self, q, args=None, filter_query=None):
+        self.q = q
+        self.args = args = args or {}
+        # Применяет к запросу фильтры /events по колонкам events
+        self.filter_query = filter_query
+        self.dialect = db.engine.dialect.name
+        self.tags = search_tags(args) if self.dialect == 'sqlite' else []
+        self.needs_join = any(args.get(name) for name in ('start_date', 'end_date')) or (
+            self.dialect != 'sqlite' and any(args.get(name) for name in ('sport_type', 'region'))
+        )
+
+    def _matches(self):
+        """Запрос id совпадений без сортировки и колонка id для условий"""
+        if not valid_search_query(self.q):
+            # Без слов (например, q из одних знаков) ничего не найдено; /events
+            # отвечает на такой q ошибкой, /facets и /events/export - пустой выборкой
+            key = Event.id
+            query = db.session.query(key.label('event_id')).filter(false())
+        elif self.dialect == 'sqlite':
+            key = event_search.c.rowid
+            query = db.session.query(key.label('event_id')).select_from(event_search).filter(
+                text('event_search MATCH :match').bindparams(match=fts5_query(self.q, self.tags))
+            )
+        elif self.dialect == 'postgresql':
+            key = event_search.c.event_id
+            query = db.session.query(key.label('event_id')).select_from(event_search).filter(
+                text("event_search.document @@ websearch_to_tsquery('russian', :q)").bindparams(q=self.q)
+            )
+        else:
+            key = Event.id
+            query = db.session.query(key.label('event_id')).filter(Event.name.ilike(f'%{self.q}%'))
+
+        if self.needs_join and key is not Event.id:
+            query = query.join(Event, Event.id == key)
+        if self.filter_query and (self.needs_join or key is Event.id):
+            query = self.filter_query(query, self.args)
+        return query, key
+
+    def _ids(self, upper=None, offset=0, limit=None):
+        """id совпадений меньше upper по убыванию, со смещением offset"""
+        if self.tags is None:
+            return []
+        query, key = self._matches()
+        if upper is not None:
+            query = query.filter(key < upper)
+        return [event_id for event_id, in query.order_by(key.desc()).offset(offset).limit(limit)]
+
+    def page(self, offset, limit):
+        """id результатов с позиции offset в порядке выдачи"""
+        return self._ids(offset=offset, limit=limit)
+
+    def after(self, cursor, limit):
+        """id результатов после курсора - id последней отданной строки"""
+        return self._ids(upper=cursor, limit=limit)
+
+    def count(self):
+        """Количество всех результатов"""
+        if self.tags is None:
+            return 0
+        query, _ = self._matches()
+        return query.order_by(None).count()
+
+
+def matching_ids(q):
+    """Запрос id всех мероприятий, найденных по q, для фильтра Event.id.in_()"""
+    query, _ = EventSearch(q)._matches()
+    return select(query.subquery().c.event_id)
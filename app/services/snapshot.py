@@ -0,0 +1,248 @@
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app
+from app.models.dictionary import dictionaries
+from app.models.event import Event
+from app.services.dataset import dataset_version
+from app.services.response_cache import skip_response_cache
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Строка снимка с теми же полями, что выбирает Event.serialized_columns()
+EventRow = namedtuple('EventRow', Event.ROW_COLUMNS)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _seconds(value):
+    return int((value - EPOCH).total_seconds())
+
+
+class EventSnapshot:
+    """
+    Неизменяемый снимок таблицы events в памяти процесса, по колонкам.
+
+    Строки упорядочены по (start_date, id), как выдача /events. Даты начала и
+    окончания хранятся массивами секунд, регион - массивом кодов, одинаковые
+    строки и даты - одним объектом. Для вида спорта и региона построены
+    отсортированные списки позиций, диапазон дат начала ищется делением
+    пополам. Для идущих событий позиции дополнительно упорядочены по дате
+    окончания.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.columns = {name: [] for name in Event.ROW_COLUMNS}
+        self.ids = array('q')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.by_end = array('i')
+        self.sorted_ends = array('q')
+        self.sports = []
+        self.regions = []
+        self.region_codes = array('i')
+        self.by_sport = {}
+        self.by_region = {}
+        self.region_index = {}
+
+    @classmethod
+    def build(cls, version, chunk_size=5000):
+        snapshot = cls(version)
+        shared = {}
+        region_index = snapshot.region_index
+        # Уникальные колонки не дедуплицируются
+        columns = [
+            (snapshot.columns[name], name not in ('id', 'ekp_number'))
+            for name in Event.ROW_COLUMNS
+        ]
+        sport_type_name = dictionaries()['sport_type'].name
+        region_name = dictionaries()['location_region'].name
+
+        query = db.session.query(*Event.serialized_columns()).order_by(Event.start_date, Event.id)
+        for position, row in enumerate(query.yield_per(chunk_size)):
+            for (column, deduplicate), value in zip(columns, row):
+                # Повторяющиеся значения (виды спорта, регионы, даты) хранятся один раз
+                column.append(shared.setdefault(value, value) if deduplicate else value)
+
+            snapshot.ids.append(row.id)
+            snapshot.starts.append(_seconds(row.start_date))
+            snapshot.ends.append(_seconds(row.end_date))
+
+            sport_type = sport_type_name(row.sport_type_id)
+            if sport_type not in snapshot.by_sport:
+                snapshot.sports.append(sport_type)
+                snapshot.by_sport[sport_type] = array('i')
+            snapshot.by_sport[sport_type].append(position)
+
+            region = -1
+            if row.location_region_id is not None:
+                location_region = region_name(row.location_region_id)
+                region = region_index.get(location_region)
+                if region is None:
+                    region = region_index[location_region] = len(snapshot.regions)
+                    snapshot.regions.append(location_region)
+                    snapshot.by_region[location_region] = array('i')
+                snapshot.by_region[location_region].append(position)
+            snapshot.region_codes.append(region)
+
+        # Позиции в порядке даты окончания для выборки идущих событий
+        snapshot.by_end = array('i', sorted(range(len(snapshot.ends)), key=snapshot.ends.__getitem__))
+        snapshot.sorted_ends = array('q', (snapshot.ends[position] for position in snapshot.by_end))
+        # Списки /sports и /regions - по названию, как used_dictionary_values
+        snapshot.sports.sort()
+        snapshot.regions.sort()
+        return snapshot
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, position):
+        return EventRow(*(column[position] for column in self.columns.values()))
+
+    def rows(self, positions):
+        return [self.row(position) for position in positions]
+
+    def upcoming(self, positions=None, now=None):
+        """
+        Позиции из positions (по умолчанию все строки), которые начинаются
+        после now, как статус upcoming в /facets
+        """
+        if positions is None:
+            positions = range(len(self.ids))
+        first = bisect_right(self.starts, _seconds(now or datetime.utcnow()))
+        return positions[bisect_left(positions, first):]
+
+    def ongoing(self, positions=None, now=None):
+        """
+        Позиции из positions (по умолчанию все строки), идущие в now:
+        start_date <= now <= end_date, как Event.get_ongoing_events
+        """
+        now = _seconds(now or datetime.utcnow())
+        if positions is None:
+            # Без фильтров - только строки, которые еще не закончились
+            starts = self.starts
+            first = bisect_left(self.sorted_ends, now)
+            return [position for position in self.by_end[first:] if starts[position] <= now]
+
+        # Отфильтрованные позиции упорядочены по дате начала: начавшиеся - префикс
+        ends = self.ends
+        started = positions[:bisect_left(positions, bisect_right(self.starts, now))]
+        return [position for position in started if ends[position] >= now]
+
+    def _after(self, cursor):
+        """Первая позиция строго после (start_date, id) курсора"""
+        start, event_id = _seconds(cursor[0]), cursor[1]
+        lo = bisect_left(self.starts, start)
+        hi = bisect_right(self.starts, start)
+        # Внутри одной даты начала строки упорядочены по id
+        return bisect_right(self.ids, event_id, lo, hi)
+
+    def positions(self, args, after=None):
+        """
+        Позиции строк под фильтрами /events (те же, что apply_event_filters)
+        в порядке (start_date, id); after - курсор (start_date, id)
+        """
+        sport_type = args.get('sport_type')
+        region = args.get('region')
+        start_date = args.get('start_date')
+        end_date = args.get('end_date')
+
+        lo, hi = 0, len(self.ids)
+        end_limit = None
+        if start_date:
+            lo = bisect_left(self.starts, _seconds(datetime.strptime(start_date, '%Y-%m-%d')))
+        if end_date:
+            end_limit = _seconds(datetime.strptime(end_date, '%Y-%m-%d'))
+            hi = bisect_right(self.starts, end_limit)
+        if after is not None:
+            lo = max(lo, self._after(after))
+
+        region_code = None
+        if sport_type:
+            candidates = self.by_sport.get(sport_type, ())
+            if region:
+                region_code = self.region_index.get(region, -2)
+        elif region:
+            candidates = self.by_region.get(region, ())
+        else:
+            candidates = range(len(self.ids))
+
+        first = bisect_left(candidates, lo)
+        last = bisect_left(candidates, hi)
+        if region_code is None and end_limit is None:
+            return candidates[first:last]
+
+        region_codes, ends = self.region_codes, self.ends
+        return [
+            position for position in candidates[first:last]
+            if (region_code is None or region_codes[position] == region_code)
+            and (end_limit is None or ends[position] <= end_limit)
+        ]
+
+
+class SnapshotStore:
+    """
+    Снимок текущей версии данных для процесса. Первый снимок строится в
+    запросе, и его ждут все. Когда версия меняется, новый снимок строится в
+    фоновом потоке, а запросы до замены отдают предыдущий: построение на 500
+    тысячах строк занимает секунды и не должно попадать в задержку запроса.
+    Такие ответы не попадают в кэш ответов новой версии. Замена - одно
+    присваивание ссылки. build(version) строит снимок с
+    атрибутом version и длиной.
+    """
+
+    def __init__(self, build=EventSnapshot.build, name='Events snapshot'):
+        self._build = build
+        self.name = name
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = dataset_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None or self._snapshot.version != version:
+                    self._rebuild(version)
+                return self._snapshot
+
+        self._refresh_in_background(version)
+        skip_response_cache()
+        return snapshot
+
+    def _rebuild(self, version):
+        started = time.perf_counter()
+        self._snapshot = self._build(version)
+        logger.info(
+            f"{self.name} v{version} built: {len(self._snapshot)} rows "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    def _refresh_in_background(self, version):
+        # Один поток на процесс; пока он строит, новые версии не запускают другой
+        if not self._lock.acquire(blocking=False):
+            return
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    self._rebuild(version)
+            except Exception as e:
+                logger.error(f"{self.name} v{version} build failed: {str(e)}")
+            finally:
+                self._lock.release()
+
+        threading.Thread(target=refresh, name=f'{self.name} refresh', daemon=True).start()
+
+
+event_snapshot = SnapshotStore()
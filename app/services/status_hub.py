@@ -0,0 +1,137 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class JobChannel:
+    """Канал статуса одного задания.
+
+    Хранит только последний снимок статуса и его версию: промежуточные
+    обновления, которые подписчик не успел забрать, схлопываются.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.latest = None
+        self.version = 0
+        self.finished = False
+        self.subscribers = 0
+        self.poller = None
+        self.condition = threading.Condition()
+
+    def publish(self, status, finished=False):
+        with self.condition:
+            if status == self.latest and finished == self.finished:
+                return
+            # Опрос базы может вернуть снимок старше уже опубликованного напрямую
+            if (not finished and self.latest is not None
+                    and status.get('current_page', 0) < self.latest.get('current_page', 0)):
+                return
+            self.latest = status
+            self.finished = finished
+            self.version += 1
+            self.condition.notify_all()
+
+
+class Subscription:
+    """Подписка одного клиента; буфер подписчика - один последний снимок"""
+
+    def __init__(self, hub, channel):
+        self.hub = hub
+        self.channel = channel
+        self.seen = 0
+
+    def next(self, timeout):
+        """Ждет новый статус не дольше timeout; возвращает None, если его не было"""
+        channel = self.channel
+        with channel.condition:
+            channel.condition.wait_for(lambda: channel.version > self.seen, timeout)
+            if channel.version == self.seen:
+                return None
+            self.seen = channel.version
+            return channel.latest
+
+    @property
+    def finished(self):
+        return self.channel.finished and self.seen == self.channel.version
+
+    def close(self):
+        self.hub._unsubscribe(self.channel)
+
+
+class StatusHub:
+    """Рассылка статусов импорта по заданиям.
+
+    Любое число вкладок может следить за одним заданием. Задания выполняются
+    воркерами в других процессах, поэтому на канал с подписчиками запускается
+    один опрос источника (loader) вместо опроса на каждого клиента. Задания,
+    выполняемые в этом же процессе, публикуют статус напрямую.
+    """
+
+    def __init__(self, poll_interval=0.5):
+        self.poll_interval = poll_interval
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.poll_interval = app.config['IMPORT_STATUS_INTERVAL']
+
+    def publish(self, job_id, status, finished=False):
+        """Публикует статус, если на задание кто-то подписан"""
+        channel = self._channels.get(job_id)
+        if channel:
+            channel.publish(status, finished)
+
+    def subscribe(self, job_id, loader):
+        """
+        Подписывается на задание. loader(job_id) возвращает (status, finished)
+        или None и используется для первого снимка и опроса.
+        Завершившееся задание сразу отдает свой итоговый статус.
+        """
+        with self._lock:
+            channel = self._channels.get(job_id)
+            if channel is None:
+                channel = self._channels[job_id] = JobChannel(job_id)
+            channel.subscribers += 1
+
+        if channel.latest is None:
+            self._poll_once(channel, loader)
+
+        with self._lock:
+            if not channel.finished and channel.poller is None:
+                channel.poller = threading.Thread(
+                    target=self._poll, args=(channel, loader), daemon=True
+                )
+                channel.poller.start()
+
+        return Subscription(self, channel)
+
+    def _unsubscribe(self, channel):
+        with self._lock:
+            channel.subscribers -= 1
+            if channel.subscribers <= 0 and self._channels.get(channel.job_id) is channel:
+                del self._channels[channel.job_id]
+
+    def _poll_once(self, channel, loader):
+        try:
+            result = loader(channel.job_id)
+        except Exception as e:
+            logger.error(f"Error loading status of job {channel.job_id}: {str(e)}")
+            return
+        if result is not None:
+            channel.publish(*result)
+
+    def _poll(self, channel, loader):
+        # Один опрос на задание, пока есть подписчики и задание не завершено
+        while True:
+            with self._lock:
+                if channel.subscribers <= 0 or channel.finished:
+                    channel.poller = None
+                    return
+            self._poll_once(channel, loader)
+            with channel.condition:
+                channel.condition.wait_for(lambda: channel.finished, self.poll_interval)
+
+
+status_hub = StatusHub()
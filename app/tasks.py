@@ -0,0 +1,35 @@
+# tasks.py
+import logging
+from celery.signals import worker_ready
+from app.celery_app import celery, _get_flask_app
+from app.services.imports import run_import_job, requeue_stale_jobs
+from app.services import notifications
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(name='app.tasks.import_pdf')
+def import_pdf(job_id):
+    """Импорт PDF календаря по заданию из таблицы import_jobs"""
+    run_import_job(job_id)
+
+
+@celery.task(name='app.tasks.check_upcoming_events')
+def check_upcoming_events():
+    """Уведомления о мероприятиях, впервые попавших в окно ближайших дней"""
+    return notifications.check_upcoming_events()
+
+
+@celery.task(name='app.tasks.send_notifications')
+def send_notifications():
+    """Отправка накопленных уведомлений"""
+    return notifications.send_notifications()
+
+
+@worker_ready.connect
+def requeue_on_startup(**kwargs):
+    # После перезапуска воркера продолжаем брошенные задания с контрольной точки
+    with _get_flask_app().app_context():
+        count = requeue_stale_jobs()
+    if count:
+        logger.warning(f"Requeued {count} stale import jobs")
@@ -0,0 +1,75 @@
+"""Микробенчмарк извлечения полей из текстов блоков мероприятий.
+
+По умолчанию использует корпус benchmarks/data/blocks.json; с --pdf блоки
+берутся из настоящего календаря.
+
+blocks.json - синтетический корпус: 12 блоков, составленных по образцу
+строк ЕКП (условные номера 2000000000001..., типичные сочетания дат, мест,
+возрастных групп и дисциплин), а не извлеченных из PDF Минспорта.
+Времена на нем показывают порядок величины и регрессии между версиями
+парсера; для цифр на реальных данных запускайте с --pdf.
+
+Запуск:
+    python benchmarks/bench_block_fields.py
+    python benchmarks/bench_block_fields.py --pdf calendar.pdf --max-us 50
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import pdfplumber  # noqa: E402
+from app.services.parser import PDFParser, BLOCK_SPLIT_RE, EKP_RE  # noqa: E402
+
+
+def load_blocks(pdf_path=None):
+    if not pdf_path:
+        with open(os.path.join(BENCH_DIR, 'data', 'blocks.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    blocks = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            blocks.extend(
+                block for block in BLOCK_SPLIT_RE.split(page.extract_text() or '')
+                if EKP_RE.search(block)
+            )
+    return blocks
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--pdf')
+    arg_parser.add_argument('--rounds', type=int, default=2000)
+    arg_parser.add_argument('--max-us', type=float, help='порог, мкс на блок; при превышении код выхода 1')
+    args = arg_parser.parse_args()
+
+    texts = [
+        " ".join(line.strip() for line in block.split('\n') if line.strip())
+        for block in load_blocks(args.pdf)
+    ]
+    rounds = max(1, args.rounds * 12 // len(texts))
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            PDFParser._extract_fields(text)
+            PDFParser._extract_discipline(text)
+    elapsed = time.perf_counter() - started
+
+    per_block = elapsed / (rounds * len(texts)) * 1e6
+    corpus = args.pdf or 'синтетический blocks.json'
+    print(f"Блоков в корпусе ({corpus}): {len(texts)}, проходов: {rounds}")
+    print(f"Извлечение полей: {per_block:.1f} мкс на блок")
+
+    if args.max_us and per_block > args.max_us:
+        print(f"РЕГРЕССИЯ: больше порога {args.max_us} мкс")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
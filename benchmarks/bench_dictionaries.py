@@ -0,0 +1,234 @@
+"""Размер таблицы events и задержка фильтров до и после справочников.
+
+Создает базу SQLite по миграциям до 0009 (вид спорта, регион, страна, тип,
+категория и дисциплина - строки в каждой строке events), заполняет ее
+синтетическими мероприятиями и измеряет размер таблицы, ее индексов и индекса
+полнотекстового поиска (dbstat после VACUUM) и время запросов /events с
+фильтрами по виду спорта и региону (сортировка по start_date, id и LIMIT, как
+в постраничной выдаче) и списков /sports и /regions (DISTINCT по таблице).
+Затем применяет миграцию 0010 и повторяет измерения для колонок <поле>_id теми
+же запросами, что строит приложение. Выборки до и после и поля мероприятий в API сверяются.
+
+Запуск:
+    python benchmarks/bench_dictionaries.py --rows 500000 --repeat 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from flask_migrate import upgrade  # noqa: E402
+from sqlalchemy import MetaData, Table, text  # noqa: E402
+from config import Config  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.dictionary import DICTIONARY_MODELS  # noqa: E402
+from app.models.event import Event  # noqa: E402
+from app.routes.main import apply_event_filters, used_dictionary_values  # noqa: E402
+from app.services.geo import gazetteer  # noqa: E402
+from check_query_plans import SPORTS  # noqa: E402
+
+MIGRATIONS_DIR = os.path.join(ROOT_DIR, 'migrations')
+EVENT_TYPES = ['Физкультурные', 'Спортивные']
+CATEGORIES = [
+    'ВСЕРОССИЙСКИЕ ФИЗКУЛЬТУРНЫЕ МЕРОПРИЯТИЯ',
+    'ЧЕМПИОНАТ РОССИИ',
+    'ПЕРВЕНСТВО РОССИИ',
+    'КУБОК РОССИИ',
+    'ВСЕРОССИЙСКИЕ СПОРТИВНЫЕ СОРЕВНОВАНИЯ',
+    'МЕЖДУНАРОДНЫЕ СПОРТИВНЫЕ СОРЕВНОВАНИЯ',
+]
+DISCIPLINES = [f'ДИСЦИПЛИНА {i} - ЛИЧНЫЕ СОРЕВНОВАНИЯ' for i in range(1500)]
+SAMPLE_SIZE = 200
+
+
+def seed(rows, batch_size=20000):
+    """Строки старой схемы: справочные поля записаны строками"""
+    events = Table('events', MetaData(), autoload_with=db.engine)
+    rng = random.Random(0)
+    places = gazetteer().places
+    base = datetime(2020, 1, 1)
+
+    for first in range(0, rows, batch_size):
+        batch = []
+        for number in range(first, min(first + batch_size, rows)):
+            start = base + timedelta(days=rng.randint(0, 365 * 6))
+            place = rng.choice(places)
+            batch.append({
+                'ekp_number': f'{number:013d}',
+                'name': 'ЧЕМПИОНАТ РОССИИ',
+                'event_type': rng.choice(EVENT_TYPES),
+                'category': rng.choice(CATEGORIES),
+                'sport_type': rng.choice(SPORTS),
+                'discipline': rng.choice(DISCIPLINES) if rng.random() < 0.7 else None,
+                'start_date': start,
+                'end_date': start + timedelta(days=rng.randint(0, 10)),
+                'location_country': 'РОССИЯ',
+                'location_region': place.region,
+                'location_city': place.city,
+                'latitude': place.latitude,
+                'longitude': place.longitude,
+            })
+        db.session.execute(events.insert(), batch)
+        db.session.commit()
+
+
+def vacuum():
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text('VACUUM'))
+        connection.execute(text('ANALYZE'))
+
+
+def sizes():
+    """Байты таблицы events, ее индексов, справочников, индекса поиска и всего файла базы"""
+    pages = dict(db.session.execute(text('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name')).all())
+    objects = db.session.execute(text("SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')")).all()
+    result = {'events': 0, 'events indexes': 0, 'dictionaries': 0, 'search index': 0}
+    for name, table in objects:
+        if table == 'events':
+            result['events' if name == 'events' else 'events indexes'] += pages.get(name, 0)
+        elif table.startswith('event_search'):
+            result['search index'] += pages.get(name, 0)
+        elif table != 'alembic_version':
+            result['dictionaries'] += pages.get(name, 0)
+    page_size = db.session.execute(text('PRAGMA page_size')).scalar()
+    result['file'] = db.session.execute(text('PRAGMA page_count')).scalar() * page_size
+    return result
+
+
+def make_filters(count):
+    rng = random.Random(1)
+    regions = sorted({place.region for place in gazetteer().places})
+    filters = {'sport_type': [], 'region': [], 'sport_type + region': []}
+    for _ in range(count):
+        filters['sport_type'].append({'sport_type': rng.choice(SPORTS)})
+        filters['region'].append({'region': rng.choice(regions)})
+        filters['sport_type + region'].append({'sport_type': rng.choice(SPORTS), 'region': rng.choice(regions)})
+    return filters
+
+
+def old_filter_query(events, args, per_page):
+    """Запрос /events по строковым колонкам, как до миграции"""
+    query = db.session.query(*(events.c[name] for name in Event.SERIALIZED_COLUMNS))
+    if args.get('sport_type'):
+        query = query.filter(events.c.sport_type == args['sport_type'])
+    if args.get('region'):
+        query = query.filter(events.c.location_region == args['region'])
+    return query.order_by(events.c.start_date, events.c.id).limit(per_page)
+
+
+def new_filter_query(_, args, per_page):
+    query = apply_event_filters(db.session.query(*Event.serialized_columns()), args)
+    return query.order_by(Event.start_date, Event.id).limit(per_page)
+
+
+def old_list_query(events, field):
+    """/sports и /regions до миграции: DISTINCT по таблице"""
+    return db.session.query(events.c[field]).filter(events.c[field].isnot(None)).distinct()
+
+
+def new_list_query(_, field):
+    return used_dictionary_values(field)
+
+
+def timed(queries, sort=False):
+    """
+    Время выполнения запросов в базе: SQL компилируется заранее и выполняется
+    напрямую через sqlite3, чтобы накладные расходы ORM не смешивались с
+    разницей между строковыми и целочисленными колонками
+    """
+    connection = db.session.connection().connection.driver_connection
+    times, results = [], []
+    for query in queries:
+        compiled = query.statement.compile(db.engine)
+        params = [compiled.params[name] for name in compiled.positiontup]
+        started = time.perf_counter()
+        rows = connection.execute(str(compiled), params).fetchall()
+        times.append(time.perf_counter() - started)
+        values = [row[0] for row in rows]
+        results.append(sorted(values) if sort else values)
+    times.sort()
+    return (statistics.median(times) * 1000, times[int(len(times) * 0.95)] * 1000), results
+
+
+def measure(filters, per_page, filter_query, list_query):
+    events = Table('events', MetaData(), autoload_with=db.engine)
+    timings, results = {}, {}
+    for label, arguments in filters.items():
+        timings[label], results[label] = timed(filter_query(events, args, per_page) for args in arguments)
+    for field, label in (('sport_type', '/sports'), ('location_region', '/regions')):
+        timings[label], results[label] = timed((list_query(events, field) for _ in range(20)), sort=True)
+    return timings, results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=500000)
+    arg_parser.add_argument('--repeat', type=int, default=200)
+    arg_parser.add_argument('--per-page', type=int, default=21)
+    args = arg_parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'dictionaries.db')
+        CACHE_TYPE = 'NullCache'
+
+    app = create_app(BenchConfig)
+    filters = make_filters(args.repeat)
+
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR, revision='0009_event_coordinates')
+        started = time.perf_counter()
+        seed(args.rows)
+        print(f"Строк: {args.rows}, заполнение {time.perf_counter() - started:.1f} с")
+        vacuum()
+
+        sample = db.session.execute(text(
+            f"SELECT ekp_number, {', '.join(DICTIONARY_MODELS)} FROM events "
+            f'ORDER BY random() LIMIT {SAMPLE_SIZE}'
+        )).mappings().all()
+        before_sizes = sizes()
+        before_timings, before_results = measure(filters, args.per_page, old_filter_query, old_list_query)
+
+        started = time.perf_counter()
+        upgrade(directory=MIGRATIONS_DIR, revision='head')
+        migration_seconds = time.perf_counter() - started
+        vacuum()
+        db.session.remove()
+
+        after_sizes = sizes()
+        after_timings, after_results = measure(filters, args.per_page, new_filter_query, new_list_query)
+
+        # Поля мероприятий в API остались строками и совпадают с исходными
+        mismatches = sum(before_results[label] != after_results[label] for label in before_results)
+        client = app.test_client()
+        for row in sample:
+            event = client.get('/events', query_string={
+                'sport_type': row['sport_type'], 'region': row['location_region'] or '', 'per_page': 100,
+            }).get_json()['events']
+            match = [item for item in event if item['ekp_number'] == row['ekp_number']]
+            stored = Event.query.filter_by(ekp_number=row['ekp_number']).one().to_dict()
+            mismatches += any(stored[field] != row[field] for field in DICTIONARY_MODELS)
+            mismatches += bool(match) and any(match[0][field] != row[field] for field in DICTIONARY_MODELS)
+
+    print(f"Миграция 0010 на {args.rows} строках: {migration_seconds:.1f} с\n")
+    print(f"{'Размер, МБ':<24}{'до':>10}{'после':>10}")
+    for name in before_sizes:
+        print(f"  {name:<22}{before_sizes[name] / 2 ** 20:10.1f}{after_sizes[name] / 2 ** 20:10.1f}")
+
+    print(f"\n{'Запрос, мс (медиана / p95)':<28}{'до':>16}{'после':>16}")
+    for label in before_timings:
+        print(f"  {label:<26}{'{:7.2f} / {:6.2f}'.format(*before_timings[label]):>16}"
+              f"{'{:7.2f} / {:6.2f}'.format(*after_timings[label]):>16}")
+    print(f"\nРасхождений в выборках и полях API: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""Время ответа /events?near=lat,lon&radius_km= на большой таблице.
+
+Заполняет базу синтетическими мероприятиями в городах справочника
+app/data/gazetteer.csv (столицы получают больше мероприятий, часть строк -
+без координат) и прогоняет запросы near с разными центрами, радиусами,
+фильтрами и курсором через тестовый клиент, кэш ответов отключен. Для
+сравнения тот же запрос выполняется в базе без пространственного индекса:
+прямоугольник вокруг круга по latitude/longitude, сортировка по
+(start_date, id) и LIMIT. Выдача индекса сверяется с полным перебором.
+
+Запуск:
+    python benchmarks/bench_geo.py --rows 500000 --requests 500
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+from config import Config  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.dictionary import dictionaries  # noqa: E402
+from app.models.event import Event  # noqa: E402
+from app.routes.main import dictionary_filter_id  # noqa: E402
+from app.services.geo import KM_PER_DEGREE, distance_km, gazetteer, geo_index  # noqa: E402
+from check_query_plans import SPORTS  # noqa: E402
+
+CENTERS = {
+    'Москва': (55.7558, 37.6173),
+    'Казань': (55.7963, 49.1088),
+    'Новосибирск': (55.0084, 82.9357),
+    'Сочи': (43.5855, 39.7231),
+    'Владивосток': (43.1155, 131.8855),
+}
+RADII = (10, 50, 150, 500, 1500)
+
+
+def seed(rows, batch_size=20000):
+    Event.query.delete()
+    rng = random.Random(0)
+    places = gazetteer().places
+    # Федеральные города и центры субъектов принимают больше соревнований
+    weights = [20 if place.region.startswith('Город ') else 3 if place.city in dict(CENTERS) else 1
+               for place in places]
+    base = datetime(2020, 1, 1)
+    names = dictionaries()
+
+    for first in range(0, rows, batch_size):
+        batch = []
+        for number in range(first, min(first + batch_size, rows)):
+            start = base + timedelta(days=rng.randint(0, 365 * 6))
+            place = rng.choices(places, weights)[0]
+            located = rng.random() >= 0.1
+            batch.append(names.encode({
+                **Event.DICTIONARY_DEFAULTS,
+                'ekp_number': f'{number:013d}',
+                'name': 'ЧЕМПИОНАТ РОССИИ',
+                'sport_type': rng.choice(SPORTS),
+                'start_date': start,
+                'end_date': start + timedelta(days=rng.randint(0, 10)),
+                'location_country': 'РОССИЯ',
+                'location_region': place.region,
+                'location_city': place.city if located else 'Поселок',
+                'latitude': place.latitude if located else None,
+                'longitude': place.longitude if located else None,
+            }))
+        db.session.execute(Event.__table__.insert(), batch)
+        db.session.commit()
+
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+
+def make_requests(count):
+    rng = random.Random(1)
+    requests = []
+    for _ in range(count):
+        latitude, longitude = rng.choice(list(CENTERS.values()))
+        args = {'near': f'{latitude},{longitude}', 'radius_km': rng.choice(RADII), 'per_page': 20, 'cursor': ''}
+        if rng.random() < 0.3:
+            args['sport_type'] = rng.choice(SPORTS)
+        if rng.random() < 0.3:
+            args['start_date'] = f'{rng.randint(2020, 2025)}-{rng.randint(1, 12):02d}-01'
+        requests.append(args)
+    return requests
+
+
+def sql_bbox(args):
+    """Тот же запрос без пространственного индекса: прямоугольник в базе, круг в Python"""
+    latitude, longitude = map(float, args['near'].split(','))
+    radius_km = float(args['radius_km'])
+    delta_lat = radius_km / KM_PER_DEGREE
+    delta_lon = radius_km / (KM_PER_DEGREE * math.cos(math.radians(min(abs(latitude) + delta_lat, 89.9))))
+    query = db.session.query(*Event.serialized_columns(), Event.latitude, Event.longitude).filter(
+        Event.latitude.between(latitude - delta_lat, latitude + delta_lat),
+        Event.longitude.between(longitude - delta_lon, longitude + delta_lon),
+    )
+    if args.get('sport_type'):
+        query = query.filter(Event.sport_type_id == dictionary_filter_id('sport_type', args['sport_type']))
+    if args.get('start_date'):
+        query = query.filter(Event.start_date >= datetime.strptime(args['start_date'], '%Y-%m-%d'))
+
+    result = []
+    for row in query.order_by(Event.start_date, Event.id).yield_per(1000):
+        if distance_km(latitude, longitude, row.latitude, row.longitude) <= radius_km:
+            result.append(row.id)
+            if len(result) >= args['per_page']:
+                break
+    return result
+
+
+def percentiles(times):
+    times = sorted(times)
+    return (statistics.median(times) * 1000, times[int(len(times) * 0.95)] * 1000, times[-1] * 1000)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=500000)
+    arg_parser.add_argument('--requests', type=int, default=500)
+    arg_parser.add_argument('--baseline-requests', type=int, default=50)
+    args = arg_parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'geo.db')
+        CACHE_TYPE = 'NullCache'
+
+    app = create_app(BenchConfig)
+    requests = make_requests(args.requests)
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        seed(args.rows)
+        print(f"Строк: {args.rows}, заполнение {time.perf_counter() - started:.1f} с")
+
+        started = time.perf_counter()
+        index = geo_index.get()
+        print(f"Индекс: {len(index)} мероприятий, {len(index.points)} точек, {len(index.cells)} ячеек, "
+              f"построение {time.perf_counter() - started:.2f} с")
+
+        client = app.test_client()
+        times, next_pages, mismatches = [], 0, 0
+        for request_args in requests:
+            started = time.perf_counter()
+            response = client.get('/events', query_string=request_args).get_json()
+            times.append(time.perf_counter() - started)
+
+            if response['next_cursor']:
+                # Вторая страница по курсору
+                started = time.perf_counter()
+                client.get('/events', query_string={**request_args, 'cursor': response['next_cursor']})
+                times.append(time.perf_counter() - started)
+                next_pages += 1
+
+        # Выдача индекса против полного перебора строк базы
+        rows = db.session.query(
+            Event.id, Event.start_date, Event.sport_type_id, Event.latitude, Event.longitude
+        ).filter(Event.latitude.isnot(None)).order_by(Event.start_date, Event.id).all()
+        for request_args in requests[:20]:
+            latitude, longitude = map(float, request_args['near'].split(','))
+            start = request_args.get('start_date')
+            expected = [
+                row.id for row in rows
+                if distance_km(latitude, longitude, row.latitude, row.longitude) <= request_args['radius_km']
+                and (not request_args.get('sport_type')
+                     or row.sport_type_id == dictionary_filter_id('sport_type', request_args['sport_type']))
+                and (not start or row.start_date >= datetime.strptime(start, '%Y-%m-%d'))
+            ][:request_args['per_page']]
+            actual = [event['id'] for event in client.get('/events', query_string=request_args).get_json()['events']]
+            mismatches += actual != expected
+
+        baseline = []
+        for request_args in requests[:args.baseline_requests]:
+            started = time.perf_counter()
+            sql_bbox(request_args)
+            baseline.append(time.perf_counter() - started)
+
+    print(f"\n/events?near (индекс), {len(times)} запросов, из них {next_pages} по курсору:")
+    print("  мс: медиана {:.2f}, p95 {:.2f}, максимум {:.2f}".format(*percentiles(times)))
+    print(f"Без индекса (прямоугольник в SQL), {len(baseline)} запросов:")
+    print("  мс: медиана {:.2f}, p95 {:.2f}, максимум {:.2f}".format(*percentiles(baseline)))
+    print(f"Расхождений с полным перебором: {mismatches} из 20")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Время проверки ближайших мероприятий и рассылки на большом числе подписчиков.
+
+Заполняет базу мероприятиями на ближайший месяц и подписками по видам спорта,
+регионам и мероприятиям, затем выполняет check_upcoming_events и
+send_notifications с FileSender во временный файл. Повторная проверка в тот
+же момент не должна создать новых уведомлений.
+
+Запуск:
+    python benchmarks/bench_notifications.py --subscribers 100000 --events 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.dictionary import dictionaries  # noqa: E402
+from app.models.event import Event  # noqa: E402
+from app.models.notification import NotificationSubscription  # noqa: E402
+from app.services.notifications import check_upcoming_events, send_notifications, FileSender  # noqa: E402
+
+SPORTS = [f'ВИД СПОРТА {i}' for i in range(150)]
+REGIONS = [f'Регион {i}' for i in range(89)]
+
+
+def seed(events, subscribers, now, batch_size=20000):
+    rng = random.Random(0)
+    names = dictionaries()
+    rows = []
+    for number in range(events):
+        start = now + timedelta(days=rng.randint(0, 30))
+        rows.append(names.encode({
+            **Event.DICTIONARY_DEFAULTS,
+            'ekp_number': f'{number:013d}',
+            'name': 'ЧЕМПИОНАТ РОССИИ',
+            'sport_type': rng.choice(SPORTS),
+            'start_date': start,
+            'end_date': start + timedelta(days=3),
+            'location_country': 'РОССИЯ',
+            'location_region': rng.choice(REGIONS),
+        }))
+    db.session.execute(Event.__table__.insert(), rows)
+
+    rows = []
+    for number in range(subscribers):
+        kind = rng.choice(NotificationSubscription.KINDS)
+        if kind == NotificationSubscription.SPORT:
+            value = rng.choice(SPORTS)
+        elif kind == NotificationSubscription.REGION:
+            value = rng.choice(REGIONS)
+        else:
+            value = str(rng.randint(1, events))
+        rows.append({'email': f'user{number}@example.com', 'kind': kind, 'value': value, 'created_at': now})
+        if len(rows) >= batch_size:
+            db.session.execute(NotificationSubscription.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(NotificationSubscription.__table__.insert(), rows)
+    db.session.commit()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--subscribers', type=int, default=100000)
+    arg_parser.add_argument('--events', type=int, default=5000)
+    args = arg_parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(work_dir, 'notifications.db')
+        NOTIFICATION_FILE = os.path.join(work_dir, 'outbox.jsonl')
+
+    app = create_app(BenchConfig)
+    now = datetime.utcnow()
+
+    with app.app_context():
+        db.create_all()
+        seed(args.events, args.subscribers, now)
+
+        started = time.perf_counter()
+        created = check_upcoming_events(now=now)
+        check_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        sent = send_notifications(sender=FileSender(app), now=now)
+        send_time = time.perf_counter() - started
+
+        repeated = check_upcoming_events(now=now)
+
+    print(f"Подписчиков: {args.subscribers}, мероприятий: {args.events}")
+    print(f"Проверка:  {check_time:8.2f} с, уведомлений {created}")
+    print(f"Рассылка:  {send_time:8.2f} с, писем {sent}")
+    if repeated:
+        print(f"ОШИБКА: повторная проверка создала {repeated} уведомлений")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
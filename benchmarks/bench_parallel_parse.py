@@ -0,0 +1,44 @@
+"""Сравнение последовательного и параллельного разбора PDF.
+
+Запуск:
+    python benchmarks/bench_parallel_parse.py calendar.pdf --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.parser import PDFParser  # noqa: E402
+
+
+def run(file_path, workers, pages_per_shard):
+    parser = PDFParser(workers=workers, pages_per_shard=pages_per_shard)
+    started = time.perf_counter()
+    events = list(parser.iter_events(file_path))
+    return time.perf_counter() - started, events, parser.total_pages
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('pdf')
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count())
+    arg_parser.add_argument('--pages-per-shard', type=int, default=25)
+    args = arg_parser.parse_args()
+
+    serial_time, serial_events, pages = run(args.pdf, 1, args.pages_per_shard)
+    parallel_time, parallel_events, _ = run(args.pdf, args.workers, args.pages_per_shard)
+
+    print(f"Страниц: {pages}, мероприятий: {len(serial_events)}")
+    print(f"Последовательно:          {serial_time:8.2f} с ({pages / serial_time:.1f} стр/с)")
+    print(f"Параллельно ({args.workers} процессов): {parallel_time:8.2f} с ({pages / parallel_time:.1f} стр/с)")
+    print(f"Ускорение: x{serial_time / parallel_time:.2f}")
+
+    if serial_events != parallel_events:
+        print("ОШИБКА: результаты параллельного разбора отличаются от последовательного")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
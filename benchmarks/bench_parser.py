@@ -0,0 +1,90 @@
+"""Бенчмарк PDFParser на синтетическом календаре.
+
+Генерирует календарь заданного размера и разбирает его parse_pdf во временную
+базу SQLite (с --no-db - только iter_events) в отдельном процессе. Выводит
+страницы и мероприятия в секунду, пиковый RSS процесса разбора и время
+по стадиям разбора.
+
+Запуск:
+    python benchmarks/bench_parser.py --pages 200 --events-per-page 15
+    python benchmarks/bench_parser.py --pdf calendar.pdf --workers 4
+    python benchmarks/bench_parser.py --mode table
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from synthetic_calendar import generate  # noqa: E402
+
+
+def run_parser(pdf_path, database_url, workers, mode):
+    """Разбирает документ в чистом процессе; возвращает (страниц, мероприятий, секунд, пиковый RSS в МБ, стадии)"""
+    sys.path.insert(0, ROOT_DIR)
+    from app.services.parser import PDFParser
+
+    parser = PDFParser(workers=workers, incremental=database_url is not None, mode=mode)
+    if database_url is None:
+        started = time.perf_counter()
+        events = sum(1 for _ in parser.iter_events(pdf_path))
+        elapsed = time.perf_counter() - started
+    else:
+        from config import Config
+        from app import create_app, db
+
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = database_url
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            parser.parse_pdf(pdf_path)
+            elapsed = time.perf_counter() - started
+        events = parser.processed_events
+
+    # ru_maxrss в КБ на Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+    return parser.total_pages, events, elapsed, peak, parser.timings.as_dict()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--pdf', help='готовый календарь вместо синтетического')
+    arg_parser.add_argument('--pages', type=int, default=200)
+    arg_parser.add_argument('--events-per-page', type=int, default=15)
+    arg_parser.add_argument('--workers', type=int, default=1)
+    arg_parser.add_argument('--no-db', action='store_true', help='только разбор, без записи в базу')
+    arg_parser.add_argument('--mode', choices=('text', 'table'), default='text')
+    args = arg_parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    pdf_path = args.pdf
+    if not pdf_path:
+        pdf_path = os.path.join(work_dir, 'calendar.pdf')
+        generate(pdf_path, args.pages, args.events_per_page)
+    database_url = None if args.no_db else 'sqlite:///' + os.path.join(work_dir, 'bench.db')
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        pages, events, elapsed, peak, timings = executor.submit(run_parser, pdf_path, database_url, args.workers, args.mode).result()
+
+    print(f"Страниц: {pages}, мероприятий: {events}, {'без базы' if args.no_db else 'parse_pdf в SQLite'}")
+    print(f"Время:      {elapsed:8.2f} с")
+    print(f"Страниц/с:  {pages / elapsed:8.1f}")
+    print(f"Событий/с:  {events / elapsed:8.1f}")
+    print(f"Пиковый RSS: {peak} МБ")
+    for name, values in sorted(timings.items(), key=lambda item: -item[1]['seconds']):
+        print(f"  {name:<14}{values['seconds']:8.2f} с  {values['calls']:8d} выз.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""Задержка полнотекстового поиска /events?q= на большой таблице.
+
+Заполняет базу синтетическими мероприятиями с названиями из словаря видов
+соревнований, возрастных групп и мемориалов, в городах PLACES (индекс
+event_search наполняют триггеры на events), и прогоняет запросы q с частыми
+и редкими словами, фильтрами и курсором через тестовый клиент, кэш ответов
+и total отключен. Для сравнения те же слова ищутся через LIKE '%...%' по
+названию, городу и справочникам.
+
+Выдача поиска не ранжируется по релевантности: это все мероприятия со всеми
+словами запроса от последних загруженных к ранним (по убыванию id). Выдача
+целиком (все страницы курсора) и страница постраничного режима сверяются с
+полным перебором основ слов в Python - тот же набор в том же порядке.
+
+Порог p95 проверяется для страниц выдачи без total. Точный total - отдельный
+подсчет всех совпадений (с фильтром по дате - пересечение с events); в
+приложении он кэшируется до изменения данных (filtered_events_total), здесь
+печатается без кэша отдельными группами.
+
+Запуск:
+    python benchmarks/bench_search.py --rows 500000 --requests 500
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import or_, text  # noqa: E402
+from config import Config  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.dictionary import Discipline, Region, SportType, dictionaries  # noqa: E402
+from app.models.event import Event  # noqa: E402
+from app.services.search import PREFIX_LENGTH, search_terms  # noqa: E402
+
+KINDS = ['ЧЕМПИОНАТ', 'ПЕРВЕНСТВО', 'КУБОК', 'ВСЕРОССИЙСКИЕ СОРЕВНОВАНИЯ', 'МЕЖДУНАРОДНЫЙ ТУРНИР',
+         'ФИНАЛ КУБКА', 'ЭТАП КУБКА', 'СПАРТАКИАДА', 'ФЕСТИВАЛЬ']
+SCOPES = ['РОССИИ', 'ЦЕНТРАЛЬНОГО ФЕДЕРАЛЬНОГО ОКРУГА', 'ПРИВОЛЖСКОГО ФЕДЕРАЛЬНОГО ОКРУГА',
+          'СИБИРСКОГО ФЕДЕРАЛЬНОГО ОКРУГА', 'ВООРУЖЕННЫХ СИЛ', 'СТУДЕНТОВ', 'ВЕТЕРАНОВ']
+GROUPS = ['', 'СРЕДИ ЮНИОРОВ', 'СРЕДИ ЮНОШЕЙ И ДЕВУШЕК', 'СРЕДИ ЖЕНЩИН', 'СРЕДИ МУЖЧИН', 'СРЕДИ ЛИЦ С ПОДА']
+SURNAMES = [f'{stem}{suffix}' for stem in (
+    'ИВАН', 'ПЕТР', 'СИДОР', 'КУЗНЕЦ', 'СМИРН', 'ПОПОВ', 'ВАСИЛЬЕВ', 'СОКОЛ', 'МИХАЙЛ', 'НОВИК',
+    'ФЕДОР', 'МОРОЗ', 'ВОЛК', 'АЛЕКСЕЕВ', 'ЛЕБЕДЕВ', 'СЕМЕН', 'ЕГОР', 'ПАВЛ', 'КОЗЛ', 'СТЕПАН',
+) for suffix in ('А', 'ИНА', 'СКОГО', 'ЕНКО')]
+SPORTS = ['ПЛАВАНИЕ', 'ЛЫЖНЫЕ ГОНКИ', 'ЛЕГКАЯ АТЛЕТИКА', 'БОКС', 'САМБО', 'ДЗЮДО', 'ФУТБОЛ', 'ХОККЕЙ',
+          'ВОЛЕЙБОЛ', 'БАСКЕТБОЛ', 'ТЕННИС', 'НАСТОЛЬНЫЙ ТЕННИС', 'ШАХМАТЫ', 'ГРЕБНОЙ СПОРТ', 'ПАРУСНЫЙ СПОРТ',
+          'СПОРТИВНАЯ ГИМНАСТИКА', 'ХУДОЖЕСТВЕННАЯ ГИМНАСТИКА', 'БИАТЛОН', 'КОНЬКОБЕЖНЫЙ СПОРТ', 'ФИГУРНОЕ КАТАНИЕ',
+          'СТРЕЛЬБА ИЗ ЛУКА', 'ПУЛЕВАЯ СТРЕЛЬБА', 'ВЕЛОСИПЕДНЫЙ СПОРТ', 'ТЯЖЕЛАЯ АТЛЕТИКА', 'ФЕХТОВАНИЕ',
+          'СПОРТИВНОЕ ОРИЕНТИРОВАНИЕ', 'АЛЬПИНИЗМ', 'КЕРЛИНГ', 'РЕГБИ', 'ТРИАТЛОН']
+# (регион, город, вес): города федерального значения встречаются чаще
+PLACES = [
+    ('Город Москва', 'Москва', 20), ('Город Санкт-Петербург', 'Санкт-Петербург', 20),
+    ('Город Севастополь', 'Севастополь', 20), ('Московская область', 'Подольск', 1),
+    ('Московская область', 'Химки', 1), ('Ленинградская область', 'Гатчина', 1),
+    ('Республика Татарстан', 'Казань', 1), ('Республика Татарстан', 'Набережные Челны', 1),
+    ('Республика Башкортостан', 'Уфа', 1), ('Краснодарский край', 'Краснодар', 1),
+    ('Краснодарский край', 'Сочи', 1), ('Краснодарский край', 'Новороссийск', 1),
+    ('Новосибирская область', 'Новосибирск', 1), ('Свердловская область', 'Екатеринбург', 1),
+    ('Нижегородская область', 'Нижний Новгород', 1), ('Самарская область', 'Самара', 1),
+    ('Самарская область', 'Тольятти', 1), ('Омская область', 'Омск', 1),
+    ('Челябинская область', 'Челябинск', 1), ('Челябинская область', 'Магнитогорск', 1),
+    ('Ростовская область', 'Ростов-на-Дону', 1), ('Пермский край', 'Пермь', 1),
+    ('Красноярский край', 'Красноярск', 1), ('Воронежская область', 'Воронеж', 1),
+    ('Волгоградская область', 'Волгоград', 1), ('Приморский край', 'Владивосток', 1),
+    ('Хабаровский край', 'Хабаровск', 1), ('Иркутская область', 'Иркутск', 1),
+    ('Тюменская область', 'Тюмень', 1), ('Ярославская область', 'Ярославль', 1),
+    ('Республика Карелия', 'Петрозаводск', 1), ('Мурманская область', 'Мурманск', 1),
+    ('Архангельская область', 'Архангельск', 1), ('Калининградская область', 'Калининград', 1),
+    ('Ставропольский край', 'Кисловодск', 1), ('Республика Дагестан', 'Махачкала', 1),
+    ('Алтайский край', 'Барнаул', 1), ('Кемеровская область', 'Новокузнецк', 1),
+    ('Томская область', 'Томск', 1), ('Республика Саха (Якутия)', 'Якутск', 1),
+]
+DISCIPLINES = ['ЭСТАФЕТА', 'СПРИНТ', 'МАРАФОН', 'КОМАНДНЫЕ СОРЕВНОВАНИЯ', 'ЛИЧНЫЕ СОРЕВНОВАНИЯ',
+               'ВОЛЬНЫЙ СТИЛЬ', 'КЛАССИЧЕСКИЙ СТИЛЬ', 'ПАРНЫЙ РАЗРЯД', 'МНОГОБОРЬЕ', 'ГОНКА ПРЕСЛЕДОВАНИЯ']
+
+# Частые (десятки процентов строк), средние и редкие слова
+QUERIES = [
+    'первенство россии', 'чемпионат', 'россии', 'кубок', 'соревнования среди юниоров',
+    'плавание', 'лыжные гонки', 'гимнастика', 'стрельба', 'эстафета', 'теннис',
+    'москва', 'казань', 'новосибирск', 'сочи', 'татарстан', 'краснодарский край',
+    'мемориал иванова', 'памяти смирнова', 'морозенко', 'спартакиада ветеранов', 'фестиваль студентов',
+    'чемпионат россии по боксу', 'кубок по футболу москва', 'первенства сибирского округа',
+]
+
+
+def seed(rows, batch_size=20000):
+    Event.query.delete()
+    rng = random.Random(0)
+    weights = [weight for _, _, weight in PLACES]
+    base = datetime(2020, 1, 1)
+    names = dictionaries()
+
+    for first in range(0, rows, batch_size):
+        batch = []
+        for number in range(first, min(first + batch_size, rows)):
+            start = base + timedelta(days=rng.randint(0, 365 * 6))
+            region, city, _ = rng.choices(PLACES, weights)[0]
+            name = f'{rng.choice(KINDS)} {rng.choice(SCOPES)} {rng.choice(GROUPS)}'
+            if rng.random() < 0.05:
+                name += f' МЕМОРИАЛ {rng.choice(SURNAMES)}' if rng.random() < 0.5 else f' ПАМЯТИ {rng.choice(SURNAMES)}'
+            batch.append(names.encode({
+                **Event.DICTIONARY_DEFAULTS,
+                'ekp_number': f'{number:013d}',
+                'name': ' '.join(name.split()),
+                'sport_type': rng.choice(SPORTS),
+                'discipline': rng.choice(DISCIPLINES) if rng.random() < 0.6 else None,
+                'start_date': start,
+                'end_date': start + timedelta(days=rng.randint(0, 10)),
+                'location_country': 'РОССИЯ',
+                'location_region': region,
+                'location_city': city,
+            }))
+        db.session.execute(Event.__table__.insert(), batch)
+        db.session.commit()
+
+    db.session.execute(text("INSERT INTO event_search (event_search) VALUES ('optimize')"))
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+
+def make_requests(count):
+    """
+    Запросы как у страницы index.html: первая страница с total, дальше страницы
+    курсора без total; часть запросов - постраничный режим page (всегда с total)
+    """
+    rng = random.Random(1)
+    requests = []
+    for _ in range(count):
+        args = {'q': rng.choice(QUERIES), 'per_page': 20}
+        mode = rng.random()
+        if mode < 0.6:
+            args['cursor'] = ''
+        elif mode < 0.8:
+            args.update(cursor='', with_total=1)
+        else:
+            args['page'] = rng.randint(1, 5)
+        if rng.random() < 0.2:
+            args['sport_type'] = rng.choice(SPORTS)
+        if rng.random() < 0.2:
+            args['start_date'] = f'{rng.randint(2020, 2025)}-{rng.randint(1, 12):02d}-01'
+        requests.append(args)
+    return requests
+
+
+def request_group(args):
+    """Группа запроса в отчете: total с фильтром по дате считается отдельно"""
+    if 'page' not in args and not args.get('with_total'):
+        return 'страница без total'
+    if args.get('start_date'):
+        return 'с total и фильтром по дате'
+    return 'с total'
+
+
+def like_search(args):
+    """Тот же поиск без текстового индекса: LIKE по каждому слову, сортировка по дате"""
+    query = db.session.query(*Event.serialized_columns()).outerjoin(
+        SportType, SportType.id == Event.sport_type_id
+    ).outerjoin(Discipline, Discipline.id == Event.discipline_id).outerjoin(
+        Region, Region.id == Event.location_region_id
+    )
+    for term in search_terms(args['q']):
+        if len(term) < 3:
+            continue
+        pattern = f'%{term}%'
+        query = query.filter(or_(
+            Event.name.ilike(pattern), SportType.name.ilike(pattern), Discipline.name.ilike(pattern),
+            Event.location_city.ilike(pattern), Region.name.ilike(pattern),
+        ))
+    return query.order_by(Event.start_date, Event.id).limit(args['per_page']).all()
+
+
+def expected_ids(q, documents):
+    """
+    id мероприятий в порядке выдачи: в документе каждое слово запроса
+    начинается с основы, обрезанной до PREFIX_LENGTH букв, как в fts5_query;
+    от больших id к меньшим
+    """
+    terms = [term[:PREFIX_LENGTH] for term in search_terms(q) if len(term) >= 3]
+    return sorted((
+        event_id for event_id, words in documents
+        if all(any(word.startswith(term) for word in words) for term in terms)
+    ), reverse=True)
+
+
+def percentiles(times):
+    times = sorted(times)
+    return (statistics.median(times) * 1000, times[int(len(times) * 0.95)] * 1000, times[-1] * 1000)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=500000)
+    arg_parser.add_argument('--requests', type=int, default=500)
+    arg_parser.add_argument('--baseline-requests', type=int, default=30)
+    arg_parser.add_argument('--target-ms', type=float, default=20.0, help='порог p95 страниц без total')
+    args = arg_parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'search.db')
+        CACHE_TYPE = 'NullCache'
+
+    app = create_app(BenchConfig)
+    requests = make_requests(args.requests)
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        seed(args.rows)
+        print(f"Строк: {args.rows}, заполнение с индексом {time.perf_counter() - started:.1f} с")
+
+        client = app.test_client()
+        client.get('/events', query_string={'q': QUERIES[0]})
+        groups, by_query = {}, {}
+        for request_args in requests:
+            started = time.perf_counter()
+            response = client.get('/events', query_string=request_args)
+            elapsed = time.perf_counter() - started
+            assert response.status_code == 200, response.get_json()
+            groups.setdefault(request_group(request_args), []).append(elapsed)
+            by_query.setdefault(request_args['q'], []).append(elapsed)
+
+        # Найденные мероприятия против перебора всех документов
+        names = dictionaries()
+        documents = []
+        for row in db.session.query(
+            Event.id, Event.name, Event.sport_type_id, Event.discipline_id, Event.location_city,
+            Event.location_region_id
+        ).yield_per(10000):
+            document = ' '.join(filter(None, (
+                row.name, names['sport_type'].name(row.sport_type_id), names['discipline'].name(row.discipline_id),
+                row.location_city, names['location_region'].name(row.location_region_id),
+            )))
+            documents.append((row.id, re.findall(r'\w+', document.lower().replace('ё', 'е'))))
+
+        mismatches = 0
+        for q in QUERIES:
+            expected = expected_ids(q, documents)
+            found = []
+            cursor = ''
+            while cursor is not None:
+                page = client.get('/events', query_string={'q': q, 'per_page': 100, 'cursor': cursor}).get_json()
+                found.extend(event['id'] for event in page['events'])
+                cursor = page['next_cursor']
+            page = client.get('/events', query_string={'q': q, 'per_page': 20, 'page': 3}).get_json()
+            mismatches += found != expected or [event['id'] for event in page['events']] != expected[40:60]
+
+        baseline = []
+        for request_args in requests[:args.baseline_requests]:
+            started = time.perf_counter()
+            like_search(request_args)
+            baseline.append(time.perf_counter() - started)
+
+    times = [elapsed for group in groups.values() for elapsed in group]
+    print(f"\n/events?q= (FTS5), {len(times)} запросов, мс (медиана / p95 / максимум):")
+    print("  {:<30}{:7.2f} /{:7.2f} /{:7.2f}".format('все', *percentiles(times)))
+    for label, group_times in groups.items():
+        print("  {:<30}{:7.2f} /{:7.2f} /{:7.2f}  ({} запросов)".format(
+            label, *percentiles(group_times), len(group_times)
+        ))
+    print("  самые медленные запросы (p95, мс):")
+    slowest = sorted(by_query.items(), key=lambda item: -percentiles(item[1])[1])[:5]
+    for q, query_times in slowest:
+        print(f"    {q:<40} {percentiles(query_times)[1]:7.2f}")
+    print(f"LIKE по названию, месту и справочникам, {len(baseline)} запросов:")
+    print("  мс: медиана {:.2f}, p95 {:.2f}, максимум {:.2f}".format(*percentiles(baseline)))
+    print(f"Расхождений с полным перебором: {mismatches} из {len(QUERIES)}")
+
+    if mismatches or percentiles(groups['страница без total'])[1] > args.target_ms:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Пропускная способность /events, /facets, /sports и /regions: снимок в памяти против SQLAlchemy.
+
+Заполняет базу синтетическими мероприятиями и прогоняет одинаковый набор
+запросов через тестовый клиент в обоих режимах (EVENTS_SNAPSHOT выключен и
+включен), кэш ответов отключен. Ответы обоих режимов сравниваются. В /facets
+от режима зависят только статусы времени.
+
+Запуск:
+    python benchmarks/bench_snapshot.py --rows 100000 --requests 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.services.snapshot import event_snapshot  # noqa: E402
+from check_query_plans import seed, SPORTS, REGIONS  # noqa: E402
+
+
+def make_requests(count):
+    rng = random.Random(1)
+    requests = []
+    for _ in range(count):
+        args = {'per_page': 10, 'cursor': ''}
+        if rng.random() < 0.5:
+            args['sport_type'] = rng.choice(SPORTS)
+        if rng.random() < 0.3:
+            args['region'] = rng.choice(REGIONS)
+        if rng.random() < 0.5:
+            month = rng.randint(1, 12)
+            args['start_date'] = f'{rng.randint(2020, 2025)}-{month:02d}-01'
+        if rng.random() < 0.2:
+            args['with_total'] = 1
+        requests.append(('/events', args))
+        if rng.random() < 0.1:
+            filters = {name: value for name, value in args.items() if name in ('sport_type', 'region', 'start_date')}
+            requests.append(('/facets', filters))
+        if rng.random() < 0.1:
+            requests.append((rng.choice(['/sports', '/regions']), {}))
+    return requests
+
+
+def run(client, requests):
+    responses = []
+    started = time.perf_counter()
+    for path, args in requests:
+        responses.append(client.get(path, query_string=args).get_json())
+    return time.perf_counter() - started, responses
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=100000)
+    arg_parser.add_argument('--requests', type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'snapshot.db')
+        CACHE_TYPE = 'NullCache'
+
+    app = create_app(BenchConfig)
+    requests = make_requests(args.requests)
+
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+        client = app.test_client()
+
+        app.config['EVENTS_SNAPSHOT'] = False
+        db_time, db_responses = run(client, requests)
+
+        app.config['EVENTS_SNAPSHOT'] = True
+        started = time.perf_counter()
+        event_snapshot.get()
+        build_time = time.perf_counter() - started
+        snapshot_time, snapshot_responses = run(client, requests)
+
+    print(f"Строк: {args.rows}, запросов: {len(requests)}")
+    print(f"SQLAlchemy: {db_time:8.2f} с ({len(requests) / db_time:8.0f} запр/с)")
+    print(f"Снимок:     {snapshot_time:8.2f} с ({len(requests) / snapshot_time:8.0f} запр/с), "
+          f"построение {build_time:.2f} с")
+    print(f"Ускорение: x{db_time / snapshot_time:.1f}")
+
+    if db_responses != snapshot_responses:
+        print("ОШИБКА: ответы снимка отличаются от ответов базы")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""Время запуска и память веб-воркеров.
+
+Холодный старт: новый процесс интерпретатора создает приложение и отвечает
+на первый GET /events; время считается от запуска процесса. Режим eager
+повторяет прежний запуск (PDF-стек импортируется вместе с маршрутами,
+db.create_all при каждом create_app), режим lazy - текущий.
+
+Память воркеров: мастер запускает --workers дочерних процессов через fork, как
+gunicorn. С preload приложение создается в мастере до fork (gc.freeze, как в
+gunicorn.conf.py), без preload - в каждом воркере. Каждый воркер отвечает на
+несколько запросов, затем у всех одновременно снимаются RSS, PSS (общие
+страницы поделены между процессами) и частная память из
+/proc/<pid>/smaps_rollup.
+
+Запуск:
+    python benchmarks/bench_startup.py --workers 4
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+REQUESTS = ['/events', '/events?per_page=20&cursor=', '/sports', '/regions', '/facets']
+
+
+def make_app(database_url, eager):
+    if eager:
+        import app.services.parser  # noqa: F401
+
+    from config import Config
+    from app import create_app
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        AUTO_CREATE_TABLES = eager
+
+    return create_app(BenchConfig)
+
+
+def smaps_rollup(pid):
+    """Rss, Pss и частная память процесса в МБ"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                values[name] = int(rest.split()[0]) / 1024
+    return {
+        'rss': values['Rss'],
+        'pss': values['Pss'],
+        'private': values['Private_Clean'] + values['Private_Dirty'],
+    }
+
+
+def cold_start_child(database_url, eager):
+    app = make_app(database_url, eager)
+    response = app.test_client().get('/events')
+    assert response.status_code == 200, response.status_code
+    print(json.dumps({
+        'rss': smaps_rollup('self')['rss'],
+        'pdf_loaded': 'pdfplumber' in sys.modules,
+    }), flush=True)
+
+
+def cold_start(database_url, eager, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, __file__, '--cold-child', database_url] + (['--eager'] if eager else []),
+            check=True, capture_output=True, text=True
+        ).stdout
+        times.append(time.perf_counter() - started)
+        result = json.loads(output.strip().splitlines()[-1])
+    result['seconds'] = statistics.median(times)
+    return result
+
+
+def fork_workers_child(database_url, workers, preload):
+    app = make_app(database_url, False) if preload else None
+    if preload:
+        gc.collect()
+        gc.freeze()
+
+    pids = []
+    ready_read, ready_write = os.pipe()
+    go_read, go_write = os.pipe()
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            os.close(go_write)
+            worker_app = app or make_app(database_url, False)
+            client = worker_app.test_client()
+            for path in REQUESTS:
+                client.get(path)
+            os.write(ready_write, b'1')
+            os.read(go_read, 1)  # ждем, пока мастер снимет память всех воркеров
+            os._exit(0)
+        pids.append(pid)
+
+    os.close(ready_write)
+    os.close(go_read)
+    for _ in range(workers):
+        os.read(ready_read, 1)
+
+    stats = [smaps_rollup(pid) for pid in pids]
+    master = smaps_rollup('self')
+    os.close(go_write)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    print(json.dumps({'workers': stats, 'master': master}), flush=True)
+
+
+def fork_workers(database_url, workers, preload):
+    output = subprocess.run(
+        [sys.executable, __file__, '--fork-child', database_url, '--workers', str(workers)]
+        + (['--preload'] if preload else []),
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def prepare_database():
+    database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'startup.db')
+    app = make_app(database_url, False)
+
+    from app import db
+    from check_query_plans import seed
+    with app.app_context():
+        db.create_all()
+        seed(2000)
+    return database_url
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--workers', type=int, default=4)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--cold-child')
+    arg_parser.add_argument('--fork-child')
+    arg_parser.add_argument('--eager', action='store_true')
+    arg_parser.add_argument('--preload', action='store_true')
+    args = arg_parser.parse_args()
+
+    if args.cold_child:
+        return cold_start_child(args.cold_child, args.eager)
+    if args.fork_child:
+        return fork_workers_child(args.fork_child, args.workers, args.preload)
+
+    database_url = prepare_database()
+
+    print("Холодный старт до первого ответа /events (медиана):")
+    for eager in (True, False):
+        result = cold_start(database_url, eager, args.repeat)
+        print(f"  {'eager' if eager else 'lazy':<6} {result['seconds'] * 1000:7.0f} мс, RSS {result['rss']:6.1f} МБ, "
+              f"pdfplumber {'загружен' if result['pdf_loaded'] else 'не загружен'}")
+
+    print(f"\nПамять {args.workers} воркеров после {len(REQUESTS)} запросов, МБ на воркер (среднее):")
+    for preload in (False, True):
+        result = fork_workers(database_url, args.workers, preload)
+        workers = result['workers']
+        rss = statistics.mean(worker['rss'] for worker in workers)
+        pss = statistics.mean(worker['pss'] for worker in workers)
+        private = statistics.mean(worker['private'] for worker in workers)
+        total = sum(worker['pss'] for worker in workers) + result['master']['pss']
+        print(f"  {'preload' if preload else 'без preload':<12} RSS {rss:6.1f}  PSS {pss:6.1f}  "
+              f"частная {private:6.1f}  всего с мастером (PSS) {total:6.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Регрессионная проверка PDFParser на эталонных синтетических календарях.
+
+Для каждого набора из GOLDEN_CORPUS генерирует календарь (детерминированно,
+по seed), разбирает его PDFParser.iter_events без базы и сравнивает
+мероприятия с эталоном benchmarks/data/golden/<name>.json. Различия выводятся
+по номерам ЕКП и полям, код выхода 1. После намеренного изменения разбора
+эталоны обновляются флагом --update. Режим table сверяется со своими
+эталонами <name>.table.json.
+
+Запуск:
+    python benchmarks/check_golden.py
+    python benchmarks/check_golden.py --mode table
+    python benchmarks/check_golden.py --update
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from synthetic_calendar import generate  # noqa: E402
+from app.services.parser import PDFParser  # noqa: E402
+
+GOLDEN_DIR = os.path.join(BENCH_DIR, 'data', 'golden')
+
+# Имя эталона: (страниц, мероприятий на странице, seed, пропущенные номера)
+GOLDEN_CORPUS = {
+    'calendar_small': (3, 10, 1, ()),
+    'calendar_dense': (4, 20, 2, ()),
+    'calendar_gaps': (3, 15, 3, (5, 16, 17, 40)),
+}
+
+
+def extract(pdf_path, mode=PDFParser.TEXT_MODE):
+    events = []
+    for event_data in PDFParser(incremental=False, mode=mode).iter_events(pdf_path):
+        events.append({
+            name: value.strftime('%Y-%m-%d') if isinstance(value, datetime) else value
+            for name, value in sorted(event_data.items())
+        })
+    return events
+
+
+def diff(expected, actual):
+    """Различия по номерам ЕКП: пропавшие, лишние и измененные поля"""
+    expected_by_ekp = {event['ekp_number']: event for event in expected}
+    actual_by_ekp = {event['ekp_number']: event for event in actual}
+    lines = []
+
+    for ekp_number in sorted(expected_by_ekp.keys() - actual_by_ekp.keys()):
+        lines.append(f"  - {ekp_number}: нет в результате")
+    for ekp_number in sorted(actual_by_ekp.keys() - expected_by_ekp.keys()):
+        lines.append(f"  + {ekp_number}: нет в эталоне")
+    for ekp_number in sorted(expected_by_ekp.keys() & actual_by_ekp.keys()):
+        old, new = expected_by_ekp[ekp_number], actual_by_ekp[ekp_number]
+        for name in sorted(old.keys() | new.keys()):
+            if old.get(name) != new.get(name):
+                lines.append(f"  ~ {ekp_number}.{name}: {old.get(name)!r} -> {new.get(name)!r}")
+
+    if not lines and [e['ekp_number'] for e in expected] != [e['ekp_number'] for e in actual]:
+        lines.append("  порядок мероприятий отличается")
+    return lines
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--update', action='store_true', help='перезаписать эталоны')
+    arg_parser.add_argument('--mode', choices=PDFParser.MODES, default=PDFParser.TEXT_MODE)
+    args = arg_parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    failed = 0
+
+    for name, (pages, per_page, seed, skip) in GOLDEN_CORPUS.items():
+        pdf_path = os.path.join(work_dir, f'{name}.pdf')
+        generate(pdf_path, pages, per_page, seed=seed, skip=skip)
+        actual = extract(pdf_path, args.mode)
+        suffix = '' if args.mode == PDFParser.TEXT_MODE else f'.{args.mode}'
+        golden_path = os.path.join(GOLDEN_DIR, f'{name}{suffix}.json')
+
+        if args.update:
+            with open(golden_path, 'w', encoding='utf-8') as f:
+                json.dump(actual, f, ensure_ascii=False, indent=1)
+                f.write('\n')
+            print(f"{name}: эталон обновлен ({len(actual)} мероприятий)")
+            continue
+
+        with open(golden_path, encoding='utf-8') as f:
+            expected = json.load(f)
+
+        lines = diff(expected, actual)
+        if lines:
+            failed += 1
+            print(f"{name}: {len(lines)} различий")
+            print('\n'.join(lines))
+        else:
+            print(f"{name}: ok ({len(actual)} мероприятий)")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Проверка, что пиковая память разбора не растет с числом страниц.
+
+Генерирует синтетические календари нескольких размеров и разбирает каждый
+через parse_pdf в отдельном процессе с временной базой SQLite. Если пиковый
+RSS самого большого документа превышает пиковый RSS самого маленького больше
+чем на --tolerance-mb, код выхода 1.
+
+Запуск:
+    python benchmarks/check_parse_memory.py --pages 50 200 800
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from synthetic_calendar import generate  # noqa: E402
+
+
+def parse_and_measure(pdf_path, database_url, max_rss_mb):
+    """Разбирает документ в чистом процессе; возвращает (мероприятий, пиковый RSS в МБ)"""
+    sys.path.insert(0, ROOT_DIR)
+    from config import Config
+    from app import create_app, db
+    from app.services.parser import PDFParser
+
+    class CheckConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+
+    app = create_app(CheckConfig)
+    with app.app_context():
+        db.create_all()
+        parser = PDFParser(max_rss_mb=max_rss_mb)
+        parser.parse_pdf(pdf_path)
+
+    # ru_maxrss в КБ на Linux
+    return parser.processed_events, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--pages', type=int, nargs='+', default=[50, 200, 800])
+    arg_parser.add_argument('--events-per-page', type=int, default=15)
+    arg_parser.add_argument('--tolerance-mb', type=int, default=40)
+    arg_parser.add_argument('--max-rss-mb', type=int, default=0, help='потолок памяти парсера')
+    args = arg_parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    context = multiprocessing.get_context('spawn')
+    peaks = []
+
+    for pages in sorted(args.pages):
+        pdf_path = os.path.join(work_dir, f'calendar_{pages}.pdf')
+        generate(pdf_path, pages, args.events_per_page)
+        database_url = 'sqlite:///' + os.path.join(work_dir, f'memory_{pages}.db')
+
+        # Новый процесс на каждый размер, чтобы пики не накладывались
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            events, peak = executor.submit(parse_and_measure, pdf_path, database_url, args.max_rss_mb).result()
+        peaks.append(peak)
+        print(f"{pages:6} страниц, {events:7} мероприятий: пиковый RSS {peak} МБ")
+
+    growth = peaks[-1] - peaks[0]
+    print(f"Рост пиковой памяти: {growth} МБ (допуск {args.tolerance_mb} МБ)")
+    if growth > args.tolerance_mb:
+        print("ОШИБКА: память разбора растет с числом страниц")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""Проверка планов запросов к таблице events на полное сканирование.
+
+Заполняет базу синтетическими мероприятиями и для каждой комбинации фильтров
+/events, выборок ближайших и текущих событий и /sports и /regions
+получает план (EXPLAIN QUERY PLAN на SQLite, EXPLAIN на PostgreSQL). Если хотя
+бы один запрос читает таблицу полным сканированием, код выхода 1.
+
+Запуск:
+    python benchmarks/check_query_plans.py --rows 500000
+    python benchmarks/check_query_plans.py --database postgresql://localhost/bench
+"""
+import argparse
+import itertools
+import os
+import random
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, func, text, tuple_  # noqa: E402
+from config import Config  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.dictionary import dictionaries  # noqa: E402
+from app.models.event import Event  # noqa: E402
+from app.routes.main import apply_event_filters, used_dictionary_values  # noqa: E402
+
+SPORTS = [f'ВИД СПОРТА {i}' for i in range(150)]
+REGIONS = [f'Регион {i}' for i in range(89)]
+
+# SQLite: "SCAN events" без индекса; PostgreSQL: "Seq Scan on events"
+FULL_SCAN_RE = re.compile(r'^SCAN events(?! USING (COVERING )?INDEX)|Seq Scan on events')
+
+
+def seed(rows, batch_size=20000):
+    Event.query.delete()
+    rng = random.Random(0)
+    base = datetime(2020, 1, 1)
+    names = dictionaries()
+
+    for first in range(0, rows, batch_size):
+        batch = []
+        for number in range(first, min(first + batch_size, rows)):
+            start = base + timedelta(days=rng.randint(0, 365 * 6))
+            batch.append(names.encode({
+                **Event.DICTIONARY_DEFAULTS,
+                'ekp_number': f'{number:013d}',
+                'name': 'ЧЕМПИОНАТ РОССИИ',
+                'sport_type': rng.choice(SPORTS),
+                'start_date': start,
+                'end_date': start + timedelta(days=rng.randint(0, 10)),
+                'location_country': 'РОССИЯ',
+                'location_region': rng.choice(REGIONS),
+            }))
+        db.session.execute(Event.__table__.insert(), batch)
+        db.session.commit()
+
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(text('ANALYZE'))
+    else:
+        db.session.execute(text('ANALYZE events'))
+    db.session.commit()
+
+
+def filter_queries():
+    """Запросы, которые реально отправляет API"""
+    values = {
+        'sport_type': SPORTS[0],
+        'region': REGIONS[0],
+        'start_date': '2023-01-01',
+        'end_date': '2023-02-01',
+    }
+    for size in range(len(values) + 1):
+        for names in itertools.combinations(values, size):
+            args = {name: values[name] for name in names}
+            label = ', '.join(names) or 'без фильтров'
+            query = apply_event_filters(db.session.query(*Event.serialized_columns()), args)
+            ordered = query.order_by(Event.start_date, Event.id)
+            yield f'/events [{label}]', ordered.limit(11)
+            yield f'/events [{label}] + cursor', ordered.filter(
+                tuple_(Event.start_date, Event.id) > (datetime(2023, 1, 15), 1000)
+            ).limit(11)
+
+    now = datetime(2023, 6, 1)
+    yield 'get_upcoming_events', Event.query.filter(
+        Event.start_date >= now, Event.start_date <= now + timedelta(days=7)
+    ).order_by(Event.start_date)
+    yield 'get_ongoing_events', Event.query.filter(
+        Event.start_date <= now, Event.end_date >= now
+    ).order_by(Event.end_date)
+    yield '/facets: идущие', db.session.query(func.count(Event.id)).filter(
+        Event.start_date <= now, Event.end_date >= now
+    )
+    yield '/sports', used_dictionary_values('sport_type')
+    yield '/regions', used_dictionary_values('location_region')
+
+
+def explain(query):
+    plans = []
+    prefix = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        explain_cursor = cursor.connection.cursor()
+        explain_cursor.execute(prefix + statement, parameters)
+        plans.extend(str(row[-1]).strip() for row in explain_cursor.fetchall())
+        explain_cursor.close()
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        query.all()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    return plans
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=500000)
+    arg_parser.add_argument('--database', help='URL базы; по умолчанию временный файл SQLite')
+    args = arg_parser.parse_args()
+
+    database_url = args.database or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'plans.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        CACHE_TYPE = 'NullCache'
+
+    app = create_app(BenchConfig)
+    failed = 0
+
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+        print(f"Строк в events: {args.rows}")
+
+        for label, query in filter_queries():
+            plans = explain(query)
+            full_scan = any(FULL_SCAN_RE.search(line) for line in plans)
+            failed += full_scan
+            print(f"{'FULL SCAN' if full_scan else 'ok':9} {label}")
+            if full_scan:
+                for line in plans:
+                    print(f"          {line}")
+
+    if failed:
+        print(f"Полное сканирование в {failed} запросах")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
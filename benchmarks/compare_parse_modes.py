@@ -0,0 +1,93 @@
+"""Сравнение режимов разбора PDFParser: text против table.
+
+Генерирует синтетический календарь, часть строк которого сверстана
+нерегулярно (см. synthetic_calendar.py --irregular), и разбирает его в обоих
+режимах через iter_events без базы. Для каждого режима выводит время на
+страницу, число потерянных мероприятий (нет в результате или не хватает
+обязательных полей EventIngestor, то есть запись в базу пропустит его),
+потери по видам нерегулярных строк и точность по полям.
+
+Запуск:
+    python benchmarks/compare_parse_modes.py --pages 100 --irregular 0.3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from synthetic_calendar import generate  # noqa: E402
+from app.services.ingest import EventIngestor  # noqa: E402
+from app.services.parser import PDFParser  # noqa: E402
+
+
+def run_mode(pdf_path, mode):
+    parser = PDFParser(incremental=False, mode=mode)
+    started = time.perf_counter()
+    events = list(parser.iter_events(pdf_path))
+    return events, time.perf_counter() - started, parser.total_pages
+
+
+def score(expected, actual):
+    """(потерянные мероприятия, потери по видам строк, число ошибок по полям)"""
+    actual_by_ekp = {event['ekp_number']: event for event in actual}
+    lost = 0
+    lost_by_kind = Counter()
+    field_errors = Counter()
+
+    for event in expected:
+        kind = event.get('irregular', 'regular')
+        parsed = actual_by_ekp.get(event['ekp_number'])
+        if parsed is None or any(parsed.get(field) is None for field in EventIngestor.REQUIRED_FIELDS):
+            lost += 1
+            lost_by_kind[kind] += 1
+            continue
+        for name, value in event.items():
+            if name == 'irregular':
+                continue
+            parsed_value = parsed.get(name)
+            if isinstance(parsed_value, datetime):
+                parsed_value = parsed_value.strftime('%Y-%m-%d')
+            if parsed_value != value:
+                field_errors[name] += 1
+
+    return lost, lost_by_kind, field_errors
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--pages', type=int, default=100)
+    arg_parser.add_argument('--events-per-page', type=int, default=15)
+    arg_parser.add_argument('--irregular', type=float, default=0.3)
+    arg_parser.add_argument('--seed', type=int, default=1)
+    args = arg_parser.parse_args()
+
+    pdf_path = os.path.join(tempfile.mkdtemp(), 'calendar.pdf')
+    expected = generate(pdf_path, args.pages, args.events_per_page, seed=args.seed, irregular=args.irregular)
+    kinds = Counter(event.get('irregular', 'regular') for event in expected)
+    print(f"Страниц: {args.pages}, мероприятий: {len(expected)}, "
+          f"нерегулярных строк: {len(expected) - kinds['regular']} "
+          f"({', '.join(f'{kind} {count}' for kind, count in sorted(kinds.items()) if kind != 'regular')})")
+
+    results = {}
+    for mode in PDFParser.MODES:
+        actual, elapsed, pages = run_mode(pdf_path, mode)
+        lost, lost_by_kind, field_errors = score(expected, actual)
+        results[mode] = elapsed, lost
+        print(f"\n{mode}:")
+        print(f"  Время:        {elapsed:8.2f} с ({elapsed / pages * 1000:.1f} мс/стр)")
+        print(f"  Потеряно:     {lost:8d} ({', '.join(f'{k} {v}' for k, v in sorted(lost_by_kind.items())) or '-'})")
+        print(f"  Ошибки полей: {', '.join(f'{k} {v}' for k, v in sorted(field_errors.items())) or '-'}")
+
+    text_time, text_lost = results[PDFParser.TEXT_MODE]
+    table_time, table_lost = results[PDFParser.TABLE_MODE]
+    print(f"\ntable быстрее text в {text_time / table_time:.1f} раза, потерь {table_lost} против {text_lost}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Генератор синтетических календарей в формате ЕКП.
+
+Страницы повторяют разметку, которую разбирает PDFParser: заголовок вида
+спорта со строкой "Основной состав", 13-значный номер ЕКП (7pt), название
+мероприятия прописными буквами (8pt), даты начала и окончания, страна с
+числом участников и возрастной группой, регион и город, дисциплины.
+Нужны только reportlab и TTF-шрифт с кириллицей (по умолчанию DejaVu Sans),
+сеть не используется.
+
+С --irregular часть строк сверстана так, как бывает в настоящих таблицах:
+номер ЕКП выровнен по центру ячейки, название переносится на вторую строку,
+у однодневного мероприятия указана только дата начала.
+
+Запуск:
+    python benchmarks/synthetic_calendar.py calendar.pdf --pages 200 --events-per-page 15
+    python benchmarks/synthetic_calendar.py calendar.pdf --irregular 0.3
+"""
+import argparse
+import os
+import random
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+DEFAULT_FONT = os.environ.get('SYNTHETIC_PDF_FONT') or '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+FONT_NAME = 'CalendarFont'
+
+PAGE_SIZE = (842, 595)  # A4, альбомная
+FIRST_EKP = 2000000000000
+MAX_EVENTS_PER_PAGE = 20
+
+SPORTS = ['ФУТБОЛ', 'ПЛАВАНИЕ', 'БОКС', 'ЛЫЖНЫЕ ГОНКИ', 'СПОРТИВНАЯ ГИМНАСТИКА', 'ДЗЮДО']
+NAMES = ['ЧЕМПИОНАТ РОССИИ', 'ПЕРВЕНСТВО РОССИИ', 'КУБОК РОССИИ', 'ВСЕРОССИЙСКИЕ СОРЕВНОВАНИЯ']
+PLACES = [
+    ('Республика Татарстан', 'Казань'),
+    ('Московская область', 'Химки'),
+    ('Город Москва', 'Москва'),
+    ('Свердловская область', 'Екатеринбург'),
+    ('Краснодарский край', 'Сочи'),
+]
+GROUPS = ['мужчины', 'женщины', 'юниоры', 'юноши, девушки']
+DISCIPLINES = ['K-1', 'TEAM-A', 'C-2', 'MIX-4']
+IRREGULAR_KINDS = ['centered_ekp', 'wrapped_name', 'one_day']
+
+
+def register_font(font_path=DEFAULT_FONT):
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, font_path))
+
+
+def generate(path, pages, events_per_page, seed=1, skip=(), font_path=DEFAULT_FONT, irregular=0.0):
+    """
+    Создает календарь из pages страниц по events_per_page мероприятий.
+    Номера из skip не выводятся (для проверки удаленных мероприятий).
+    Доля irregular мероприятий сверстана с одной из особенностей
+    IRREGULAR_KINDS. Возвращает список выведенных мероприятий с полями, как
+    они заданы в документе; у нерегулярных есть поле irregular.
+    """
+    if events_per_page > MAX_EVENTS_PER_PAGE:
+        raise ValueError(f"At most {MAX_EVENTS_PER_PAGE} events fit on a page")
+
+    register_font(font_path)
+    rng = random.Random(seed)
+    pdf = canvas.Canvas(path, pagesize=PAGE_SIZE)
+    expected = []
+    number = 0
+    sport = None
+
+    for _ in range(pages):
+        y = 560
+        for _ in range(events_per_page):
+            if sport is None or rng.random() < 0.15:
+                sport = rng.choice(SPORTS)
+                pdf.setFont(FONT_NAME, 9)
+                pdf.drawString(20, y, sport)
+                y -= 11
+                pdf.setFont(FONT_NAME, 7)
+                pdf.drawString(20, y, 'Основной состав')
+                y -= 12
+
+            number += 1
+            name = rng.choice(NAMES)
+            day, month = rng.randint(1, 20), rng.randint(1, 12)
+            region, city = rng.choice(PLACES)
+            participants = rng.randint(10, 500)
+            group = rng.choice(GROUPS)
+            disciplines = sorted(rng.sample(DISCIPLINES, 2))
+            # Без irregular генератор случайных чисел не вызывается: эталоны не меняются
+            kind = rng.choice(IRREGULAR_KINDS) if irregular and rng.random() < irregular else None
+            if number in skip:
+                continue
+
+            ekp_number = str(FIRST_EKP + number)
+            end_day = day if kind == 'one_day' else day + 5
+            pdf.setFont(FONT_NAME, 7)
+            pdf.drawString(20, y - 4.5 if kind == 'centered_ekp' else y, ekp_number)
+            pdf.setFont(FONT_NAME, 8)
+            pdf.drawString(100, y, name)
+            pdf.setFont(FONT_NAME, 7)
+            pdf.drawString(400, y, f'{day:02d}.{month:02d}.2025')
+            pdf.drawString(480, y, 'РОССИЯ')
+            pdf.drawString(560, y, str(participants))
+            pdf.drawString(600, y, group)
+            y -= 9
+            if kind == 'wrapped_name':
+                pdf.setFont(FONT_NAME, 8)
+                pdf.drawString(100, y, 'ФИНАЛ')
+                pdf.setFont(FONT_NAME, 7)
+                name = f'{name} ФИНАЛ'
+                y -= 9
+            pdf.drawString(100, y, ', '.join(disciplines))
+            if kind != 'one_day':
+                pdf.drawString(400, y, f'{end_day:02d}.{month:02d}.2025')
+            pdf.drawString(480, y, f'{region}, г. {city}')
+            if y < 0:
+                raise ValueError("Page overflow, use fewer events per page")
+            y -= 14
+
+            event = {
+                'ekp_number': ekp_number,
+                'name': name,
+                'sport_type': sport,
+                'discipline': ', '.join(disciplines),
+                'start_date': f'2025-{month:02d}-{day:02d}',
+                'end_date': f'2025-{month:02d}-{end_day:02d}',
+                'location_country': 'РОССИЯ',
+                'location_region': region,
+                'location_city': city,
+                'participants_count': participants,
+                'age_group': group,
+            }
+            if kind:
+                event['irregular'] = kind
+            expected.append(event)
+        pdf.showPage()
+
+    pdf.save()
+    return expected
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('path')
+    arg_parser.add_argument('--pages', type=int, default=100)
+    arg_parser.add_argument('--events-per-page', type=int, default=15)
+    arg_parser.add_argument('--seed', type=int, default=1)
+    arg_parser.add_argument('--font', default=DEFAULT_FONT)
+    arg_parser.add_argument('--irregular', type=float, default=0.0, help='доля нерегулярных строк')
+    args = arg_parser.parse_args()
+
+    expected = generate(args.path, args.pages, args.events_per_page, args.seed, font_path=args.font,
+                        irregular=args.irregular)
+    print(f"{args.path}: {args.pages} страниц, {len(expected)} мероприятий")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,16 +10,70 @@ class Config:
     ADMIN_PASSWORD = 'admin123'
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-please-change'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///sports_calendar.db'
+    # db.create_all() при каждом create_app; в рабочем режиме схему создает flask db upgrade
+    AUTO_CREATE_TABLES = os.environ.get('AUTO_CREATE_TABLES', '').lower() in ('1', 'true', 'yes')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
     # Notification settings
-    NOTIFICATION_EXPIRE_TIME = timedelta(days=7)
+    NOTIFICATION_EXPIRE_TIME = timedelta(days=7)  # неотправленное уведомление старше этого не отправляется
+    NOTIFICATION_LEAD_DAYS = 7  # за сколько дней до начала мероприятия уведомлять
+    NOTIFICATION_SENDER = os.environ.get('NOTIFICATION_SENDER') or 'file'  # 'file' или 'smtp'
+    NOTIFICATION_FILE = os.environ.get('NOTIFICATION_FILE') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'notifications', 'outbox.jsonl'
+    )
+    SMTP_HOST = os.environ.get('SMTP_HOST') or 'localhost'
+    SMTP_PORT = int(os.environ.get('SMTP_PORT') or 1025)  # отладочный сервер: python -m aiosmtpd -n
+    MAIL_FROM = os.environ.get('MAIL_FROM') or 'calendar@localhost'
 
     # PDF upload settings
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     ALLOWED_EXTENSIONS = {'pdf'}
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB max file size
 
+    # PDF parser settings
+    PDF_PARSER_WORKERS = int(os.environ.get('PDF_PARSER_WORKERS') or 1)  # >1 включает параллельный разбор
+    PDF_PARSER_PAGES_PER_SHARD = 25
+    PDF_PARSER_MAX_RSS_MB = int(os.environ.get('PDF_PARSER_MAX_RSS_MB') or 1024)  # 0 - без ограничения
+    # 'text' - текст страницы, разрезанный по номерам ЕКП; 'table' - ячейки по геометрии столбцов
+    PDF_PARSER_MODE = os.environ.get('PDF_PARSER_MODE') or 'text'
+    INGEST_BATCH_SIZE = 500
+    INGEST_ON_CONFLICT = os.environ.get('INGEST_ON_CONFLICT') or 'skip'  # 'skip' или 'update'
+
+    # Background import settings
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or 'redis://localhost:6379/0'
+    CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or 'redis://localhost:6379/0'
+    IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS') or 2)
+    IMPORT_JOB_STALE_AFTER = timedelta(minutes=10)  # задание без обновлений считается брошенным
+    IMPORT_STATUS_INTERVAL = 0.5  # секунд между записями прогресса в базу
+    STATUS_MIN_INTERVAL = 0.25  # не чаще одного статуса на клиента за это время
+    STATUS_KEEPALIVE_INTERVAL = 15  # секунд до комментария keepalive в SSE
+    # Профиль задания (POST /jobs/<id>/profile): стеки в формате collapsed, по файлу на задание
+    IMPORT_PROFILE_INTERVAL = 0.005  # секунд между снимками стека
+    IMPORT_PROFILE_DIR = os.environ.get('IMPORT_PROFILE_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'profiles'
+    )
+    # /metrics при нескольких воркерах gunicorn: каталог файлов метрик процессов,
+    # складываемых при чтении (по умолчанию задается в gunicorn.conf.py)
+    METRICS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    METRICS_FLUSH_INTERVAL = 1.0  # секунд между записями метрик процесса в его файл
+
+    # Events API settings
+    EVENTS_PER_PAGE = 10
+    EVENTS_PER_PAGE_MAX = 100
+    EVENTS_TOTAL_CACHE_TIMEOUT = 60
+    # Ответы /events, /sports и /regions из снимка таблицы в памяти каждого процесса
+    EVENTS_SNAPSHOT = os.environ.get('EVENTS_SNAPSHOT', '').lower() in ('1', 'true', 'yes')
+    FACETS_ROLLUP_TIMEOUT = 24 * 3600  # сводка /facets привязана к версии данных
+    GEO_DEFAULT_RADIUS_KM = 100  # /events?near=lat,lon без radius_km
+    GEO_MAX_RADIUS_KM = 3000
+    # /favorites и user_id в /events без Flask-Login: доверять user_id из запроса
+    # (только за проверяющим пользователя прокси); по умолчанию избранное выключено
+    FAVORITES_TRUST_USER_ID = os.environ.get('FAVORITES_TRUST_USER_ID', '').lower() in ('1', 'true', 'yes')
+    EXPORT_CHUNK_SIZE = 1000  # строк на одну выборку и одну часть потока /events/export
+
     # Cache settings
-    CACHE_TYPE = "simple"
+    # Общий для всех воркеров gunicorn бэкенд: FileSystemCache (CACHE_DIR) или RedisCache (CACHE_REDIS_URL)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'SimpleCache'
+    CACHE_DIR = os.environ.get('CACHE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or 'redis://localhost:6379/1'
     CACHE_DEFAULT_TIMEOUT = 300
\ No newline at end of file
@@ -0,0 +1,48 @@
+# gunicorn.conf.py
+# Запуск: gunicorn -c gunicorn.conf.py run:app
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND') or '0.0.0.0:8000'
+workers = int(os.environ.get('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1)
+
+# Приложение создается один раз в мастере, воркеры получают его через fork
+# и делят страницы памяти copy-on-write. Пул соединений базы в воркерах
+# сбрасывается обработчиком register_at_fork из app/__init__.py.
+preload_app = True
+
+# Метрики /metrics складываются по файлам всех воркеров (app/services/metrics.py).
+# Файл конфигурации читается до загрузки приложения, поэтому config.py видит
+# каталог, заданный здесь; по умолчанию он свой у каждого запуска мастера.
+default_metrics_dir = os.path.join(tempfile.gettempdir(), f'sports_calendar_metrics_{os.getpid()}')
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', default_metrics_dir)
+
+
+def on_starting(server):
+    # Без схемы (AUTO_CREATE_TABLES по умолчанию выключен) сервер не стартует
+    from app import missing_schema
+    tables = missing_schema(server.app.wsgi())
+    if tables:
+        raise SystemExit(
+            f"В базе нет таблиц: {', '.join(tables)}. Создайте схему командой "
+            "flask db upgrade или запустите с AUTO_CREATE_TABLES=1"
+        )
+
+    # Счетчики нового запуска начинаются с нуля: файлы прошлого запуска удаляются
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'])
+
+
+def on_exit(server):
+    if os.environ['PROMETHEUS_MULTIPROC_DIR'] == default_metrics_dir:
+        shutil.rmtree(default_metrics_dir, ignore_errors=True)
+
+
+def when_ready(server):
+    # Объекты мастера переносятся в постоянное поколение сборщика мусора:
+    # сборки в воркерах не пишут в их заголовки и не копируют общие страницы
+    gc.collect()
+    gc.freeze()
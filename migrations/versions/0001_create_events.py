@@ -0,0 +1,47 @@
+"""create events table
+
+Revision ID: 0001_create_events
+Revises: 
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_create_events'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Базы, созданные через db.create_all(), уже содержат таблицу
+    op.create_table(
+        'events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ekp_number', sa.String(length=20), nullable=False),
+        sa.Column('name', sa.String(length=500), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=True),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('sport_type', sa.String(length=100), nullable=False),
+        sa.Column('discipline', sa.String(length=100), nullable=True),
+        sa.Column('program', sa.String(length=100), nullable=True),
+        sa.Column('start_date', sa.DateTime(), nullable=False),
+        sa.Column('end_date', sa.DateTime(), nullable=False),
+        sa.Column('location_country', sa.String(length=100), nullable=False),
+        sa.Column('location_region', sa.String(length=100), nullable=True),
+        sa.Column('location_city', sa.String(length=100), nullable=True),
+        sa.Column('venue', sa.String(length=200), nullable=True),
+        sa.Column('participants_count', sa.Integer(), nullable=True),
+        sa.Column('gender', sa.String(length=50), nullable=True),
+        sa.Column('age_group', sa.String(length=100), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('ekp_number'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('events')
@@ -0,0 +1,33 @@
+"""event filter indexes
+
+Revision ID: 0002_event_filter_indexes
+Revises: 0001_create_events
+Create Date: 2026-10-18 12:10:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_event_filter_indexes'
+down_revision = '0001_create_events'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_events_start_date_id': ['start_date', 'id'],
+    'ix_events_end_date_start_date': ['end_date', 'start_date'],
+    'ix_events_sport_start_date': ['sport_type', 'start_date', 'id'],
+    'ix_events_region_start_date': ['location_region', 'start_date', 'id'],
+    'ix_events_sport_region_start_date': ['sport_type', 'location_region', 'start_date', 'id'],
+}
+
+
+def upgrade():
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'events', columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name='events')
@@ -0,0 +1,63 @@
+"""document and page fingerprints
+
+Revision ID: 0004_document_fingerprints
+Revises: 0003_import_jobs
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_document_fingerprints'
+down_revision = '0003_import_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'imported_documents',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('page_count', sa.Integer(), nullable=False),
+        sa.Column('is_complete', sa.Boolean(), nullable=False),
+        sa.Column('removed_ekp_numbers', sa.Text(), nullable=True),
+        sa.Column('imported_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('content_hash'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'document_pages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('page_num', sa.Integer(), nullable=False),
+        sa.Column('text_hash', sa.String(length=64), nullable=False),
+        sa.Column('start_sport_type', sa.String(length=100), nullable=True),
+        sa.Column('end_sport_type', sa.String(length=100), nullable=True),
+        sa.Column('ekp_numbers', sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(['document_id'], ['imported_documents.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('document_id', 'page_num'),
+        if_not_exists=True
+    )
+    op.create_index('ix_document_pages_text_hash', 'document_pages', ['text_hash'],
+                    unique=False, if_not_exists=True)
+
+    with op.batch_alter_table('import_jobs') as batch_op:
+        batch_op.add_column(sa.Column('document_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_import_jobs_document_id', 'imported_documents',
+                                    ['document_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs') as batch_op:
+        batch_op.drop_constraint('fk_import_jobs_document_id', type_='foreignkey')
+        batch_op.drop_column('document_id')
+
+    op.drop_index('ix_document_pages_text_hash', table_name='document_pages')
+    op.drop_table('document_pages')
+    op.drop_table('imported_documents')
@@ -0,0 +1,113 @@
+"""dataset version and full-text search index over events
+
+Revision ID: 0005_dataset_state
+Revises: 0004_document_fingerprints
+Create Date: 2026-10-18 15:00:00
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_dataset_state'
+down_revision = '0004_document_fingerprints'
+branch_labels = None
+depends_on = None
+
+SOURCE_COLUMNS = 'name, sport_type, discipline, location_city, location_region, venue'
+
+
+def sqlite_document(row):
+    def fold(expression):
+        return f"replace(replace({expression}, 'ё', 'е'), 'Ё', 'Е')"
+
+    return ', '.join((
+        fold(f'{row}.name'),
+        fold(f'{row}.sport_type'),
+        fold(f'{row}.discipline'),
+        fold(f"coalesce({row}.location_city, '') || ' ' || coalesce({row}.location_region, '') || ' ' || "
+             f"coalesce({row}.venue, '')"),
+    ))
+
+
+def postgresql_document(row):
+    return ' || '.join((
+        f"setweight(to_tsvector('russian', {row}.name), 'A')",
+        f"setweight(to_tsvector('russian', coalesce({row}.sport_type, '')), 'B')",
+        f"setweight(to_tsvector('russian', coalesce({row}.discipline, '')), 'C')",
+        f"setweight(to_tsvector('russian', concat_ws(' ', {row}.location_city, "
+        f"{row}.location_region, {row}.venue)), 'B')",
+    ))
+
+
+def upgrade():
+    table = op.create_table(
+        'dataset_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(table, [{'id': 1, 'version': 1, 'updated_at': datetime.utcnow()}])
+
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE event_search USING fts5("
+            "name, sport, discipline, place, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '3 4 5 6')"
+        )
+        op.execute(
+            'INSERT INTO event_search (rowid, name, sport, discipline, place) '
+            f"SELECT events.id, {sqlite_document('events')} FROM events"
+        )
+        op.execute(f"""CREATE TRIGGER event_search_insert AFTER INSERT ON events BEGIN
+            INSERT INTO event_search (rowid, name, sport, discipline, place) SELECT new.id, {sqlite_document('new')};
+        END""")
+        op.execute(f"""CREATE TRIGGER event_search_update AFTER UPDATE OF {SOURCE_COLUMNS} ON events BEGIN
+            DELETE FROM event_search WHERE rowid = old.id;
+            INSERT INTO event_search (rowid, name, sport, discipline, place) SELECT new.id, {sqlite_document('new')};
+        END""")
+        op.execute("""CREATE TRIGGER event_search_delete AFTER DELETE ON events BEGIN
+            DELETE FROM event_search WHERE rowid = old.id;
+        END""")
+
+    elif dialect == 'postgresql':
+        op.execute(
+            'CREATE TABLE event_search ('
+            'event_id INTEGER PRIMARY KEY REFERENCES events (id) ON DELETE CASCADE, document TSVECTOR NOT NULL)'
+        )
+        op.execute(
+            'INSERT INTO event_search (event_id, document) '
+            f"SELECT events.id, {postgresql_document('events')} FROM events"
+        )
+        # Индекс строится после заполнения: так быстрее, чем обновлять GIN построчно
+        op.execute('CREATE INDEX ix_event_search_document ON event_search USING GIN (document)')
+        op.execute(f"""CREATE FUNCTION event_search_refresh() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO event_search (event_id, document) VALUES (NEW.id, {postgresql_document('NEW')})
+            ON CONFLICT (event_id) DO UPDATE SET document = EXCLUDED.document;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql""")
+        op.execute(
+            f'CREATE TRIGGER event_search_refresh AFTER INSERT OR UPDATE OF {SOURCE_COLUMNS} ON events '
+            'FOR EACH ROW EXECUTE FUNCTION event_search_refresh()'
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        for trigger in ('event_search_insert', 'event_search_update', 'event_search_delete'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS event_search')
+    elif dialect == 'postgresql':
+        op.execute('DROP TABLE IF EXISTS event_search')
+        op.execute('DROP FUNCTION IF EXISTS event_search_refresh() CASCADE')
+
+    op.drop_table('dataset_state')
@@ -0,0 +1,69 @@
+"""notification subscriptions, queue and watermark
+
+Revision ID: 0006_notifications
+Revises: 0005_dataset_state
+Create Date: 2026-10-18 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_notifications'
+down_revision = '0005_dataset_state'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notification_subscriptions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('value', sa.String(length=100), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email', 'kind', 'value', name='uq_notification_subscriptions_email_kind_value'),
+        if_not_exists=True
+    )
+    op.create_index('ix_notification_subscriptions_user_id', 'notification_subscriptions', ['user_id'],
+                    unique=False, if_not_exists=True)
+    op.create_index('ix_notification_subscriptions_kind_value', 'notification_subscriptions',
+                    ['kind', 'value'], unique=False, if_not_exists=True)
+
+    op.create_table(
+        'notifications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('event_ids', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('expired', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_index('ix_notifications_sent_at_id', 'notifications', ['sent_at', 'id'],
+                    unique=False, if_not_exists=True)
+
+    op.create_table(
+        'notification_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('horizon', sa.DateTime(), nullable=False),
+        sa.Column('last_event_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('notification_state')
+    op.drop_index('ix_notifications_sent_at_id', table_name='notifications')
+    op.drop_table('notifications')
+    op.drop_index('ix_notification_subscriptions_kind_value', table_name='notification_subscriptions')
+    op.drop_index('ix_notification_subscriptions_user_id', table_name='notification_subscriptions')
+    op.drop_table('notification_subscriptions')
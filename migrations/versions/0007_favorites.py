@@ -0,0 +1,38 @@
+"""favorites
+
+Revision ID: 0007_favorites
+Revises: 0006_notifications
+Create Date: 2026-10-18 17:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_favorites'
+down_revision = '0006_notifications'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'favorites',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_index('ix_favorites_user_event', 'favorites', ['user_id', 'event_id'],
+                    unique=True, if_not_exists=True)
+    op.create_index('ix_favorites_event_id', 'favorites', ['event_id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_favorites_event_id', table_name='favorites')
+    op.drop_index('ix_favorites_user_event', table_name='favorites')
+    op.drop_table('favorites')
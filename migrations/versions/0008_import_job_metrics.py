@@ -0,0 +1,30 @@
+"""import job stage timings and profiling
+
+Revision ID: 0008_import_job_metrics
+Revises: 0007_favorites
+Create Date: 2026-10-18 18:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_import_job_metrics'
+down_revision = '0007_favorites'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('import_jobs') as batch_op:
+        batch_op.add_column(sa.Column('stage_timings', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('profile', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('profile_path', sa.String(length=500), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs') as batch_op:
+        batch_op.drop_column('profile_path')
+        batch_op.drop_column('profile')
+        batch_op.drop_column('stage_timings')
@@ -0,0 +1,29 @@
+"""event coordinates from the gazetteer
+
+Revision ID: 0009_event_coordinates
+Revises: 0008_import_job_metrics
+Create Date: 2026-10-18 20:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_event_coordinates'
+down_revision = '0008_import_job_metrics'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Существующие строки заполняет flask geocode-events
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('events') as batch_op:
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
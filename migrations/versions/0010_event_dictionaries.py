@@ -0,0 +1,213 @@
+"""event dictionary tables
+
+Revision ID: 0010_event_dictionaries
+Revises: 0009_event_coordinates
+Create Date: 2026-10-18 22:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_event_dictionaries'
+down_revision = '0009_event_coordinates'
+branch_labels = None
+depends_on = None
+
+# Строковая колонка events -> (таблица справочника, обязательное поле)
+FIELDS = {
+    'event_type': ('event_types', False),
+    'category': ('categories', False),
+    'sport_type': ('sport_types', True),
+    'discipline': ('disciplines', False),
+    'location_country': ('countries', True),
+    'location_region': ('regions', False),
+}
+
+OLD_INDEXES = {
+    'ix_events_sport_start_date': ['sport_type', 'start_date', 'id'],
+    'ix_events_region_start_date': ['location_region', 'start_date', 'id'],
+    'ix_events_sport_region_start_date': ['sport_type', 'location_region', 'start_date', 'id'],
+}
+NEW_INDEXES = {
+    'ix_events_sport_start_date': ['sport_type_id', 'start_date', 'id'],
+    'ix_events_region_start_date': ['location_region_id', 'start_date', 'id'],
+    'ix_events_sport_region_start_date': ['sport_type_id', 'location_region_id', 'start_date', 'id'],
+}
+
+
+def fold(expression):
+    return f"replace(replace({expression}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+# Документ поиска по справочникам: колонки FTS5 (с метками фильтров tags) и tsvector
+SEARCH = {
+    'source_columns': 'name, sport_type_id, discipline_id, location_city, location_region_id, venue',
+    'fts_columns': 'name, sport, discipline, place, tags',
+    'sqlite_document': lambda row: ', '.join((
+        fold(f'{row}.name'),
+        fold(f'(SELECT name FROM sport_types WHERE id = {row}.sport_type_id)'),
+        fold(f'(SELECT name FROM disciplines WHERE id = {row}.discipline_id)'),
+        fold(f"coalesce({row}.location_city, '') || ' ' || coalesce("
+             f"(SELECT name FROM regions WHERE id = {row}.location_region_id), '') || ' ' || "
+             f"coalesce({row}.venue, '')"),
+        f"'s' || {row}.sport_type_id || coalesce(' r' || {row}.location_region_id, '')",
+    )),
+    'postgresql_document': lambda row: ' || '.join((
+        f"setweight(to_tsvector('russian', {row}.name), 'A')",
+        "setweight(to_tsvector('russian', coalesce("
+        f"(SELECT name FROM sport_types WHERE id = {row}.sport_type_id), '')), 'B')",
+        "setweight(to_tsvector('russian', coalesce("
+        f"(SELECT name FROM disciplines WHERE id = {row}.discipline_id), '')), 'C')",
+        f"setweight(to_tsvector('russian', concat_ws(' ', {row}.location_city, "
+        f"(SELECT name FROM regions WHERE id = {row}.location_region_id), {row}.venue)), 'B')",
+    )),
+}
+
+# Документ поиска по строковым колонкам, как в 0005
+OLD_SEARCH = {
+    'source_columns': 'name, sport_type, discipline, location_city, location_region, venue',
+    'fts_columns': 'name, sport, discipline, place',
+    'sqlite_document': lambda row: ', '.join((
+        fold(f'{row}.name'),
+        fold(f'{row}.sport_type'),
+        fold(f'{row}.discipline'),
+        fold(f"coalesce({row}.location_city, '') || ' ' || coalesce({row}.location_region, '') || ' ' || "
+             f"coalesce({row}.venue, '')"),
+    )),
+    'postgresql_document': lambda row: ' || '.join((
+        f"setweight(to_tsvector('russian', {row}.name), 'A')",
+        f"setweight(to_tsvector('russian', coalesce({row}.sport_type, '')), 'B')",
+        f"setweight(to_tsvector('russian', coalesce({row}.discipline, '')), 'C')",
+        f"setweight(to_tsvector('russian', concat_ws(' ', {row}.location_city, "
+        f"{row}.location_region, {row}.venue)), 'B')",
+    )),
+}
+
+
+def drop_search_index():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('event_search_insert', 'event_search_update', 'event_search_delete'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS event_search')
+    elif dialect == 'postgresql':
+        op.execute('DROP TABLE IF EXISTS event_search')
+        op.execute('DROP FUNCTION IF EXISTS event_search_refresh() CASCADE')
+
+
+def create_search_index(search):
+    dialect = op.get_bind().dialect.name
+    columns = search['fts_columns']
+
+    if dialect == 'sqlite':
+        document = search['sqlite_document']
+        op.execute(
+            f"CREATE VIRTUAL TABLE event_search USING fts5({columns}, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '3 4 5 6')"
+        )
+        op.execute(f"INSERT INTO event_search (rowid, {columns}) SELECT events.id, {document('events')} FROM events")
+        op.execute(f"""CREATE TRIGGER event_search_insert AFTER INSERT ON events BEGIN
+            INSERT INTO event_search (rowid, {columns}) SELECT new.id, {document('new')};
+        END""")
+        op.execute(f"""CREATE TRIGGER event_search_update AFTER UPDATE OF {search['source_columns']} ON events BEGIN
+            DELETE FROM event_search WHERE rowid = old.id;
+            INSERT INTO event_search (rowid, {columns}) SELECT new.id, {document('new')};
+        END""")
+        op.execute("""CREATE TRIGGER event_search_delete AFTER DELETE ON events BEGIN
+            DELETE FROM event_search WHERE rowid = old.id;
+        END""")
+
+    elif dialect == 'postgresql':
+        document = search['postgresql_document']
+        op.execute(
+            'CREATE TABLE event_search ('
+            'event_id INTEGER PRIMARY KEY REFERENCES events (id) ON DELETE CASCADE, document TSVECTOR NOT NULL)'
+        )
+        op.execute(f"INSERT INTO event_search (event_id, document) SELECT events.id, {document('events')} FROM events")
+        op.execute('CREATE INDEX ix_event_search_document ON event_search USING GIN (document)')
+        op.execute(f"""CREATE FUNCTION event_search_refresh() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO event_search (event_id, document) VALUES (NEW.id, {document('NEW')})
+            ON CONFLICT (event_id) DO UPDATE SET document = EXCLUDED.document;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql""")
+        op.execute(
+            f"CREATE TRIGGER event_search_refresh AFTER INSERT OR UPDATE OF {search['source_columns']} ON events "
+            'FOR EACH ROW EXECUTE FUNCTION event_search_refresh()'
+        )
+
+
+def upgrade():
+    # Индекс поиска (0005) пересоздается: документ переходит со строковых
+    # колонок на справочники, а пересоздание events на SQLite удаляет триггеры
+    drop_search_index()
+
+    for field, (table, _) in FIELDS.items():
+        op.create_table(
+            table,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name'),
+        )
+        op.execute(
+            f'INSERT INTO {table} (name) SELECT DISTINCT {field} FROM events '
+            f'WHERE {field} IS NOT NULL ORDER BY {field}'
+        )
+
+    with op.batch_alter_table('events') as batch_op:
+        for field in FIELDS:
+            batch_op.add_column(sa.Column(f'{field}_id', sa.Integer(), nullable=True))
+
+    # Одно обновление на всю таблицу: id ищется по уникальному индексу названия
+    op.execute('UPDATE events SET ' + ', '.join(
+        f'{field}_id = (SELECT id FROM {table} WHERE {table}.name = events.{field})'
+        for field, (table, _) in FIELDS.items()
+    ))
+
+    # На SQLite таблица пересоздается один раз: старые колонки и индексы
+    # удаляются, новые колонки становятся обязательными и ссылками
+    with op.batch_alter_table('events') as batch_op:
+        for name in OLD_INDEXES:
+            batch_op.drop_index(name)
+        for field, (table, required) in FIELDS.items():
+            batch_op.drop_column(field)
+            if required:
+                batch_op.alter_column(f'{field}_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_foreign_key(f'fk_events_{field}_id_{table}', table, [f'{field}_id'], ['id'])
+        for name, columns in NEW_INDEXES.items():
+            batch_op.create_index(name, columns, unique=False)
+
+    create_search_index(SEARCH)
+
+
+def downgrade():
+    drop_search_index()
+
+    with op.batch_alter_table('events') as batch_op:
+        for field in FIELDS:
+            batch_op.add_column(sa.Column(field, sa.String(length=100), nullable=True))
+
+    op.execute('UPDATE events SET ' + ', '.join(
+        f'{field} = (SELECT name FROM {table} WHERE {table}.id = events.{field}_id)'
+        for field, (table, _) in FIELDS.items()
+    ))
+
+    with op.batch_alter_table('events') as batch_op:
+        for name in NEW_INDEXES:
+            batch_op.drop_index(name)
+        for field, (table, required) in FIELDS.items():
+            batch_op.drop_constraint(f'fk_events_{field}_id_{table}', type_='foreignkey')
+            batch_op.drop_column(f'{field}_id')
+            if required:
+                batch_op.alter_column(field, existing_type=sa.String(length=100), nullable=False)
+        for name, columns in OLD_INDEXES.items():
+            batch_op.create_index(name, columns, unique=False)
+
+    for table, _ in FIELDS.values():
+        op.drop_table(table)
+
+    create_search_index(OLD_SEARCH)
@@ -0,0 +1,26 @@
+"""import job worker that holds the job
+
+Revision ID: 0011_import_job_worker
+Revises: 0010_event_dictionaries
+Create Date: 2026-10-19 18:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_import_job_worker'
+down_revision = '0010_event_dictionaries'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('import_jobs') as batch_op:
+        batch_op.add_column(sa.Column('worker', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs') as batch_op:
+        batch_op.drop_column('worker')
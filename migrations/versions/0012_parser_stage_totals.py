@@ -0,0 +1,44 @@
+"""parser stage totals for /metrics
+
+Revision ID: 0012_parser_stage_totals
+Revises: 0011_import_job_worker
+Create Date: 2026-10-20 12:00:00
+
+"""
+import json
+from collections import Counter
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012_parser_stage_totals'
+down_revision = '0011_import_job_worker'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table = op.create_table(
+        'parser_stage_totals',
+        sa.Column('stage', sa.String(length=50), nullable=False),
+        sa.Column('seconds', sa.Float(), nullable=False),
+        sa.Column('calls', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('stage')
+    )
+
+    # Суммы по уже завершенным заданиям, которые /metrics раньше считал на каждом запросе
+    seconds = Counter()
+    calls = Counter()
+    rows = op.get_bind().execute(sa.text('SELECT stage_timings FROM import_jobs WHERE stage_timings IS NOT NULL'))
+    for stage_timings, in rows:
+        for stage, values in json.loads(stage_timings).items():
+            seconds[stage] += values['seconds']
+            calls[stage] += values['calls']
+    op.bulk_insert(table, [
+        {'stage': stage, 'seconds': seconds[stage], 'calls': calls[stage]} for stage in seconds
+    ])
+
+
+def downgrade():
+    op.drop_table('parser_stage_totals')
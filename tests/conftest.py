@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+# Генератор синтетических календарей лежит рядом с бенчмарками
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from config import Config  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app import celery_app  # noqa: E402
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Приложение с отдельной базой SQLite во временном каталоге"""
+    def make(database='test.db'):
+        class TestConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / database)
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = str(tmp_path)
+            PDF_PARSER_WORKERS = 1
+
+        return create_app(TestConfig)
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def eager_celery(app, monkeypatch):
+    """
+    Задачи Celery выполняются сразу в тестовом процессе, в контексте
+    тестового приложения; брокер и хранилище результатов - в памяти
+    """
+    monkeypatch.setattr(celery_app, '_flask_app', app)
+    conf = celery_app.celery.conf
+    saved = {name: conf[name] for name in ('task_always_eager', 'task_eager_propagates', 'broker_url', 'result_backend')}
+    conf.update(
+        task_always_eager=True, task_eager_propagates=True,
+        broker_url='memory://', result_backend='cache+memory://',
+    )
+    yield celery_app.celery
+    conf.update(saved)
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.event import Event
+
+# (начало, окончание, вид спорта): в том числе события через границы месяца и года
+SPANS = [
+    (datetime(2030, 11, 28), datetime(2030, 12, 2), 'БОКС'),
+    (datetime(2030, 12, 1), datetime(2030, 12, 1), 'ПЛАВАНИЕ'),
+    (datetime(2030, 12, 10, 15), datetime(2030, 12, 12, 9), 'БОКС'),
+    (datetime(2030, 12, 30), datetime(2031, 1, 3), 'ПЛАВАНИЕ'),
+    (datetime(2030, 11, 1), datetime(2031, 2, 1), 'БОКС'),
+    (datetime(2030, 11, 1), datetime(2030, 11, 30, 23, 59), 'БОКС'),
+    (datetime(2031, 1, 1), datetime(2031, 1, 5), 'БОКС'),
+]
+
+
+@pytest.fixture
+def events(app):
+    for number, (start, end, sport_type) in enumerate(SPANS):
+        db.session.add(Event(
+            ekp_number=f'{number:013d}', name=f'СОРЕВНОВАНИЕ {number}', sport_type=sport_type,
+            location_country='РОССИЯ', location_region='Тверская область' if number % 2 else 'г. Москва',
+            start_date=start, end_date=end,
+        ))
+    db.session.commit()
+    return Event.query.order_by(Event.start_date, Event.id).all()
+
+
+def expected_days(events, year, month):
+    """Для каждого дня месяца - id событий, которые на него приходятся"""
+    day = datetime(year, month, 1)
+    days = []
+    while day.month == month:
+        ids = [event.id for event in events if event.start_date.date() <= day.date() <= event.end_date.date()]
+        days.append({'date': day.strftime('%Y-%m-%d'), 'count': len(ids), 'events': ids})
+        day += timedelta(days=1)
+    return days
+
+
+@pytest.mark.parametrize('year, month', [(2030, 11), (2030, 12), (2031, 1), (2031, 2), (2031, 3)])
+def test_days_match_event_spans(app, events, year, month):
+    response = app.test_client().get(f'/calendar/{year}/{month}')
+    assert response.status_code == 200
+    data = response.get_json()
+
+    days = expected_days(events, year, month)
+    assert data['days'] == days
+    listed = [event for event in events if any(event.id in day['events'] for day in days)]
+    assert [event['id'] for event in data['events']] == [event.id for event in listed]
+    assert data['total'] == len(listed)
+    assert all(card['sport_type'] == event.sport_type for card, event in zip(data['events'], listed))
+
+
+def test_filters(app, events):
+    data = app.test_client().get(
+        '/calendar/2030/12', query_string={'sport_type': 'БОКС', 'region': 'г. Москва'}
+    ).get_json()
+
+    selected = [event for event in events if event.sport_type == 'БОКС' and event.location_region == 'г. Москва']
+    assert data['days'] == expected_days(selected, 2030, 12)
+
+
+@pytest.mark.parametrize('month', [0, 13])
+def test_invalid_month(app, month):
+    assert app.test_client().get(f'/calendar/2030/{month}').status_code == 400
@@ -0,0 +1,30 @@
+import sqlite3
+from datetime import datetime
+
+from app import db
+from app.models.event import Event
+from app.services.dataset import dataset_version
+
+
+def test_import_in_another_process_is_visible_on_next_request(app):
+    db.session.add(Event(
+        ekp_number='0000000000001', name='ПЕРВЕНСТВО РОССИИ', sport_type='БОКС',
+        start_date=datetime(2026, 5, 1), end_date=datetime(2026, 5, 2), location_country='РОССИЯ',
+    ))
+    db.session.commit()
+    client = app.test_client()
+    assert client.get('/sports').get_json() == ['БОКС']
+    version = dataset_version()
+
+    # Импорт в другом процессе (воркер Celery, другой процесс gunicorn): мимо этого процесса
+    with sqlite3.connect(db.engine.url.database) as connection:
+        connection.execute("INSERT INTO sport_types (name) VALUES ('ПЛАВАНИЕ')")
+        connection.execute(
+            "INSERT INTO events (ekp_number, name, sport_type_id, start_date, end_date, location_country_id) "
+            "SELECT '0000000000002', name, (SELECT id FROM sport_types WHERE name = 'ПЛАВАНИЕ'), "
+            "start_date, end_date, location_country_id FROM events"
+        )
+        connection.execute('UPDATE dataset_state SET version = version + 1')
+
+    assert dataset_version() == version + 1
+    assert client.get('/sports').get_json() == ['БОКС', 'ПЛАВАНИЕ']
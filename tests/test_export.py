@@ -0,0 +1,114 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.event import Event
+from app.services.export import CSV_COLUMNS, ICS_LINE_LIMIT
+
+LONG_NAME = 'ЧЕМПИОНАТ РОССИИ; ЭТАП КУБКА, ' + 'ФИНАЛ ' * 20
+
+
+@pytest.fixture
+def events(app):
+    # Пачки выгрузки меньше числа строк: проверяются границы пачек
+    app.config['EXPORT_CHUNK_SIZE'] = 2
+    start = datetime(2030, 3, 1)
+    for number in range(5):
+        db.session.add(Event(
+            ekp_number=f'{number + 1:013d}', name=LONG_NAME if number == 2 else f'ПЕРВЕНСТВО {number}',
+            sport_type='БОКС' if number % 2 else 'ПЛАВАНИЕ', discipline='ВОЛЬНЫЙ СТИЛЬ' if number == 0 else None,
+            start_date=start + timedelta(days=5 - number), end_date=start + timedelta(days=7 - number),
+            location_country='РОССИЯ', location_region='Тверская область', location_city='Тверь',
+            venue='СК "Юбилейный"' if number == 1 else None, participants_count=number or None,
+        ))
+    db.session.commit()
+    return Event.query.order_by(Event.start_date, Event.id).all()
+
+
+def export(client, **params):
+    response = client.get('/events/export', query_string=params)
+    assert response.status_code == 200
+    return response
+
+
+def test_csv(app, events):
+    response = export(app.test_client(), format='csv')
+    assert response.content_type == 'text/csv; charset=utf-8'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=events.csv'
+    text = response.get_data(as_text=True)
+    assert text.startswith('\ufeff')
+
+    rows = list(csv.reader(io.StringIO(text[1:])))
+    assert rows[0] == list(CSV_COLUMNS)
+    expected = []
+    for event in events:
+        expected.append([
+            value.strftime('%Y-%m-%d') if isinstance(value, datetime) else '' if value is None else str(value)
+            for value in (getattr(event, name) for name in CSV_COLUMNS)
+        ])
+    assert rows[1:] == expected
+
+
+def test_csv_filters(app, events):
+    text = export(app.test_client(), format='csv', sport_type='БОКС').get_data(as_text=True)
+    rows = list(csv.DictReader(io.StringIO(text[1:])))
+    assert [row['ekp_number'] for row in rows] == [event.ekp_number for event in events if event.sport_type == 'БОКС']
+
+
+def test_ndjson_matches_events_api(app, events):
+    client = app.test_client()
+    response = export(client, format='ndjson')
+    assert response.content_type == 'application/x-ndjson'
+
+    lines = response.get_data(as_text=True).splitlines()
+    exported = [json.loads(line) for line in lines]
+    page = client.get('/events', query_string={'per_page': 100}).get_json()['events']
+    assert exported == page
+
+
+def unfold(text):
+    """Строки ICS без переносов (RFC 5545, 3.1)"""
+    return text.replace('\r\n ', '').split('\r\n')
+
+
+def test_ics(app, events):
+    response = export(app.test_client(), format='ics')
+    assert response.content_type == 'text/calendar; charset=utf-8'
+    text = response.get_data(as_text=True)
+
+    assert text.startswith('BEGIN:VCALENDAR\r\n') and text.endswith('END:VCALENDAR\r\n')
+    physical = text.split('\r\n')[:-1]
+    assert all(len(line.encode('utf-8')) <= ICS_LINE_LIMIT for line in physical)
+    assert any(line.startswith(' ') for line in physical)
+
+    lines = unfold(text)
+    assert lines.count('BEGIN:VEVENT') == lines.count('END:VEVENT') == len(events)
+    assert [line for line in lines if line.startswith('UID:')] == [
+        f'UID:{event.ekp_number}@localhost' for event in events
+    ]
+    first = events[0]
+    # Конец события на весь день - следующий день после end_date
+    assert f'DTSTART;VALUE=DATE:{first.start_date:%Y%m%d}' in lines
+    assert f'DTEND;VALUE=DATE:{first.end_date + timedelta(days=1):%Y%m%d}' in lines
+    summary = LONG_NAME.replace(';', '\\;').replace(',', '\\,')
+    assert f'SUMMARY:{summary}' in lines
+    assert 'LOCATION:СК "Юбилейный"\\, Тверь\\, Тверская область\\, РОССИЯ' in lines
+    assert 'DESCRIPTION:ПЛАВАНИЕ\\, ВОЛЬНЫЙ СТИЛЬ' in lines
+
+
+def test_gzip_stream_matches_plain(app, events):
+    client = app.test_client()
+    plain = export(client, format='ndjson').get_data()
+    response = client.get('/events/export', query_string={'format': 'ndjson'}, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == plain
+
+
+def test_unknown_format(app, events):
+    response = app.test_client().get('/events/export', query_string={'format': 'xlsx'})
+    assert response.status_code == 400
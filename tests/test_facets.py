@@ -0,0 +1,105 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.event import Event
+
+SPORTS = ['БОКС', 'ПЛАВАНИЕ', 'ДЗЮДО', 'САМБО']
+REGIONS = ['Тверская область', 'Алтайский край', 'г. Москва', None]
+COUNTRIES = ['РОССИЯ', 'БЕЛАРУСЬ']
+
+
+@pytest.fixture
+def events(app):
+    rng = random.Random(3)
+    # Даты в полдень: граница статусов не совпадает со временем запроса
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    for number in range(120):
+        start = today + timedelta(days=rng.randint(-60, 60))
+        db.session.add(Event(
+            ekp_number=f'{number:013d}', name=f'СОРЕВНОВАНИЕ {number}', sport_type=rng.choice(SPORTS),
+            location_region=rng.choice(REGIONS), location_country=rng.choice(COUNTRIES),
+            start_date=start, end_date=start + timedelta(days=rng.randint(0, 5)),
+        ))
+    db.session.commit()
+    return Event.query.all()
+
+
+def matches(event, args, skip=None):
+    """Фильтры /events (apply_event_filters) без фильтра skip"""
+    if args.get('sport_type') and skip != 'sport_type' and event.sport_type != args['sport_type']:
+        return False
+    if args.get('region') and skip != 'region' and event.location_region != args['region']:
+        return False
+    if args.get('start_date') and event.start_date < datetime.strptime(args['start_date'], '%Y-%m-%d'):
+        return False
+    if args.get('end_date'):
+        end = datetime.strptime(args['end_date'], '%Y-%m-%d')
+        if event.end_date > end or event.start_date > end:
+            return False
+    return True
+
+
+def expected_counts(events, field, args, skip):
+    counts = {}
+    for event in events:
+        value = getattr(event, field)
+        if value is not None and matches(event, args, skip):
+            counts[value] = counts.get(value, 0) + 1
+    ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return [{'value': value, 'count': count} for value, count in ordered]
+
+
+def expected_facets(events, args):
+    now = datetime.utcnow()
+    selected = [event for event in events if matches(event, args)]
+    upcoming = sum(now < event.start_date for event in selected)
+    ongoing = sum(event.start_date <= now <= event.end_date for event in selected)
+    return {
+        # Для поля не учитывается его собственный фильтр
+        'sport_type': expected_counts(events, 'sport_type', args, 'sport_type'),
+        'location_region': expected_counts(events, 'location_region', args, 'region'),
+        'location_country': expected_counts(events, 'location_country', args, None),
+        'time_status': {'upcoming': upcoming, 'ongoing': ongoing, 'completed': len(selected) - upcoming - ongoing},
+        'total': len(selected),
+    }
+
+
+def date_arg(days):
+    return (datetime.utcnow() + timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+@pytest.mark.parametrize('args', [
+    {},
+    {'sport_type': 'БОКС'},
+    {'region': 'Алтайский край'},
+    {'sport_type': 'ПЛАВАНИЕ', 'region': 'г. Москва'},
+    {'start_date': date_arg(-10)},
+    {'end_date': date_arg(20)},
+    {'sport_type': 'ДЗЮДО', 'start_date': date_arg(-30), 'end_date': date_arg(30)},
+    {'sport_type': 'НЕТ ТАКОГО'},
+])
+def test_facet_counts(app, events, args):
+    response = app.test_client().get('/facets', query_string=args)
+    assert response.status_code == 200
+    assert response.get_json() == expected_facets(events, args)
+
+
+def test_rollup_follows_dataset_version(app, events):
+    client = app.test_client()
+    client.get('/facets')
+    db.session.add(Event(
+        ekp_number='9999999999999', name='НОВОЕ', sport_type='КЕРЛИНГ', location_country='РОССИЯ',
+        start_date=datetime(2030, 1, 1), end_date=datetime(2030, 1, 2),
+    ))
+    db.session.commit()
+
+    # Кэш не сбрасывается: ключ свертки содержит версию данных
+    sports = client.get('/facets').get_json()['sport_type']
+    assert {'value': 'КЕРЛИНГ', 'count': 1} in sports
+
+
+def test_invalid_date(app, events):
+    assert app.test_client().get('/facets', query_string={'start_date': '01.03.2030'}).status_code == 400
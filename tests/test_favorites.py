@@ -0,0 +1,89 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from flask_login import LoginManager, UserMixin
+
+from app import db
+from app.models.event import Event
+from app.models.favorite import Favorite
+from app.models.notification import Notification, NotificationSubscription
+from app.services.notifications import check_upcoming_events
+
+NOW = datetime(2026, 5, 1)
+
+
+class User(UserMixin):
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+@pytest.fixture
+def event(app):
+    event = Event(
+        ekp_number='0000000000001', name='ПЕРВЕНСТВО РОССИИ', sport_type='ЛЕГКАЯ АТЛЕТИКА',
+        start_date=NOW + timedelta(days=3), end_date=NOW + timedelta(days=4), location_country='РОССИЯ',
+    )
+    db.session.add(event)
+    db.session.commit()
+    return event
+
+
+def favorite_flags(client, **params):
+    return [item['is_favorite'] for item in client.get('/events', query_string=params).get_json()['events']]
+
+
+def test_favorites_are_disabled_by_default(app, event):
+    db.session.add(Favorite(user_id=7, event_id=event.id))
+    db.session.commit()
+    client = app.test_client()
+
+    assert client.get('/favorites', query_string={'user_id': 7}).status_code == 404
+    assert client.post('/favorites', json={'user_id': 7, 'event_id': event.id}).status_code == 404
+    assert client.delete(f'/favorites/{event.id}', query_string={'user_id': 7}).status_code == 404
+    # Чужой user_id не раскрывает избранное
+    assert favorite_flags(client, user_id=7) == [False]
+
+
+def test_trusted_user_id(app, event):
+    app.config['FAVORITES_TRUST_USER_ID'] = True
+    client = app.test_client()
+
+    assert client.post('/favorites', json={'event_id': event.id}).status_code == 400
+    assert client.post('/favorites', json={'user_id': 7, 'event_id': event.id}).status_code == 201
+    assert [item['id'] for item in client.get('/favorites', query_string={'user_id': 7}).get_json()] == [event.id]
+    assert favorite_flags(client, user_id=7) == [True]
+    assert client.delete(f'/favorites/{event.id}', query_string={'user_id': 7}).status_code == 204
+
+
+def test_user_comes_from_login_session(app, event):
+    login_manager = LoginManager(app)
+    login_manager.request_loader(lambda request: User(int(request.headers['X-User'])) if 'X-User' in request.headers else None)
+    client = app.test_client()
+
+    def call(method, url, **kwargs):
+        # Свой контекст приложения на запрос, как на сервере: Flask-Login хранит пользователя в g
+        with app.app_context():
+            return getattr(client, method)(url, **kwargs)
+
+    assert call('post', '/favorites', json={'user_id': 7, 'event_id': event.id}).status_code == 401
+    # user_id из запроса игнорируется: избранное пишется пользователю сессии
+    response = call('post', '/favorites', json={'user_id': 7, 'event_id': event.id}, headers={'X-User': '3'})
+    assert response.status_code == 201
+    assert Favorite.ids_for_user(3) == {event.id} and Favorite.ids_for_user(7) == frozenset()
+    assert [item['is_favorite'] for item in call('get', '/events', query_string={'user_id': 7}).get_json()['events']] == [False]
+    assert call('get', '/events', headers={'X-User': '3'}).get_json()['events'][0]['is_favorite'] is True
+
+
+def test_favorites_feed_notifications(app, event):
+    db.session.add_all([
+        Favorite(user_id=3, event_id=event.id),
+        NotificationSubscription(user_id=3, email='fan@example.com', kind=NotificationSubscription.SPORT, value='ФУТБОЛ'),
+        NotificationSubscription(user_id=4, email='other@example.com', kind=NotificationSubscription.SPORT, value='ФУТБОЛ'),
+    ])
+    db.session.commit()
+
+    assert check_upcoming_events(now=NOW) == 1
+    notification = Notification.query.one()
+    assert notification.email == 'fan@example.com'
+    assert json.loads(notification.event_ids) == [event.id]
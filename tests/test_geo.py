@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import cache, db
+from app.models.event import Event
+from app.services.geo import distance_km, geo_index, geocode
+
+MOSCOW = (55.7558, 37.6173)
+
+# (город, регион, страна, вид спорта); у мероприятий за рубежом координат нет
+PLACES = [
+    ('Москва', 'Город Москва', 'РОССИЯ', 'БОКС'),
+    ('Тверь', None, 'РОССИЯ', 'ПЛАВАНИЕ'),
+    ('Петербург', None, 'РОССИЯ', 'БОКС'),
+    ('Казань', 'Республика Татарстан', 'РОССИЯ', 'ПЛАВАНИЕ'),
+    ('Новосибирск', None, 'РОССИЯ', 'БОКС'),
+    ('Владивосток', None, 'РОССИЯ', 'ПЛАВАНИЕ'),
+    ('Минск', None, 'БЕЛАРУСЬ', 'БОКС'),
+]
+
+
+@pytest.fixture
+def events(app, monkeypatch):
+    # Индекс - синглтон процесса, а версии тестовых баз совпадают
+    monkeypatch.setattr(geo_index, '_snapshot', None)
+    start = datetime(2030, 3, 1)
+    for number in range(28):
+        city, region, country, sport_type = PLACES[number % len(PLACES)]
+        # Несколько мероприятий в один день: порядок внутри дня задает id
+        event_start = start + timedelta(days=number // 3)
+        db.session.add(Event(**geocode({
+            'ekp_number': f'{number:013d}', 'name': f'СОРЕВНОВАНИЕ {number}', 'sport_type': sport_type,
+            'location_city': city, 'location_region': region, 'location_country': country,
+            'start_date': event_start, 'end_date': event_start + timedelta(days=number % 4),
+        })))
+    db.session.commit()
+    return Event.query.order_by(Event.start_date, Event.id).all()
+
+
+def expected_near(client, events, radius_km, **params):
+    """Страница /events без near, отобранная по расстоянию от Москвы, с distance_km"""
+    cache.clear()
+    page = client.get('/events', query_string={'per_page': 100, **params}).get_json()['events']
+    distances = {
+        event.id: distance_km(*MOSCOW, event.latitude, event.longitude)
+        for event in events if event.latitude is not None
+    }
+    return [
+        {**event, 'distance_km': round(distances[event['id']], 1)}
+        for event in page if distances.get(event['id'], radius_km + 1) <= radius_km
+    ]
+
+
+def near(client, radius_km, **params):
+    cache.clear()
+    response = client.get('/events', query_string={
+        'near': f'{MOSCOW[0]},{MOSCOW[1]}', 'radius_km': radius_km, 'per_page': 100, **params
+    })
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_geocode(events):
+    by_city = {event.location_city: event for event in events}
+    assert by_city['Санкт-Петербург'].location_region == 'Город Санкт-Петербург'
+    assert by_city['Тверь'].location_region == 'Тверская область'
+    assert by_city['Минск'].latitude is None
+
+
+@pytest.mark.parametrize('radius_km', [50, 200, 1000, 3000])
+@pytest.mark.parametrize('params', [
+    {},
+    {'sport_type': 'БОКС'},
+    {'region': 'Тверская область'},
+    {'start_date': '2030-03-04', 'end_date': '2030-03-08'},
+])
+def test_near_matches_distance_filter(app, events, radius_km, params):
+    client = app.test_client()
+    expected = expected_near(client, events, radius_km, **params)
+    data = near(client, radius_km, **params)
+
+    assert data['events'] == expected
+    assert data['total'] == len(expected)
+    assert data['has_next'] is False
+
+
+def test_near_pages_and_cursor(app, events):
+    client = app.test_client()
+    expected = expected_near(client, events, 1000)
+    assert len(expected) > 5
+
+    pages = [near(client, 1000, per_page=2, page=page)['events'] for page in range(1, 5)]
+    assert sum(pages, []) == expected[:8]
+
+    collected, cursor = [], ''
+    while cursor is not None:
+        data = near(client, 1000, per_page=2, cursor=cursor)
+        collected.extend(data['events'])
+        cursor = data['next_cursor']
+    assert collected == expected
+
+
+@pytest.mark.parametrize('params', [
+    {'near': '55.75'},
+    {'near': 'север,юг'},
+    {'near': '95,37'},
+    {'near': '55.75,37.61', 'radius_km': 0},
+    {'near': '55.75,37.61', 'radius_km': 5000},
+    {'near': '55.75,37.61', 'q': 'БОКС'},
+])
+def test_invalid_near(app, events, params):
+    assert app.test_client().get('/events', query_string=params).status_code == 400
@@ -0,0 +1,28 @@
+"""Разбор эталонных синтетических календарей совпадает с benchmarks/data/golden"""
+import json
+import os
+
+import pytest
+
+from app.services.parser import PDFParser
+from check_golden import GOLDEN_CORPUS, GOLDEN_DIR, diff, extract
+
+synthetic_calendar = pytest.importorskip('synthetic_calendar')
+
+
+@pytest.mark.parametrize('mode', PDFParser.MODES)
+@pytest.mark.parametrize('name', sorted(GOLDEN_CORPUS))
+def test_golden_corpus(tmp_path, name, mode):
+    pages, per_page, seed, skip = GOLDEN_CORPUS[name]
+    pdf_path = str(tmp_path / f'{name}.pdf')
+    try:
+        synthetic_calendar.generate(pdf_path, pages, per_page, seed=seed, skip=skip)
+    except OSError:
+        pytest.skip('Нет TTF-шрифта с кириллицей для синтетического календаря')
+
+    # У режима table свои эталоны <name>.table.json
+    suffix = '' if mode == PDFParser.TEXT_MODE else f'.{mode}'
+    with open(os.path.join(GOLDEN_DIR, f'{name}{suffix}.json'), encoding='utf-8') as f:
+        expected = json.load(f)
+
+    assert diff(expected, extract(pdf_path, mode)) == []
@@ -0,0 +1,160 @@
+"""Импорт PDF через Celery: контрольная точка и продолжение после падения воркера"""
+import shutil
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.event import Event
+from app.models.import_job import ImportJob
+from app.services import imports
+from app.services.dataset import dataset_version
+from app.services.parser import PDFParser
+from app.tasks import import_pdf
+
+synthetic_calendar = pytest.importorskip('synthetic_calendar')
+
+PAGES = 6
+EVENTS_PER_PAGE = 5
+
+
+class WorkerCrash(BaseException):
+    """Гибель процесса воркера: run_import_job ловит только Exception"""
+
+
+@pytest.fixture
+def calendar_pdf(tmp_path):
+    path = str(tmp_path / 'calendar.pdf')
+    try:
+        expected = synthetic_calendar.generate(path, PAGES, EVENTS_PER_PAGE)
+    except OSError:
+        pytest.skip('Нет TTF-шрифта с кириллицей для синтетического календаря')
+    return path, expected
+
+
+@pytest.fixture
+def crash_after_page(monkeypatch):
+    """
+    Первый разбор падает после контрольной точки на странице 3; записывает
+    страницу, с которой начинается каждый разбор
+    """
+    start_pages = []
+    parse_pdf = PDFParser.parse_pdf
+
+    def crashing_parse_pdf(self, file_path, start_page=1, checkpoint_callback=None, **kwargs):
+        start_pages.append(start_page)
+
+        def checkpoint(pages_done, sport_type):
+            checkpoint_callback(pages_done, sport_type)
+            if len(start_pages) == 1 and pages_done >= 3:
+                raise WorkerCrash()
+
+        return parse_pdf(self, file_path, start_page=start_page, checkpoint_callback=checkpoint, **kwargs)
+
+    monkeypatch.setattr(PDFParser, 'parse_pdf', crashing_parse_pdf)
+    return start_pages
+
+
+@pytest.fixture
+def reference_events(make_app, calendar_pdf):
+    """Мероприятия того же календаря после разбора без падений, в отдельной базе"""
+    reference = make_app('reference.db')
+    with reference.app_context():
+        db.create_all()
+        PDFParser(batch_size=EVENTS_PER_PAGE).parse_pdf(calendar_pdf[0])
+        events = imported_events()
+        db.session.remove()
+    return events
+
+
+def stored_job(job_id):
+    """Задание из базы: задача Celery пишет его в своей сессии (свой контекст приложения)"""
+    db.session.expire_all()
+    return db.session.get(ImportJob, job_id)
+
+
+def imported_events():
+    return {event.ekp_number: event.to_dict() for event in Event.query.all()}
+
+
+def test_import_runs_through_celery(app, eager_celery, calendar_pdf):
+    path, expected = calendar_pdf
+
+    job = stored_job(imports.enqueue_import('calendar.pdf', path).id)
+    assert job.status == ImportJob.COMPLETED
+    assert job.pages_done == PAGES
+    assert set(imported_events()) == {event['ekp_number'] for event in expected}
+
+
+def test_identical_upload_keeps_document_and_version(app, eager_celery, calendar_pdf, tmp_path):
+    path, expected = calendar_pdf
+    # Файл задания удаляется после импорта
+    again = str(tmp_path / 'again.pdf')
+    shutil.copy(path, again)
+
+    first = stored_job(imports.enqueue_import('calendar.pdf', path).id)
+    version = dataset_version()
+
+    job = stored_job(imports.enqueue_import('calendar.pdf', again).id)
+    assert job.status == ImportJob.COMPLETED
+    assert job.document_id is not None
+    assert job.document_id == first.document_id
+    assert dataset_version() == version
+    assert len(imported_events()) == len(expected)
+
+
+def test_requeue_only_running_jobs_with_expired_lease(app, monkeypatch):
+    delayed = []
+    monkeypatch.setattr(import_pdf, 'delay', delayed.append)
+    expired = datetime.utcnow() - app.config['IMPORT_JOB_STALE_AFTER'] - timedelta(minutes=1)
+    jobs = {
+        # Задание в очереди ждет в брокере, сколько бы ни ждало
+        'queued': ImportJob(status=ImportJob.QUEUED, updated_at=expired),
+        'abandoned': ImportJob(status=ImportJob.RUNNING, worker='host:1', updated_at=expired),
+        'running': ImportJob(status=ImportJob.RUNNING, worker='host:2'),
+    }
+    for name, job in jobs.items():
+        job.filename = job.file_path = f'{name}.pdf'
+        db.session.add(job)
+    db.session.commit()
+
+    assert imports.requeue_stale_jobs() == 1
+    assert delayed == [jobs['abandoned'].id]
+    assert {name: stored_job(job.id).status for name, job in jobs.items()} == {
+        'queued': ImportJob.QUEUED, 'abandoned': ImportJob.QUEUED, 'running': ImportJob.RUNNING,
+    }
+
+
+def test_import_resumes_from_checkpoint(app, eager_celery, calendar_pdf, reference_events, crash_after_page):
+    path, expected = calendar_pdf
+    app.config['INGEST_BATCH_SIZE'] = EVENTS_PER_PAGE  # контрольная точка после каждой пачки
+
+    with pytest.raises(WorkerCrash):
+        imports.enqueue_import('calendar.pdf', path)
+    db.session.rollback()
+
+    job = stored_job(ImportJob.query.one().id)
+    assert job.status == ImportJob.RUNNING
+    assert job.pages_done >= 3
+    pages_done = job.pages_done
+
+    # Пока аренда воркера не истекла, повторная доставка задачи не запускает второй разбор
+    import_pdf.delay(job.id)
+    assert crash_after_page == [1]
+
+    job.updated_at = datetime.utcnow() - app.config['IMPORT_JOB_STALE_AFTER'] - timedelta(minutes=1)
+    db.session.commit()
+    assert imports.requeue_stale_jobs() == 1
+
+    job = stored_job(job.id)
+    assert crash_after_page == [1, pages_done + 1]
+    assert job.status == ImportJob.COMPLETED
+    assert job.pages_done == PAGES
+
+    # Все мероприятия записаны один раз и так же, как при разборе без падения:
+    # вид спорта продолженных страниц взят из контрольной точки
+    events = imported_events()
+    assert set(events) == {event['ekp_number'] for event in expected}
+    for ekp_number, event in reference_events.items():
+        assert events[ekp_number]['sport_type'] == event['sport_type']
+        assert events[ekp_number]['name'] == event['name']
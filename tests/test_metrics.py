@@ -0,0 +1,81 @@
+import json
+import multiprocessing
+import os
+import re
+import time
+
+import pytest
+
+from app import db
+from app.models.import_job import ParserStageTotal
+from app.services.metrics import registry
+
+
+@pytest.fixture
+def multiproc_registry(tmp_path):
+    """Реестр в режиме файлов процессов, запись после каждого запроса"""
+    registry.reset()
+    registry.configure(str(tmp_path / 'metrics'), flush_interval=0)
+    yield registry
+    registry.configure(None)
+    registry.reset()
+
+
+def requests_count(text, route):
+    pattern = rf'^http_request_duration_seconds_count\{{method="GET",route="{re.escape(route)}",status="200"\}} (\d+)$'
+    return sum(int(value) for value in re.findall(pattern, text, re.MULTILINE))
+
+
+def serve(app, count):
+    client = app.test_client()
+    for _ in range(count):
+        assert client.get('/sports').status_code == 200
+
+
+def test_metrics_are_summed_across_worker_processes(app, multiproc_registry):
+    # Как gunicorn с preload_app: приложение создано до fork, воркеры - дочерние процессы
+    serve(app, 1)
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=serve, args=(app, count)) for count in (2, 3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    # Значения, унаследованные воркерами от родителя, не учитываются дважды
+    text = app.test_client().get('/metrics').get_data(as_text=True)
+    assert requests_count(text, '/sports') == 6
+
+
+def flushed_requests_count(registry, route):
+    """Запросы маршрута в файле этого процесса - то, что видят остальные воркеры"""
+    path = os.path.join(registry.multiproc_dir, f'{os.getpid()}.json')
+    with open(path, encoding='utf-8') as f:
+        state = json.load(f)
+    return sum(sum(counts) for labels, counts, total in state['http_request_duration_seconds'] if labels[1] == route)
+
+
+def test_throttled_metrics_are_flushed_at_end_of_interval(app, multiproc_registry):
+    multiproc_registry.configure(multiproc_registry.multiproc_dir, flush_interval=0.3)
+    serve(app, 1)
+    # Запросы внутри интервала в файл сразу не попадают
+    serve(app, 2)
+    assert flushed_requests_count(multiproc_registry, '/sports') == 1
+
+    # Без новых запросов их записывает таймер в конце интервала
+    deadline = time.monotonic() + 5
+    while flushed_requests_count(multiproc_registry, '/sports') != 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert flushed_requests_count(multiproc_registry, '/sports') == 3
+
+
+def test_parser_stage_totals_accumulate_per_job(app):
+    ParserStageTotal.add({'ocr': {'seconds': 1.5, 'calls': 2}})
+    ParserStageTotal.add({'ocr': {'seconds': 2.0, 'calls': 1}, 'db_save': {'seconds': 0.5, 'calls': 3}})
+    db.session.commit()
+
+    text = app.test_client().get('/metrics').get_data(as_text=True)
+    assert 'pdf_parser_stage_seconds_total{stage="ocr"} 3.5' in text
+    assert 'pdf_parser_stage_calls_total{stage="ocr"} 3' in text
+    assert 'pdf_parser_stage_calls_total{stage="db_save"} 3' in text
@@ -0,0 +1,53 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from app.services import parser as parser_module
+from app.services.parser import PDFParser
+from check_parse_memory import parse_and_measure
+from synthetic_calendar import generate
+
+# Без закрытия страниц 60 страниц дают рост около 180 МБ
+TOLERANCE_MB = 20
+
+
+def test_peak_memory_does_not_grow_with_pages(tmp_path):
+    context = multiprocessing.get_context('spawn')
+    peaks = []
+    for pages in (10, 40):
+        pdf_path = str(tmp_path / f'calendar_{pages}.pdf')
+        generate(pdf_path, pages, 15)
+        database_url = 'sqlite:///' + str(tmp_path / f'memory_{pages}.db')
+
+        # Новый процесс на каждый размер, чтобы пики не накладывались
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            events, peak = executor.submit(parse_and_measure, pdf_path, database_url, 0).result()
+        assert events == pages * 15
+        peaks.append(peak)
+
+    assert peaks[1] - peaks[0] <= TOLERANCE_MB, peaks
+
+
+class FakePDF:
+    def close(self):
+        pass
+
+
+def test_memory_limit_without_rss(monkeypatch):
+    # Над потолком документ открывается заново; если RSS после этого не прочитать, разбор продолжается
+    readings = iter([600, None])
+    monkeypatch.setattr(parser_module, 'current_rss_mb', lambda: next(readings))
+    monkeypatch.setattr(parser_module.pdfplumber, 'open', lambda path: FakePDF())
+
+    pdf = PDFParser(max_rss_mb=500)._check_memory(FakePDF(), 'calendar.pdf')
+
+    assert isinstance(pdf, FakePDF)
+
+
+def test_memory_limit_exceeded(monkeypatch):
+    monkeypatch.setattr(parser_module, 'current_rss_mb', lambda: 600)
+    monkeypatch.setattr(parser_module.pdfplumber, 'open', lambda path: FakePDF())
+
+    with pytest.raises(MemoryError):
+        PDFParser(max_rss_mb=500)._check_memory(FakePDF(), 'calendar.pdf')
@@ -0,0 +1,44 @@
+"""
+Планы запросов API к events без полного сканирования (benchmarks/check_query_plans.py).
+
+По умолчанию - небольшая база SQLite. Проверка на объеме и на PostgreSQL
+включается переменными окружения:
+    QUERY_PLANS_ROWS=500000 python -m pytest tests/test_query_plans.py
+    QUERY_PLANS_DATABASE=postgresql://localhost/bench python -m pytest tests/test_query_plans.py
+QUERY_PLANS_DATABASE - отдельная база: таблица events в ней очищается.
+"""
+import os
+
+import pytest
+
+from config import Config
+from app import create_app, db
+from check_query_plans import FULL_SCAN_RE, explain, filter_queries, seed
+
+ROWS = int(os.environ.get('QUERY_PLANS_ROWS', 2000))
+DATABASE = os.environ.get('QUERY_PLANS_DATABASE')
+
+
+@pytest.fixture(scope='module')
+def seeded(tmp_path_factory):
+    class PlansConfig(Config):
+        SQLALCHEMY_DATABASE_URI = DATABASE or 'sqlite:///' + str(tmp_path_factory.mktemp('plans') / 'plans.db')
+        CACHE_TYPE = 'SimpleCache'
+
+    app = create_app(PlansConfig)
+    with app.app_context():
+        db.create_all()
+        seed(ROWS)
+        yield app
+        db.session.remove()
+
+
+def test_seeded_queries_use_indexes(seeded):
+    full_scans = {}
+    for label, query in filter_queries():
+        plans = explain(query)
+        assert plans, label
+        if any(FULL_SCAN_RE.search(line) for line in plans):
+            full_scans[label] = plans
+
+    assert full_scans == {}
@@ -0,0 +1,104 @@
+"""Пакетная сериализация Event.serialize_rows совпадает с построчной"""
+import sqlite3
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import aliased
+
+from app import db
+from app.models.dictionary import DICTIONARY_MODELS
+from app.models.event import Event
+
+NOW = datetime(2026, 5, 1, 12, 30)
+
+# (начало, окончание) относительно NOW, в том числе на границах статусов и дней
+OFFSETS = [
+    (timedelta(days=-10), timedelta(days=-3)),
+    (timedelta(days=-2), -timedelta(seconds=1)),
+    (timedelta(days=-2), timedelta(0)),
+    (timedelta(0), timedelta(days=1)),
+    (timedelta(seconds=1), timedelta(days=2)),
+    (timedelta(hours=-1), timedelta(hours=23, minutes=59)),
+    (timedelta(days=1), timedelta(days=1)),
+    (timedelta(days=1, seconds=-1), timedelta(days=3)),
+    (timedelta(days=45, hours=6), timedelta(days=50)),
+    (timedelta(days=400), timedelta(days=402)),
+]
+
+
+def reference_dict(event, now):
+    """Сериализация одного мероприятия так, как ее делал to_dict до пакетной версии"""
+    if now < event.start_date:
+        days_left = (event.start_date - now).days
+        status = ('upcoming', days_left, f'До начала: {days_left} дн.', 'text-blue-600')
+    elif now <= event.end_date:
+        days_left = (event.end_date - now).days
+        status = ('ongoing', days_left, f'До окончания: {days_left} дн.', 'text-red-600')
+    else:
+        status = ('completed', 0, 'Мероприятие завершено', 'text-gray-600')
+
+    data = {name: getattr(event, name) for name in Event.SERIALIZED_COLUMNS}
+    data['start_date'] = event.start_date.strftime('%d.%m.%Y')
+    data['end_date'] = event.end_date.strftime('%d.%m.%Y')
+    data.update(zip(('time_status', 'days_left', 'time_message', 'time_color'), status))
+    data['is_favorite'] = False
+    return data
+
+
+def add_events(now):
+    for number, (start, end) in enumerate(OFFSETS):
+        db.session.add(Event(
+            ekp_number=f'{number:013d}', name=f'СОРЕВНОВАНИЕ {number}', sport_type='БОКС',
+            discipline='ВЕСОВАЯ КАТЕГОРИЯ 60 КГ' if number % 2 else None, program='ЛИЧНЫЕ',
+            start_date=now + start, end_date=now + end, location_country='РОССИЯ',
+            location_region='Тверская область' if number % 3 else None, location_city='Тверь',
+            participants_count=number * 10 or None, gender='мужчины', age_group='до 18 лет',
+        ))
+    db.session.commit()
+    return Event.query.order_by(Event.id).all()
+
+
+def test_serialize_rows_matches_per_row_serialization(app):
+    events = add_events(NOW)
+    rows = db.session.query(*Event.serialized_columns()).order_by(Event.id).all()
+
+    assert Event.serialize_rows(rows, now=NOW) == [reference_dict(event, NOW) for event in events]
+    # Объекты Event сериализуются так же, как строки выборки
+    assert Event.serialize_rows(events, now=NOW) == Event.serialize_rows(rows, now=NOW)
+
+
+def test_to_dict_matches_serialize_rows(app):
+    # to_dict читает часы сам: сдвиг на 12 часов уводит границы статусов и дней от времени теста
+    events = add_events(datetime.utcnow() + timedelta(hours=12))
+    rows = db.session.query(*Event.serialized_columns()).order_by(Event.id).all()
+
+    assert [event.to_dict() for event in events] == Event.serialize_rows(rows)
+
+
+def joined_names():
+    """Названия справочных полей по JOIN со справочниками, мимо кэша процесса"""
+    query = db.session.query(Event.id)
+    columns = []
+    for field, model in DICTIONARY_MODELS.items():
+        alias = aliased(model)
+        query = query.outerjoin(alias, getattr(Event, field + '_id') == alias.id)
+        columns.append(alias.name.label(field))
+    return [row._asdict() for row in query.add_columns(*columns).order_by(Event.id)]
+
+
+def test_dictionary_fields_decode_like_join(app):
+    events = add_events(NOW)
+    # Значение справочника из другого процесса: в кэше этого процесса его нет
+    with sqlite3.connect(db.engine.url.database) as connection:
+        connection.execute("INSERT INTO sport_types (name) VALUES ('ПЛАВАНИЕ')")
+        connection.execute(
+            "UPDATE events SET sport_type_id = (SELECT id FROM sport_types WHERE name = 'ПЛАВАНИЕ') WHERE id = ?",
+            (events[0].id,)
+        )
+    db.session.expire_all()
+    rows = db.session.query(*Event.serialized_columns()).order_by(Event.id).all()
+
+    expected = joined_names()
+    assert expected[0]['sport_type'] == 'ПЛАВАНИЕ'
+    for serialized in (Event.serialize_rows(rows, now=NOW), [event.to_dict() for event in events]):
+        assert [{'id': data['id'], **{field: data[field] for field in DICTIONARY_MODELS}}
+                for data in serialized] == expected
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import cache, db
+from app.models.event import Event
+from app.routes.main import used_dictionary_values
+from app.services.snapshot import event_snapshot
+
+SPORTS = ['ПЛАВАНИЕ', 'БОКС', 'АЙКИДО']
+REGIONS = ['Тверская область', 'Алтайский край', None]
+
+
+@pytest.fixture
+def events(app, monkeypatch):
+    # Снимок - синглтон процесса, а версии тестовых баз совпадают
+    monkeypatch.setattr(event_snapshot, '_snapshot', None)
+    now = datetime.utcnow().replace(microsecond=0)
+    # Прошедшие, идущие и будущие мероприятия; граница now не совпадает ни с одной датой
+    for number, days in enumerate(range(-40, 40, 3)):
+        start = now + timedelta(days=days, hours=1)
+        db.session.add(Event(
+            ekp_number=f'{number:013d}', name=f'СОРЕВНОВАНИЕ {number}',
+            sport_type=SPORTS[number % len(SPORTS)], location_region=REGIONS[number % len(REGIONS)],
+            location_country='РОССИЯ', start_date=start, end_date=start + timedelta(days=number % 7),
+        ))
+    db.session.commit()
+    return now
+
+
+def facets(client, **params):
+    cache.clear()
+    return client.get('/facets', query_string=params).get_json()
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'sport_type': 'БОКС'},
+    {'region': 'Алтайский край'},
+    {'sport_type': 'ПЛАВАНИЕ', 'region': 'Тверская область'},
+    {'start_date': '2000-01-01', 'end_date': '2100-01-01'},
+])
+def test_facets_time_status_from_snapshot(app, events, params):
+    client = app.test_client()
+    expected = facets(client, **params)
+
+    app.config['EVENTS_SNAPSHOT'] = True
+    actual = facets(client, **params)
+
+    assert actual == expected
+    assert expected['time_status']['ongoing'] > 0
+    assert expected['time_status']['upcoming'] > 0
+
+
+def test_snapshot_queries_match_database(app, events):
+    snapshot = event_snapshot.get()
+
+    assert sorted(row.id for row in snapshot.rows(snapshot.ongoing())) == sorted(
+        event.id for event in Event.get_ongoing_events()
+    )
+    assert snapshot.sports == [name for name, in used_dictionary_values('sport_type')]
+    assert snapshot.regions == [name for name, in used_dictionary_values('location_region')]